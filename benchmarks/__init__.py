@@ -0,0 +1 @@
+"""Бенчмарки тестера торговых стратегий."""
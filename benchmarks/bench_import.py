@@ -0,0 +1,125 @@
+"""
+Бенчмарк времени импорта приложения.
+
+Импортирует модуль приложения в отдельных процессах, измеряет общее
+время импорта и строит отчет по модулям (python -X importtime).
+Проверяет, что тяжелые зависимости не загружаются при старте,
+и что время импорта укладывается в бюджет: при нарушении завершается
+с кодом 1, поэтому может выполняться в CI.
+
+Запуск: python -m benchmarks.bench_import --budget-ms 1000 --repeat 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+MODULE = "trading_strategy_tester.api.app"
+
+# Зависимости, которые должны загружаться только при первом использовании
+LAZY_MODULES = ("pandas", "numpy", "moexalgo", "pyarrow", "requests")
+
+_MEASURE = """
+import sys, time, json
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"elapsed": elapsed, "loaded": [
+    name for name in {lazy!r} if name in sys.modules]}}))
+"""
+
+
+def measure_wall(module: str) -> dict:
+    """Импортирует модуль в новом процессе и возвращает время и
+    загруженные тяжелые зависимости."""
+    code = _MEASURE.format(module=module, lazy=LAZY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_modules(module: str) -> Dict[str, Dict[str, int]]:
+    """
+    Импортирует модуль с -X importtime и возвращает время по модулям.
+
+    Returns:
+        Dict[str, Dict[str, int]]: Модуль -> собственное и накопленное
+            время импорта в микросекундах.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        check=True, capture_output=True, text=True).stderr
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = {"self_us": int(self_us),
+                                 "cumulative_us": int(cumulative_us)}
+    return modules
+
+
+def run(module: str, repeat: int, top: int) -> dict:
+    """Выполняет бенчмарк и возвращает отчет."""
+    walls: List[float] = []
+    loaded = set()
+    for _ in range(repeat):
+        result = measure_wall(module)
+        walls.append(result["elapsed"])
+        loaded.update(result["loaded"])
+
+    runs = [measure_modules(module) for _ in range(repeat)]
+    names = set.intersection(*(set(r) for r in runs))
+    per_module = {
+        name: {key: int(statistics.median(r[name][key] for r in runs))
+               for key in ("self_us", "cumulative_us")}
+        for name in names
+    }
+    slowest = sorted(per_module.items(),
+                     key=lambda item: item[1]["self_us"], reverse=True)
+    project = {name: stats for name, stats in per_module.items()
+               if name.startswith("trading_strategy_tester")}
+
+    return {
+        "module": module,
+        "import_ms_median": round(statistics.median(walls) * 1000, 1),
+        "import_ms_min": round(min(walls) * 1000, 1),
+        "heavy_modules_loaded": sorted(loaded),
+        "slowest_modules": [{"module": name, **stats}
+                            for name, stats in slowest[:top]],
+        "project_modules": dict(sorted(
+            project.items(), key=lambda item: item[1]["cumulative_us"],
+            reverse=True)),
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    """Точка входа бенчмарка. Возвращает 1 при нарушении бюджета."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default=MODULE)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=1000,
+                        help="Бюджет медианного времени импорта")
+    args = parser.parse_args(argv)
+
+    report = run(args.module, args.repeat, args.top)
+    violations = []
+    if report["import_ms_median"] > args.budget_ms:
+        violations.append(
+            f"время импорта {report['import_ms_median']} мс превышает "
+            f"бюджет {args.budget_ms} мс")
+    if report["heavy_modules_loaded"]:
+        violations.append("при импорте загружены: "
+                          + ", ".join(report["heavy_modules_loaded"]))
+    report["budget_ms"] = args.budget_ms
+    report["violations"] = violations
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Офлайн-бенчмарк загрузки исторических данных.
+
+Синтетические свечи записываются в хранилище записей, после чего
+Facade.run_parsing многократно загружает их в отдельную БД через
+источник воспроизведения (replay) и через локальную заглушку ISS (iss).
+Сеть и биржа не используются, результаты воспроизводимы.
+Пиковый объем памяти Python (tracemalloc) измеряется отдельным запуском.
+
+Запуск: python -m benchmarks.bench_ingestion --days 5000 --repeat 5
+"""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.synthetic import make_candles
+from trading_strategy_tester.api.schemas import RequestParameters
+from trading_strategy_tester.config import settings
+from trading_strategy_tester.services.candle_sources import (
+    IssHttpSource, RecordingStore, ReplaySource)
+from trading_strategy_tester.services.facade import Facade
+from trading_strategy_tester.utils import iss_stub
+
+TICKER = "BENCH"
+
+
+def run(days: int, repeat: int) -> dict:
+    """Выполняет бенчмарк и возвращает статистику по каждому источнику."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        settings.db_path = tmp_dir / "bench.db"
+
+        df = make_candles(days)
+        start = df["begin"].iloc[0].strftime("%Y-%m-%d")
+        end = df["begin"].iloc[-1].strftime("%Y-%m-%d")
+        store = RecordingStore(tmp_dir / "recordings")
+        store.save(TICKER, start, end, "1d", df)
+        param = RequestParameters(ticker=TICKER, start=start, end=end)
+
+        server = iss_stub.start_in_thread(store.root)
+        sources = {
+            "replay": ReplaySource(store),
+            "iss": IssHttpSource(
+                f"http://127.0.0.1:{server.server_port}"),
+        }
+        report = {}
+        try:
+            for name, source in sources.items():
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    asyncio.run(Facade.run_parsing(param, source))
+                    timings.append(time.perf_counter() - started)
+                best = min(timings)
+                tracemalloc.start()
+                asyncio.run(Facade.run_parsing(param, source))
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                report[name] = {
+                    "rows": days,
+                    "best_s": round(best, 4),
+                    "mean_s": round(sum(timings) / len(timings), 4),
+                    "rows_per_s": round(days / best, 1),
+                    "peak_mb": round(peak / 2 ** 20, 2),
+                }
+        finally:
+            server.shutdown()
+            server.server_close()
+        return report
+
+
+def main():
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(json.dumps(run(args.days, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Бенчмарк сериализации ответов с Decimal.
+
+Сравнивает стандартный путь FastAPI (jsonable_encoder + JSONResponse)
+с DecimalJSONResponse для итогов стратегии, ряда результатов
+(TradingResult с Decimal) и строк истории, прочитанных из БД.
+Данные получены расчетом стратегии по синтетическим свечам.
+
+Запуск: python -m benchmarks.bench_json --days 5000 --repeat 20
+"""
+
+import argparse
+import json
+import time
+from dataclasses import astuple, fields
+from decimal import Decimal
+from typing import Callable
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from benchmarks.synthetic import make_stock_candles
+from trading_strategy_tester.api.responses import (
+    DecimalJSONResponse, RawJSON, encode_series)
+from trading_strategy_tester.api.schemas import StrategyParameters
+from trading_strategy_tester.models.trading_result import TradingResult
+from trading_strategy_tester.services.facade import Facade
+
+COLUMNS = [field.name for field in fields(TradingResult)]
+NUMERIC = COLUMNS[1:]
+
+
+def _best(func: Callable[[], bytes], repeat: int) -> tuple:
+    """Возвращает лучшее время вызова и размер результата."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = func()
+        timings.append(time.perf_counter() - started)
+    return min(timings), len(body)
+
+
+def run(days: int, repeat: int) -> dict:
+    """Выполняет бенчмарк и возвращает статистику по каждому ответу."""
+    param = StrategyParameters(
+        ticker="BENCH", initial_cache=Decimal("100000"),
+        buy_price=Decimal("240"), sell_price=Decimal("260"),
+        commission_rate=Decimal("0.05"), tax_rate=Decimal("13"))
+    candles = make_stock_candles(days)
+    results, summary, _ = Facade.calculate(candles, param)
+    # Строки истории в том виде, в котором их возвращает БД
+    db_rows = [{name: value if isinstance(value, int) else str(value)
+                for name, value in zip(COLUMNS, astuple(result))}
+               for result in results]
+
+    cases = {
+        "summary": (
+            lambda: JSONResponse(
+                jsonable_encoder({"success": summary})).body,
+            lambda: DecimalJSONResponse({"success": summary}).body,
+        ),
+        "series_decimal": (
+            lambda: JSONResponse(jsonable_encoder(
+                {"rows": [astuple(r) for r in results]})).body,
+            lambda: DecimalJSONResponse({"rows": RawJSON(encode_series(
+                COLUMNS, (astuple(r) for r in results), NUMERIC))}).body,
+        ),
+        "history_rows": (
+            lambda: JSONResponse(jsonable_encoder({"rows": db_rows})).body,
+            lambda: DecimalJSONResponse({"rows": RawJSON(encode_series(
+                COLUMNS, ([row[name] for name in COLUMNS]
+                          for row in db_rows), NUMERIC))}).body,
+        ),
+    }
+
+    report = {}
+    for name, (default, fast) in cases.items():
+        default_s, default_size = _best(default, repeat)
+        fast_s, fast_size = _best(fast, repeat)
+        report[name] = {
+            "default_ms": round(default_s * 1000, 3),
+            "decimal_json_ms": round(fast_s * 1000, 3),
+            "speedup": round(default_s / fast_s, 2),
+            "default_bytes": default_size,
+            "decimal_json_bytes": fast_size,
+        }
+    return report
+
+
+def main():
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.days, args.repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
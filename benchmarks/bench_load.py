@@ -0,0 +1,499 @@
+"""
+Нагрузочный тест HTTP API.
+
+Заполняет временную БД синтетическими свечами и результатами расчетов,
+после чего нагружает приложение запросами заданной смеси эндпоинтов
+с несколькими уровнями параллельности:
+- asgi - приложение вызывается в том же процессе напрямую через ASGI
+  (без сети и HTTP-сервера);
+- http - приложение запускается отдельным процессом uvicorn, запросы
+  идут по HTTP/1.1 через localhost (соединение на каждого клиента).
+
+Каждый клиент отправляет запросы один за другим в течение заданного
+времени. Отчет (JSON) содержит пропускную способность, перцентили
+задержки p50/p95/p99 и долю ошибок - в целом и по эндпоинтам.
+При превышении --max-p99-ms или --max-error-rate завершается с кодом 1.
+Используются только стандартная библиотека и зависимости приложения.
+
+Запуск: python -m benchmarks.bench_load --mode asgi,http
+    --concurrency 1,8,32 --duration 10
+    --mix generate-report=1,show-history=3,results=4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+from benchmarks.synthetic import make_candles
+from trading_strategy_tester.api.schemas import (RequestParameters,
+                                                 StrategyParameters)
+from trading_strategy_tester.config import settings
+from trading_strategy_tester.services.candle_sources import (
+    RecordingStore, ReplaySource)
+from trading_strategy_tester.services.facade import Facade
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Запрос: метод, путь с параметрами, тело и заголовки
+Request = Tuple[str, str, bytes, Dict[str, str]]
+
+FORM = {"content-type": "application/x-www-form-urlencoded"}
+
+DEFAULT_MIX = "generate-report=1,show-history=3,results=4,report=2"
+
+
+@dataclass
+class Workload:
+    """
+    Данные, по которым строятся запросы.
+
+    Атрибуты:
+        tickers (List[str]): Тикеры с загруженными свечами и результатами.
+        param_sets (Dict[str, List[dict]]): Наборы параметров стратегии
+            по тикерам.
+        rows (Dict[str, int]): Количество строк результатов по тикерам.
+    """
+    tickers: List[str]
+    param_sets: Dict[str, List[dict]]
+    rows: Dict[str, int] = field(default_factory=dict)
+
+    def params(self, rnd: random.Random) -> dict:
+        """Возвращает случайный набор параметров случайного тикера."""
+        ticker = rnd.choice(self.tickers)
+        return {"ticker": ticker, **rnd.choice(self.param_sets[ticker])}
+
+
+def _generate_report(work: Workload, rnd: random.Random) -> Request:
+    body = urlencode(work.params(rnd)).encode()
+    return "POST", "/api/generate-report", body, FORM
+
+
+def _report(work: Workload, rnd: random.Random) -> Request:
+    return "GET", "/api/report?" + urlencode(work.params(rnd)), b"", {}
+
+
+def _show_history(work: Workload, rnd: random.Random) -> Request:
+    body = urlencode({"ticker": rnd.choice(work.tickers)}).encode()
+    return "POST", "/api/show-history", body, FORM
+
+
+def _results(work: Workload, rnd: random.Random) -> Request:
+    ticker = rnd.choice(work.tickers)
+    offset = rnd.randrange(max(1, work.rows.get(ticker, 1) - 200))
+    return ("GET", f"/api/results/{ticker}?offset={offset}&limit=200",
+            b"", {})
+
+
+def _summaries(work: Workload, rnd: random.Random) -> Request:
+    return "GET", "/api/summaries?limit=20", b"", {}
+
+
+ENDPOINTS: Dict[str, Callable[[Workload, random.Random], Request]] = {
+    "generate-report": _generate_report,
+    "report": _report,
+    "show-history": _show_history,
+    "results": _results,
+    "summaries": _summaries,
+}
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """
+    Разбирает смесь запросов вида 'generate-report=1,show-history=3'.
+
+    Raises:
+        ValueError: Если эндпоинт неизвестен или вес не положителен.
+    """
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.strip().partition("=")
+        if name not in ENDPOINTS:
+            raise ValueError(f"Неизвестный эндпоинт: {name}")
+        mix[name] = float(weight or 1)
+        if mix[name] <= 0:
+            raise ValueError(f"Вес эндпоинта {name} должен быть больше 0")
+    return mix
+
+
+def percentile(values: Sequence[float], share: float) -> Optional[float]:
+    """Возвращает перцентиль (по ближайшему рангу) отсортированного ряда."""
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * share // 1))
+    return values[int(rank) - 1]
+
+
+def summarize(latencies: List[float], errors: int,
+              elapsed: float) -> dict:
+    """Возвращает статистику задержек (мс) и ошибок группы запросов."""
+    latencies = sorted(latencies)
+    total = len(latencies)
+
+    def ms(value: Optional[float]) -> Optional[float]:
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 1) if elapsed else None,
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else None,
+    }
+
+
+class AsgiClient:
+    """Клиент, вызывающий ASGI-приложение в том же процессе."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method: str, target: str, body: bytes,
+                      headers: Dict[str, str]) -> int:
+        """Выполняет запрос и возвращает код ответа."""
+        path, _, query = target.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"bench")] + [
+                (name.encode(), value.encode())
+                for name, value in headers.items()],
+            "client": ("127.0.0.1", 0),
+            "server": ("bench", 80),
+        }
+        sent = False
+        status = 0
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body,
+                        "more_body": False}
+            # Клиент не отключается, пока не получен ответ
+            await asyncio.Event().wait()
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await self.app(scope, receive, send)
+        return status
+
+
+class HttpClient:
+    """Клиент HTTP/1.1 с постоянным соединением на стандартной библиотеке."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def request(self, method: str, target: str, body: bytes,
+                      headers: Dict[str, str]) -> int:
+        """Выполняет запрос и возвращает код ответа."""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port)
+        head = [f"{method} {target} HTTP/1.1", f"Host: {self.host}",
+                f"Content-Length: {len(body)}"]
+        head += [f"{name}: {value}" for name, value in headers.items()]
+        self.writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            await self.close()
+            raise ConnectionError("Соединение закрыто сервером")
+        status = int(status_line.split()[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get("transfer-encoding") == "chunked":
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0],
+                           16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        else:
+            await self.reader.readexactly(
+                int(response_headers.get("content-length", 0)))
+        if response_headers.get("connection") == "close":
+            await self.close()
+        return status
+
+    async def close(self) -> None:
+        """Закрывает соединение."""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+async def run_level(make_client: Callable[[], object], work: Workload,
+                    mix: Dict[str, float], concurrency: int,
+                    duration: float, seed: int) -> dict:
+    """
+    Нагружает приложение concurrency клиентами в течение duration секунд.
+
+    Returns:
+        dict: Статистика в целом и по эндпоинтам.
+    """
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    statuses: Dict[int, int] = defaultdict(int)
+    names, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + duration
+
+    async def client_loop(number: int) -> None:
+        rnd = random.Random(seed * 1000 + number)
+        client = make_client()
+        try:
+            while time.perf_counter() < deadline:
+                name = rnd.choices(names, weights)[0]
+                method, target, body, headers = ENDPOINTS[name](work, rnd)
+                started = time.perf_counter()
+                try:
+                    status = await client.request(method, target, body,
+                                                  headers)
+                except (OSError, ValueError, asyncio.IncompleteReadError):
+                    status = 0
+                latencies[name].append(time.perf_counter() - started)
+                statuses[status] += 1
+                if not 200 <= status < 400:
+                    errors[name] += 1
+        finally:
+            if isinstance(client, HttpClient):
+                await client.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_loop(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    overall = summarize([v for values in latencies.values() for v in values],
+                        sum(errors.values()), elapsed)
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        **overall,
+        "statuses": {str(code): count
+                     for code, count in sorted(statuses.items())},
+        "endpoints": {name: summarize(latencies[name], errors[name],
+                                      elapsed)
+                      for name in names if latencies[name]},
+    }
+
+
+async def seed_database(root: Path, tickers: int, days: int,
+                        param_sets: int) -> Workload:
+    """
+    Загружает синтетические свечи тикеров через источник воспроизведения
+    и рассчитывает по одному набору параметров каждого тикера, чтобы
+    история и страницы результатов были доступны с первого запроса.
+    """
+    store = RecordingStore(root / "recordings")
+    names = [f"LOAD{index}" for index in range(tickers)]
+    work = Workload(tickers=names, param_sets={})
+    rnd = random.Random(0)
+    for index, ticker in enumerate(names):
+        df = make_candles(days, seed=index)
+        start = df["begin"].iloc[0].strftime("%Y-%m-%d")
+        end = df["begin"].iloc[-1].strftime("%Y-%m-%d")
+        store.save(ticker, start, end, "1d", df)
+        await Facade.run_parsing(
+            RequestParameters(ticker=ticker, start=start, end=end),
+            ReplaySource(store))
+
+        low, high = float(df["low"].min()), float(df["high"].max())
+        sets = []
+        for _ in range(param_sets):
+            buy = round(rnd.uniform(low, (low + high) / 2), 2)
+            sets.append({
+                "initial_cache": "100000",
+                "buy_price": str(buy),
+                "sell_price": str(round(buy * rnd.uniform(1.05, 1.3), 2)),
+                "commission_rate": "0.0005",
+                "tax_rate": "0.13",
+            })
+        work.param_sets[ticker] = sets
+        await Facade.run_trading_strategy(
+            StrategyParameters(ticker=ticker, **sets[0]))
+        work.rows[ticker] = days
+    return work
+
+
+async def run_asgi(work: Workload, mix: Dict[str, float],
+                   levels: List[int], duration: float) -> List[dict]:
+    """Нагружает приложение в том же процессе через ASGI."""
+    from trading_strategy_tester.api.app import app
+
+    async with app.router.lifespan_context(app):
+        return [await run_level(lambda: AsgiClient(app), work, mix, level,
+                                duration, seed)
+                for seed, level in enumerate(levels)]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(db_path: Path, port: int,
+                 timeout: float = 30) -> subprocess.Popen:
+    """
+    Запускает приложение в процессе uvicorn и ждет готовности.
+
+    Raises:
+        RuntimeError: Если сервер не начал принимать соединения.
+    """
+    env = dict(os.environ, TST_DB_PATH=str(db_path),
+               TST_MAINTENANCE_INTERVAL_S="0")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn",
+         "trading_strategy_tester.api.app:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning",
+         "--no-access-log"],
+        cwd=BASE_DIR, env=env)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            socket.create_connection(("127.0.0.1", port), 0.2).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("Сервер uvicorn не запустился")
+
+
+async def run_http(work: Workload, mix: Dict[str, float],
+                   levels: List[int], duration: float,
+                   db_path: Path) -> List[dict]:
+    """Нагружает отдельный процесс uvicorn через localhost."""
+    port = _free_port()
+    process = start_server(db_path, port)
+    try:
+        return [await run_level(lambda: HttpClient("127.0.0.1", port), work,
+                                mix, level, duration, seed)
+                for seed, level in enumerate(levels)]
+    finally:
+        process.terminate()
+        process.wait(10)
+
+
+async def run(modes: List[str], mix: Dict[str, float], levels: List[int],
+              duration: float, tickers: int, days: int,
+              param_sets: int) -> dict:
+    """Выполняет нагрузочный тест и возвращает отчет."""
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        settings.db_path = root / "load.db"
+        settings.maintenance_interval_s = 0
+        work = await seed_database(root, tickers, days, param_sets)
+
+        report = {"tickers": tickers, "days": days,
+                  "param_sets": param_sets, "mix": mix, "modes": {}}
+        for mode in modes:
+            if mode == "asgi":
+                report["modes"][mode] = await run_asgi(work, mix, levels,
+                                                       duration)
+            else:
+                report["modes"][mode] = await run_http(
+                    work, mix, levels, duration, settings.db_path)
+        return report
+
+
+def check(report: dict, max_p99_ms: Optional[float],
+          max_error_rate: Optional[float]) -> List[str]:
+    """Возвращает нарушения порогов задержки и доли ошибок."""
+    violations = []
+    for mode, levels in report["modes"].items():
+        for level in levels:
+            where = f"{mode}, параллельность {level['concurrency']}"
+            if (max_p99_ms is not None and level["p99_ms"] is not None
+                    and level["p99_ms"] > max_p99_ms):
+                violations.append(f"{where}: p99 {level['p99_ms']} мс "
+                                  f"превышает {max_p99_ms} мс")
+            if (max_error_rate is not None
+                    and (level["error_rate"] or 0) > max_error_rate):
+                violations.append(f"{where}: доля ошибок "
+                                  f"{level['error_rate']} превышает "
+                                  f"{max_error_rate}")
+    return violations
+
+
+def main(argv: List[str] = None) -> int:
+    """Точка входа бенчмарка. Возвращает 1 при нарушении порогов."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--mode", default="asgi,http",
+                        help="asgi, http или оба через запятую")
+    parser.add_argument("--concurrency", default="1,8,32",
+                        help="Уровни параллельности через запятую")
+    parser.add_argument("--duration", type=float, default=10,
+                        help="Длительность каждого уровня в секундах")
+    parser.add_argument("--mix", default=DEFAULT_MIX,
+                        help="Эндпоинты и веса: "
+                             + ", ".join(ENDPOINTS))
+    parser.add_argument("--tickers", type=int, default=3)
+    parser.add_argument("--days", type=int, default=2000)
+    parser.add_argument("--param-sets", type=int, default=4,
+                        help="Наборов параметров стратегии на тикер")
+    parser.add_argument("--max-p99-ms", type=float, default=None)
+    parser.add_argument("--max-error-rate", type=float, default=None)
+    parser.add_argument("--output", type=Path, default=None,
+                        help="Файл для записи отчета")
+    args = parser.parse_args(argv)
+
+    modes = [mode.strip() for mode in args.mode.split(",")]
+    if not set(modes) <= {"asgi", "http"}:
+        parser.error(f"Неизвестный режим: {args.mode}")
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    report = asyncio.run(run(modes, mix, levels, args.duration,
+                             args.tickers, args.days, args.param_sets))
+    violations = check(report, args.max_p99_ms, args.max_error_rate)
+    report["violations"] = violations
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+    print(text)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
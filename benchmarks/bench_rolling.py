@@ -0,0 +1,75 @@
+"""
+Бенчмарк анализа по датам начала.
+
+Сравнивает полный перебор дат начала векторизованным движком
+с расчетом StrategyCalculator для выборки дат (время полного наивного
+перебора оценивается по выборке) и проверяет совпадение итогов.
+
+Запуск: python -m benchmarks.bench_rolling --days 5000 --samples 20
+"""
+
+import argparse
+import json
+import random
+import time
+from decimal import Decimal
+
+from benchmarks.synthetic import make_stock_candles
+from trading_strategy_tester.api.schemas import StrategyParameters
+from trading_strategy_tester.services.facade import Facade
+from trading_strategy_tester.services.rolling_analysis import rolling_sweep
+
+COMPARED = ("total_income_perc", "incom_year_pers", "buy_count",
+            "sell_count", "final_overall_result")
+
+
+def run(days: int, samples: int) -> dict:
+    """Выполняет бенчмарк и возвращает статистику."""
+    candles = make_stock_candles(days)
+    param = StrategyParameters(
+        ticker="BENCH", initial_cache=Decimal("100000"),
+        buy_price=Decimal("250"), sell_price=Decimal("280"),
+        commission_rate=Decimal("0.00035"), tax_rate=Decimal("0.13"))
+
+    started = time.perf_counter()
+    sweep = rolling_sweep(candles, param)
+    sweep_s = time.perf_counter() - started
+    by_date = {row["start_date"]: row for row in sweep["rows"]}
+
+    rnd = random.Random(0)
+    picked = rnd.sample(range(sweep["runs"]), min(samples, sweep["runs"]))
+    mismatches = 0
+    naive_s = 0.0
+    for index in picked:
+        started = time.perf_counter()
+        _, summary, _ = Facade.calculate(candles[index:], param,
+                                         summary_only=True)
+        naive_s += time.perf_counter() - started
+        row = by_date[summary["start_date"]]
+        expected = [float(summary[name]) for name in COMPARED]
+        if expected != [float(row[name]) for name in COMPARED]:
+            mismatches += 1
+
+    naive_estimate = naive_s / len(picked) * sweep["runs"]
+    return {
+        "days": days,
+        "start_dates": sweep["runs"],
+        "sweep_s": round(sweep_s, 3),
+        "naive_estimate_s": round(naive_estimate, 1),
+        "speedup": round(naive_estimate / sweep_s, 1),
+        "checked_samples": len(picked),
+        "mismatches": mismatches,
+    }
+
+
+def main():
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=5000)
+    parser.add_argument("--samples", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(run(args.days, args.samples), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Генерация детерминированных синтетических свечей для бенчмарков."""
+
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import List
+
+import pandas as pd
+
+from trading_strategy_tester.models.stock_candle import StockCandle
+
+
+def make_candles(days: int, seed: int = 42, start_price: float = 250.0,
+                 start: date = date(2005, 1, 3)) -> pd.DataFrame:
+    """
+    Возвращает DataFrame дневных свечей со случайным блужданием цены.
+
+    Args:
+        days (int): Количество торговых дней.
+        seed (int): Зерно генератора, одинаковое зерно дает одинаковые свечи.
+        start_price (float): Цена закрытия перед первым днем.
+        start (date): Дата первого дня.
+
+    Returns:
+        pd.DataFrame: Свечи в формате moexalgo.
+    """
+    rnd = random.Random(seed)
+    rows = []
+    price = start_price
+    day = start
+    while len(rows) < days:
+        if day.weekday() < 5:
+            open_price = price
+            close_price = max(1.0, open_price * (1 + rnd.gauss(0, 0.02)))
+            high = max(open_price, close_price) * (1 + abs(rnd.gauss(0, 0.01)))
+            low = min(open_price, close_price) * (1 - abs(rnd.gauss(0, 0.01)))
+            volume = float(rnd.randint(100_000, 5_000_000))
+            begin = pd.Timestamp(day)
+            rows.append({
+                "open": round(open_price, 2),
+                "close": round(close_price, 2),
+                "high": round(high, 2),
+                "low": round(low, 2),
+                "value": round(volume * close_price, 1),
+                "volume": volume,
+                "begin": begin,
+                "end": begin + pd.Timedelta(hours=23, minutes=59, seconds=59),
+            })
+            price = close_price
+        day += timedelta(days=1)
+    return pd.DataFrame(rows)
+
+
+def make_stock_candles(days: int, seed: int = 42) -> List[StockCandle]:
+    """
+    Возвращает синтетические свечи в том виде, в котором их загружает
+    DatabaseGateway.load_dataframe_history.
+    """
+    df = make_candles(days, seed)
+    return [
+        StockCandle(
+            open=Decimal(str(row.open)),
+            close=Decimal(str(row.close)),
+            high=Decimal(str(row.high)),
+            low=Decimal(str(row.low)),
+            value=Decimal(str(row.value)),
+            volume=Decimal(str(row.volume)),
+            begin=str(row.begin),
+            end=str(row.end),
+        )
+        for row in df.itertuples(index=False)
+    ]
@@ -24,15 +24,70 @@ const translations = {
     "total_tax": "Общий налог"
 };
 
+// Названия этапов длительных операций
+const stageNames = {
+    "fetching": "Загрузка с MOEX",
+    "converting": "Преобразование",
+    "waiting": "Ожидание такого же расчета",
+    "queued": "В очереди",
+    "loading": "Загрузка из БД",
+    "calculating": "Расчет стратегии",
+    "saving": "Сохранение"
+};
+
+// Подписка на события прогресса задачи (Server-Sent Events).
+// Возвращает идентификатор задачи и функцию закрытия подписки.
+function subscribeProgress() {
+    const taskId = (window.crypto && crypto.randomUUID)
+        ? crypto.randomUUID()
+        : `${Date.now()}-${Math.random().toString(16).slice(2)}`;
+    const progressElement = document.getElementById('progress');
+    const source = new EventSource(`/api/progress/${taskId}`);
+
+    source.onmessage = (event) => {
+        const progress = JSON.parse(event.data);
+        if (progress.done) {
+            progressElement.textContent = progress.error
+                ? `Ошибка: ${progress.error}` : '';
+            source.close();
+            return;
+        }
+        let text = stageNames[progress.stage] || progress.stage;
+        if (progress.total) {
+            text += `: ${progress.processed || 0} из ${progress.total}`;
+        }
+        if (progress.percent !== undefined && progress.percent !== null) {
+            text += ` (${progress.percent}%)`;
+        }
+        if (progress.eta_s !== undefined && progress.eta_s !== null) {
+            text += `, осталось ~${Math.ceil(progress.eta_s)} с`;
+        }
+        progressElement.textContent = text;
+    };
+
+    const close = () => {
+        source.close();
+        progressElement.textContent = '';
+    };
+    return { taskId, close };
+}
+
 // Обработка формы для запроса данных
 document.getElementById('fetch-data-form').addEventListener('submit', async (e) => {
     e.preventDefault();
     const formData = new FormData(e.target);
-    const response = await fetch('/api/fetch-data', {
-        method: 'POST',
-        body: formData
-    });
-    const data = await response.json();
+    const progress = subscribeProgress();
+    formData.append('task_id', progress.taskId);
+    let data;
+    try {
+        const response = await fetch('/api/fetch-data', {
+            method: 'POST',
+            body: formData
+        });
+        data = await response.json();
+    } finally {
+        progress.close();
+    }
     alert(data.success ? "Данные успешно получены" : "Ошибка при получении данных");
 });
 
@@ -40,11 +95,18 @@ document.getElementById('fetch-data-form').addEventListener('submit', async (e)
 document.getElementById('generate-report-form').addEventListener('submit', async (e) => {
     e.preventDefault();
     const formData = new FormData(e.target);
-    const response = await fetch('/api/generate-report', {
-        method: 'POST',
-        body: formData
-    });
-    const data = await response.json();
+    const progress = subscribeProgress();
+    formData.append('task_id', progress.taskId);
+    let data;
+    try {
+        const response = await fetch('/api/generate-report', {
+            method: 'POST',
+            body: formData
+        });
+        data = await response.json();
+    } finally {
+        progress.close();
+    }
 
     // Очищаем предыдущий вывод
     const reportElement = document.getElementById('report');
@@ -102,6 +164,202 @@ document.getElementById('generate-report-form').addEventListener('submit', async
     reportElement.appendChild(table);
 });
 
+// История стратегии: виртуализированная таблица. В DOM находятся только
+// видимые строки, страницы строк запрашиваются у сервера по мере прокрутки,
+// сортировка и переход к дате выполняются запросами к индексам БД.
+const HISTORY_ROW_HEIGHT = 28;
+const HISTORY_PAGE_SIZE = 200;
+const HISTORY_OVERSCAN = 10;
+
+const historyColumns = [
+    ["date_str", "Дата"],
+    ["max_price", "Максимальная цена"],
+    ["min_price", "Минимальная цена"],
+    ["cache", "Кэш"],
+    ["share_count", "Количество акций"],
+    ["amount_in_shares", "Стоимость акций"],
+    ["overall_result", "Общий результат"],
+    ["comiss_sum", "Комиссия"],
+    ["tax_sum", "Налог"],
+    ["total_tax", "Налог общий"]
+];
+
+// Колонки, по которым сервер сортирует с использованием индекса
+const historySortable = new Set([
+    "date_str", "share_count", "overall_result", "cache",
+    "amount_in_shares", "max_price", "min_price"
+]);
+
+const historyView = {
+    ticker: null,
+    sort: "date_str",
+    descending: false,
+    total: 0,
+    pages: new Map(),
+    pending: new Map(),
+    generation: 0
+};
+
+function historyElements() {
+    return {
+        block: document.getElementById('history-block'),
+        title: document.getElementById('history-title'),
+        header: document.getElementById('history-header'),
+        viewport: document.getElementById('history-viewport'),
+        spacer: document.getElementById('history-spacer')
+    };
+}
+
+function loadHistoryPage(page) {
+    if (historyView.pages.has(page)) {
+        return Promise.resolve(historyView.pages.get(page));
+    }
+    if (historyView.pending.has(page)) {
+        return historyView.pending.get(page);
+    }
+    const generation = historyView.generation;
+    const params = new URLSearchParams({
+        offset: page * HISTORY_PAGE_SIZE,
+        limit: HISTORY_PAGE_SIZE,
+        sort: historyView.sort,
+        descending: historyView.descending
+    });
+    const request = fetch(
+        `/api/results/${encodeURIComponent(historyView.ticker)}?${params}`,
+        {cache: 'no-cache'})
+        .then(response => {
+            if (!response.ok) {
+                throw new Error('Нет данных для отображения');
+            }
+            return response.json();
+        })
+        .then(data => {
+            // Ответ на запрос до смены сортировки или тикера не нужен
+            if (generation !== historyView.generation) {
+                return null;
+            }
+            historyView.total = data.total;
+            historyView.pages.set(page, data.rows);
+            historyView.pending.delete(page);
+            return data.rows;
+        })
+        .catch(error => {
+            historyView.pending.delete(page);
+            throw error;
+        });
+    historyView.pending.set(page, request);
+    return request;
+}
+
+function historyRowHtml(row, index) {
+    const change = row[row.length - 1];
+    const cls = change > 0 ? ' increase' : (change < 0 ? ' decrease' : '');
+    const cells = historyColumns.map((column, i) =>
+        `<div class="${i === 0 ? '' : 'numeric'}">${row[i]}</div>`).join('');
+    return `<div class="history-row${cls}" style="top:${index * HISTORY_ROW_HEIGHT}px">${cells}</div>`;
+}
+
+function renderHistoryRows() {
+    const {viewport, spacer} = historyElements();
+    spacer.style.height = `${historyView.total * HISTORY_ROW_HEIGHT}px`;
+
+    const first = Math.max(0,
+        Math.floor(viewport.scrollTop / HISTORY_ROW_HEIGHT) - HISTORY_OVERSCAN);
+    const last = Math.min(historyView.total - 1,
+        Math.ceil((viewport.scrollTop + viewport.clientHeight) / HISTORY_ROW_HEIGHT)
+        + HISTORY_OVERSCAN);
+
+    let html = '';
+    const missing = new Set();
+    for (let index = first; index <= last; index++) {
+        const page = Math.floor(index / HISTORY_PAGE_SIZE);
+        const rows = historyView.pages.get(page);
+        if (rows) {
+            html += historyRowHtml(rows[index - page * HISTORY_PAGE_SIZE], index);
+        } else {
+            missing.add(page);
+        }
+    }
+    spacer.innerHTML = html;
+
+    missing.forEach(page => {
+        loadHistoryPage(page).then(rows => {
+            if (rows) {
+                renderHistoryRows();
+            }
+        }).catch(error => console.error('Ошибка:', error));
+    });
+}
+
+function renderHistoryHeader() {
+    const {header} = historyElements();
+    header.innerHTML = historyColumns.map(([name, title]) => {
+        const sortable = historySortable.has(name);
+        const arrow = historyView.sort === name
+            ? (historyView.descending ? ' ▼' : ' ▲') : '';
+        return `<div class="${sortable ? 'sortable' : ''}" data-column="${name}">${title}${arrow}</div>`;
+    }).join('');
+}
+
+async function reloadHistory() {
+    historyView.generation += 1;
+    historyView.pages = new Map();
+    historyView.pending = new Map();
+    renderHistoryHeader();
+    await loadHistoryPage(0);
+    renderHistoryRows();
+}
+
+async function openHistory(ticker) {
+    const {block, title, viewport} = historyElements();
+    historyView.ticker = ticker;
+    historyView.sort = "date_str";
+    historyView.descending = false;
+    viewport.scrollTop = 0;
+    await reloadHistory();
+    title.textContent = `Результаты стратегии: ${ticker.toUpperCase()} (${historyView.total} дней)`;
+    block.hidden = false;
+}
+
+document.getElementById('history-viewport').addEventListener('scroll', () => {
+    window.requestAnimationFrame(renderHistoryRows);
+});
+
+document.getElementById('history-header').addEventListener('click', (e) => {
+    const column = e.target.closest('[data-column]');
+    if (!column || !historySortable.has(column.dataset.column)) {
+        return;
+    }
+    const name = column.dataset.column;
+    historyView.descending = historyView.sort === name
+        ? !historyView.descending : false;
+    historyView.sort = name;
+    historyElements().viewport.scrollTop = 0;
+    reloadHistory().catch(error => alert(error.message));
+});
+
+document.getElementById('history-goto-btn').addEventListener('click', async () => {
+    const date = document.getElementById('history-date').value;
+    if (!date || !historyView.ticker) {
+        return;
+    }
+    const params = new URLSearchParams({
+        date: date,
+        sort: historyView.sort,
+        descending: historyView.descending
+    });
+    const response = await fetch(
+        `/api/results/${encodeURIComponent(historyView.ticker)}/locate?${params}`);
+    const data = await response.json();
+    if (!data.success) {
+        alert('Нет данных после указанной даты');
+        return;
+    }
+    const {viewport} = historyElements();
+    viewport.scrollTop = data.position * HISTORY_ROW_HEIGHT;
+    renderHistoryRows();
+});
+
 document.getElementById('show-history-btn').addEventListener('click', function() {
     const ticker = document.getElementById('report-ticker').value.trim();
 
@@ -114,114 +372,58 @@ document.getElementById('show-history-btn').addEventListener('click', function()
     btn.disabled = true;
     btn.textContent = 'Загрузка...';
 
-    fetch('/api/show-history', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/x-www-form-urlencoded',
-        },
-        body: `ticker=${encodeURIComponent(ticker)}`
-    })
-    .then(response => {
-        if (!response.ok) {
-            throw new Error('Ошибка сети');
-        }
-        return response.json();
-    })
-    .then(data => {
-        if (data.success) {
-            const win = window.open('', '_blank');
-            win.document.write(`
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <title>История торгов: ${data.ticker}</title>
-                    <link rel="stylesheet" href="styles.css">
-                    <style>
-                        .trading-results {
-                            width: 100%;
-                            border-collapse: collapse;
-                            margin-top: 10px;
-                        }
-                        .trading-results th {
-                            background-color: #f2f2f2;
-                            padding: 10px;
-                            text-align: left;
-                            position: sticky;
-                            top: 0;
-                            white-space: normal;
-                            height: 60px;
-                            vertical-align: bottom;
-                        }
-                        .trading-results th span {
-                            display: inline-block;
-                            max-width: 100%;
-                            word-break: break-word;
-                            line-height: 1.3;
-                        }
-                        .trading-results td {
-                            padding: 8px 10px;
-                            border-bottom: 1px solid #ddd;
-                        }
-                        .numeric {
-                            text-align: right;
-                            font-family: 'Courier New', monospace;
-                        }
-                        tr.increase {
-                            background-color:rgb(58, 209, 58) !important; /* Светло-зеленый */
-                        }
-                        tr.decrease {
-                            background-color:rgb(228, 71, 71) !important; /* Светло-красный */
-                        }
-                        tr:hover {
-                            background-color: #f5f5f5;
-                        }
-                    </style>
-                </head>
-
-                <body>
-
-                    <h2>Результаты стратегии: ${data.ticker}</h2>
-                    <script>
-                        function highlightQuantityChanges() {
-                            const rows = document.querySelectorAll('.trading-results tr:not(:first-child)');
-                            let prevQuantity = null;
-
-                            rows.forEach(row => {
-                                const cells = row.querySelectorAll('td');
-                                if (cells.length > 4) { // Проверяем, что есть 5-я колонка
-                                    const quantityCell = cells[4]; // 5-я колонка с количеством акций
-                                    const quantityText = quantityCell.textContent.trim().replace(/\s+/g, '');
-                                    const currentQuantity = parseInt(quantityText) || 0;
-
-                                    if (prevQuantity !== null) {
-                                        if (currentQuantity > prevQuantity) {
-                                            row.classList.add('increase');
-                                        } else if (currentQuantity < prevQuantity) {
-                                            row.classList.add('decrease');
-                                        }
-                                    }
-                                    prevQuantity = currentQuantity;
-                                }
-                            });
-                        }
-
-                        document.addEventListener('DOMContentLoaded', highlightQuantityChanges);
-                    </script>
-                    ${data.html_table.replace(/<th([^>]*)>([^<]*)<\/th>/g, '<th$1><span>$2</span></th>')}
-                </body>
-                </html>
-            `);
-            win.document.close();
-        } else {
-            alert(data.error || 'Не удалось загрузить историю');
-        }
-    })
+    openHistory(ticker)
     .catch(error => {
         console.error('Ошибка:', error);
-        alert('Произошла ошибка при загрузке данных');
+        alert(error.message || 'Произошла ошибка при загрузке данных');
     })
     .finally(() => {
         btn.disabled = false;
         btn.textContent = 'Показать историю';
     });
 });
+
+// График капитала: сервер прореживает ряд до ширины контейнера
+function renderChart(container, data) {
+    const width = container.clientWidth || 800;
+    const height = 300;
+    const values = data.equity.concat(data.cash);
+    const min = Math.min(...values);
+    const max = Math.max(...values);
+    const scaleY = v => height - ((v - min) / ((max - min) || 1)) * height;
+    const scaleX = i => (i / Math.max(data.points - 1, 1)) * width;
+    const line = series => series
+        .map((v, i) => `${scaleX(i).toFixed(1)},${scaleY(v).toFixed(1)}`)
+        .join(' ');
+
+    container.innerHTML = `
+        <div class="chart-caption">${data.ticker}: ${data.dates[0]} — ${data.dates[data.points - 1]}
+            (${data.points} из ${data.total} точек)</div>
+        <svg width="${width}" height="${height}" viewBox="0 0 ${width} ${height}">
+            <polyline class="chart-equity" points="${line(data.equity)}"/>
+            <polyline class="chart-cash" points="${line(data.cash)}"/>
+        </svg>`;
+}
+
+document.getElementById('show-chart-btn').addEventListener('click', async function() {
+    const ticker = document.getElementById('report-ticker').value.trim();
+    if (!ticker) {
+        alert('Пожалуйста, введите тикер');
+        return;
+    }
+
+    const container = document.getElementById('chart');
+    const width = Math.round(container.clientWidth || 800);
+    try {
+        const response = await fetch(
+            `/api/chart/${encodeURIComponent(ticker)}?width=${width}`,
+            {cache: 'no-cache'});
+        if (!response.ok) {
+            throw new Error('Нет данных для графика');
+        }
+        renderChart(container, await response.json());
+    } catch (error) {
+        console.error('Ошибка:', error);
+        alert(error.message);
+    }
+});
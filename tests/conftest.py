@@ -1,10 +1,88 @@
 """ Содержит фикстуры для тестов. """
 
-import pytest
-from trading_strategy_tester.models.trading_data import TradingData
-from trading_strategy_tester.models.trading_result import TradingResult
-from trading_strategy_tester.models.strategy_parameters import (
+import math
+import os
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterator, List
+
+# Настройки читаются при импорте пакета: расчеты выполняются в потоках,
+# обслуживание БД не запускается, MOEX не запрашивается
+os.environ["TST_COMPUTE_MODE"] = "thread"
+os.environ["TST_COMPUTE_WORKERS"] = "2"
+os.environ["TST_MAINTENANCE_INTERVAL_S"] = "0"
+os.environ["TST_CANDLE_SOURCE"] = "replay"
+os.environ["TST_CANDLE_CACHE_WARM"] = ""
+os.environ["TST_LOG_FILE"] = os.path.join(tempfile.gettempdir(),
+                                          "tst-tests.log")
+
+import pytest  # noqa: E402
+
+from trading_strategy_tester.api.schemas import (  # noqa: E402
     StrategyParameters)
+from trading_strategy_tester.config import settings  # noqa: E402
+from trading_strategy_tester.models.stock_candle import (  # noqa: E402
+    StockCandle)
+from trading_strategy_tester.models.trading_result import (  # noqa: E402
+    TradingResult)
+from trading_strategy_tester.services.candle_sources import (  # noqa: E402
+    ISS_PAGE_SIZE, CandleSource, iss_to_frame)
+
+
+def make_candle_rows(count: int, start: str = "2020-01-01",
+                     base: float = 100.0) -> List[list]:
+    """
+    Возвращает count дневных свечей в формате строк ISS: цена колеблется
+    вокруг base, поэтому стратегия с уровнями ниже и выше base
+    совершает несколько сделок.
+    """
+    first = date.fromisoformat(start)
+    rows = []
+    for i in range(count):
+        day = (first + timedelta(days=i)).isoformat()
+        close = round(base + base * 0.2 * math.sin(i / 7) + (i % 5) * 0.37, 2)
+        rows.append([close, close, round(close + 1.5, 2),
+                     round(close - 1.5, 2), close * 1000, 1000,
+                     f"{day} 00:00:00", f"{day} 23:59:59"])
+    return rows
+
+
+class ListSource(CandleSource):
+    """Источник свечей из готовых строк ISS."""
+
+    def __init__(self, rows: List[list], fail_after: int = -1):
+        """
+        Args:
+            rows (List[list]): Строки свечей.
+            fail_after (int): После скольких страниц выбросить ошибку
+                (-1 - не выбрасывать).
+        """
+        self.rows = rows
+        self.fail_after = fail_after
+
+    def fetch(self, ticker, start, end, period="1d"):
+        return iss_to_frame({"candles": {
+            "columns": ["open", "close", "high", "low", "value", "volume",
+                        "begin", "end"],
+            "data": self.rows}})
+
+    def iter_pages(self, ticker, start, end,
+                   period="1d") -> Iterator[List[list]]:
+        for number, offset in enumerate(range(0, len(self.rows),
+                                              ISS_PAGE_SIZE)):
+            if number == self.fail_after:
+                raise ConnectionError("Источник недоступен")
+            yield self.rows[offset:offset + ISS_PAGE_SIZE]
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Фикстура, направляющая приложение в пустую БД во временном
+    каталоге."""
+    path = tmp_path / "test.db"
+    monkeypatch.setattr(settings, "db_path", path)
+    return path
 
 
 @pytest.fixture
@@ -21,50 +99,64 @@ def sample_csv_data():
 def strategy_parameters():
     """Фикстура для создания параметров стратегии."""
     return StrategyParameters(
-        initial_cache=10000.0,
-        buy_price=100.0,
-        sell_price=150.0,
-        commission_rate=0.01,
-        tax_rate=0.13
+        ticker="TEST",
+        initial_cache=Decimal("10000"),
+        buy_price=Decimal("100"),
+        sell_price=Decimal("150"),
+        commission_rate=Decimal("0.01"),
+        tax_rate=Decimal("0.13")
     )
 
 
 @pytest.fixture
 def trading_data():
     """Фикстура для создания данных о торговых днях."""
+    days = [
+        ("2023-01-01", "120", "90", "110"),
+        ("2023-01-02", "130", "100", "120"),
+        ("2023-01-03", "140", "110", "130"),
+        ("2023-01-04", "160", "120", "150"),
+        ("2023-01-05", "170", "130", "160"),
+    ]
     return [
-        TradingData(date="2023-01-01", high=120.0, low=90.0, close=110.0),
-        TradingData(date="2023-01-02", high=130.0, low=100.0, close=120.0),
-        TradingData(date="2023-01-03", high=140.0, low=110.0, close=130.0),
-        TradingData(date="2023-01-04", high=160.0, low=120.0, close=150.0),
-        TradingData(date="2023-01-05", high=170.0, low=130.0, close=160.0),
+        StockCandle(open=Decimal(close), close=Decimal(close),
+                    high=Decimal(high), low=Decimal(low),
+                    value=Decimal("0"), volume=Decimal("1000000"),
+                    begin=f"{day} 00:00:00", end=f"{day} 23:59:59")
+        for day, high, low, close in days
     ]
 
 
 @pytest.fixture
 def expected_results():
     """Фикстура для создания ожидаемых результатов."""
+    d = Decimal
     return [
-        TradingResult(date_str="2023-01-01", max_price=120.0, min_price=90.0,
-                      cache=8900.0, share_count=10, amount_in_shares=1100.0,
-                      overall_result=10000.0, comiss_sum=100.0, tax_sum=0.0,
-                      total_tax=0.0),
-        TradingResult(date_str="2023-01-02", max_price=130.0, min_price=100.0,
-                      cache=8900.0, share_count=10, amount_in_shares=1200.0,
-                      overall_result=10100.0, comiss_sum=100.0, tax_sum=0.0,
-                      total_tax=0.0),
-        TradingResult(date_str="2023-01-03", max_price=140.0, min_price=110.0,
-                      cache=8900.0, share_count=10, amount_in_shares=1300.0,
-                      overall_result=10200.0, comiss_sum=100.0, tax_sum=0.0,
-                      total_tax=0.0),
-        TradingResult(date_str="2023-01-04", max_price=160.0, min_price=120.0,
-                      cache=10350.0, share_count=0, amount_in_shares=0.0,
-                      overall_result=10350.0, comiss_sum=250.0, tax_sum=65.0,
-                      total_tax=65.0),
-        TradingResult(date_str="2023-01-05", max_price=170.0, min_price=130.0,
-                      cache=10350.0, share_count=0, amount_in_shares=0.0,
-                      overall_result=10350.0, comiss_sum=250.0, tax_sum=0.0,
-                      total_tax=65.0),
+        TradingResult(date_str="2023-01-01", max_price=d("120"),
+                      min_price=d("90"), cache=d("1.00"), share_count=99,
+                      amount_in_shares=d("10890.00"),
+                      overall_result=d("10891.00"), comiss_sum=d("99.00"),
+                      tax_sum=d("0.00"), total_tax=d("0.00")),
+        TradingResult(date_str="2023-01-02", max_price=d("130"),
+                      min_price=d("100"), cache=d("1.00"), share_count=99,
+                      amount_in_shares=d("11880.00"),
+                      overall_result=d("11881.00"), comiss_sum=d("99.00"),
+                      tax_sum=d("0.00"), total_tax=d("0.00")),
+        TradingResult(date_str="2023-01-03", max_price=d("140"),
+                      min_price=d("110"), cache=d("1.00"), share_count=99,
+                      amount_in_shares=d("12870.00"),
+                      overall_result=d("12871.00"), comiss_sum=d("99.00"),
+                      tax_sum=d("0.00"), total_tax=d("0.00")),
+        TradingResult(date_str="2023-01-04", max_price=d("160"),
+                      min_price=d("120"), cache=d("14702.50"),
+                      share_count=0, amount_in_shares=d("0.00"),
+                      overall_result=d("14702.50"), comiss_sum=d("247.50"),
+                      tax_sum=d("643.50"), total_tax=d("643.50")),
+        TradingResult(date_str="2023-01-05", max_price=d("170"),
+                      min_price=d("130"), cache=d("14059.00"),
+                      share_count=0, amount_in_shares=d("0.00"),
+                      overall_result=d("14702.50"), comiss_sum=d("247.50"),
+                      tax_sum=d("0.00"), total_tax=d("643.50")),
     ]
 
 
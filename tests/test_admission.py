@@ -0,0 +1,86 @@
+""" Тесты допуска тяжелых операций и ответа 429. """
+
+import asyncio
+
+import httpx
+import pytest
+
+from tests.conftest import ListSource, make_candle_rows
+from trading_strategy_tester.api.app import app
+from trading_strategy_tester.api.schemas import RequestParameters
+from trading_strategy_tester.services.admission import (AdmissionQueue,
+                                                       Overloaded,
+                                                       admission,
+                                                       parse_limits)
+from trading_strategy_tester.services.facade import Facade
+
+
+def test_parse_limits():
+    assert parse_limits("report=0:100, rolling=1:5") == {
+        "report": (0, 100), "rolling": (1, 5)}
+    with pytest.raises(ValueError):
+        parse_limits("report=x")
+
+
+def test_queue_rejects_when_full():
+    """Операция ждет, пока стоимость очереди в пределе, и отклоняется,
+    когда предел превышен."""
+    queue = AdmissionQueue("test", concurrency=1, max_queue_cost=10)
+
+    async def scenario():
+        release = asyncio.Event()
+        order = []
+
+        async def operation(name, cost):
+            async with queue.admit(cost):
+                order.append(name)
+                await release.wait()
+
+        running = asyncio.ensure_future(operation("running", 1))
+        await asyncio.sleep(0)
+        waiting = asyncio.ensure_future(operation("waiting", 10))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as rejected:
+            async with queue.admit(1):
+                pass
+        depth = queue.queued
+        release.set()
+        await asyncio.gather(running, waiting)
+        return order, depth, rejected.value
+
+    order, depth, rejected = asyncio.run(scenario())
+
+    assert order == ["running", "waiting"]
+    assert depth == 1
+    assert rejected.name == "test"
+    assert rejected.retry_after >= 1
+
+
+def test_report_returns_429_when_queue_full(db_path, monkeypatch):
+    """Пока очередь расчетов занята, запрос отчета получает 429
+    с заголовком Retry-After."""
+    monkeypatch.setitem(admission.queues, "report",
+                        AdmissionQueue("report", 1, 0))
+    params = {"ticker": "BUSY", "initial_cache": "10000",
+              "buy_price": "90", "sell_price": "110",
+              "commission_rate": "0.0005", "tax_rate": "0.13"}
+
+    async def scenario():
+        await Facade.run_parsing(
+            RequestParameters(ticker="BUSY", start="2020-01-01",
+                              end="2030-01-01"),
+            ListSource(make_candle_rows(50)))
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport,
+                                     base_url="http://test") as http:
+            async with admission.admit("report", 1):
+                busy = await http.get("/api/report", params=params)
+            free = await http.get("/api/report", params=params)
+        return busy, free
+
+    busy, free = asyncio.run(scenario())
+
+    assert busy.status_code == 429
+    assert int(busy.headers["retry-after"]) >= 1
+    assert busy.json()["retry_after"] >= 1
+    assert free.status_code == 200
@@ -0,0 +1,131 @@
+""" Тесты общих сегментов свечей и кэша в режиме shared. """
+
+import asyncio
+import mmap
+
+import pytest
+
+from tests.conftest import ListSource, make_candle_rows
+from trading_strategy_tester.api.schemas import RequestParameters
+from trading_strategy_tester.models.candle_series import CandleSeries
+from trading_strategy_tester.services.candle_cache import CandleCache
+from trading_strategy_tester.services.candle_segments import (
+    CandleSegment, SegmentSeries, SegmentStore, segment_versions,
+    segments_dir, write_segment)
+from trading_strategy_tester.services.database_gateway import DatabaseGateway
+from trading_strategy_tester.services.facade import Facade
+
+
+@pytest.fixture
+def series():
+    """Свечи с разным количеством знаков после запятой в колонках."""
+    rows = make_candle_rows(120)
+    rows[0][:6] = ["250.0", "254.71", "258.27", "248.3", "1117886143.7",
+                   "4388883"]
+    rows[1][4] = "0.000125"
+    return CandleSeries.from_rows(rows)
+
+
+def test_round_trip(tmp_path, series):
+    """Сегмент возвращает те же свечи и индекс дат."""
+    path = write_segment(tmp_path, "seg", 3, series)
+    segment = CandleSegment(path)
+
+    restored = segment.series()
+
+    assert path.name == "SEG.3.seg"
+    assert (segment.ticker, segment.version, segment.count) == (
+        "SEG", 3, len(series))
+    assert len(restored) == len(series)
+    assert restored.candles() == series.candles()
+    assert restored.dates == series.dates
+    assert restored.close[1] == series.close[1]
+    segment.close()
+
+
+def test_columns_are_views(tmp_path, series):
+    """Колонки читаются из отображения, а не копируются в процесс."""
+    segment = CandleSegment(write_segment(tmp_path, "SEG", 1, series))
+
+    restored = segment.series()
+
+    assert isinstance(restored.ordinals, memoryview)
+    assert isinstance(restored.ordinals.obj, mmap.mmap)
+    assert list(restored.ordinals) == list(series.dates.ordinals)
+
+
+def test_unsupported_dates_are_rejected(tmp_path):
+    """Даты не в виде 'YYYY-MM-DD HH:MM:SS' не записываются."""
+    rows = make_candle_rows(3)
+    rows[2][6] = "2020-01-03T00:00:00"
+
+    with pytest.raises(ValueError):
+        write_segment(tmp_path, "SEG", 1, CandleSeries.from_rows(rows))
+    assert segment_versions(tmp_path, "SEG") == {}
+
+
+def test_new_version_visible_to_other_store(tmp_path, series):
+    """Сегмент новой версии, записанный одним процессом, виден
+    другому; прежний ряд читается до закрытия."""
+    writer, reader = SegmentStore(tmp_path), SegmentStore(tmp_path)
+    writer.write("SEG", 1, series)
+    old = reader.series("SEG", reader.latest("SEG"))
+
+    newer = CandleSeries.from_rows(make_candle_rows(80, base=300))
+    writer.write("SEG", 2, newer)
+
+    assert reader.latest("SEG") == 2
+    assert reader.series("SEG", 2).candles() == newer.candles()
+    assert list(segment_versions(tmp_path, "SEG")) == [2]
+    assert old.candles() == series.candles()
+    reader.close()
+    writer.close()
+
+
+def test_older_version_not_written(tmp_path, series):
+    """Запись прежней версии не заменяет более новый сегмент."""
+    write_segment(tmp_path, "SEG", 5, series)
+
+    path = write_segment(tmp_path, "SEG", 4, series)
+
+    assert path.name == "SEG.5.seg"
+    assert list(segment_versions(tmp_path, "SEG")) == [5]
+
+
+def test_shared_cache_sees_other_worker_load(db_path):
+    """Загрузка истории в одном воркере видна кэшу другого; процессы
+    не хранят копий свечей."""
+    first = make_candle_rows(150)
+    second = make_candle_rows(90, base=200)
+    params = RequestParameters(ticker="SHR", start="2020-01-01",
+                               end="2030-01-01")
+
+    async def stored():
+        async with DatabaseGateway() as gateway:
+            return (await gateway.load_candle_series("SHR")).candles()
+
+    async def scenario():
+        worker_a = CandleCache(store="shared")
+        worker_b = CandleCache(store="shared")
+        await Facade.run_parsing(params, ListSource(first))
+        await worker_a.reload("SHR")
+        before = await worker_b.get("SHR")
+        before_candles = before.candles()
+
+        await Facade.run_parsing(params, ListSource(second))
+        await worker_a.reload("SHR")
+        after = await worker_b.get("SHR")
+        expected = await stored()
+        sizes = (worker_a.size, worker_b.size)
+        worker_a.close()
+        worker_b.close()
+        return before_candles, after, expected, sizes
+
+    before, after, expected, sizes = asyncio.run(scenario())
+
+    assert isinstance(after, SegmentSeries)
+    assert len(before) == len(first)
+    assert after.candles() == expected
+    assert len(expected) == len(second)
+    assert sizes == (0, 0)
+    assert len(segment_versions(segments_dir(db_path), "SHR")) == 1
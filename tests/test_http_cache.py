@@ -0,0 +1,103 @@
+""" Тесты условных запросов (ETag, If-None-Match) и версий данных. """
+
+import asyncio
+import sqlite3
+
+import httpx
+
+from tests.conftest import ListSource, make_candle_rows
+from trading_strategy_tester.api.app import app
+from trading_strategy_tester.api.schemas import RequestParameters
+from trading_strategy_tester.services.data_versions import data_versions
+from trading_strategy_tester.services.facade import Facade
+
+TICKER = "ETAG"
+
+REPORT = {"ticker": TICKER, "initial_cache": "100000", "buy_price": "90",
+          "sell_price": "110", "commission_rate": "0.05",
+          "tax_rate": "13"}
+
+
+async def ingest(rows) -> None:
+    """Загружает свечи тикера из готовых строк."""
+    await Facade.run_parsing(
+        RequestParameters(ticker=TICKER, start="2020-01-01",
+                          end="2030-01-01"), ListSource(rows))
+
+
+def client() -> httpx.AsyncClient:
+    """Возвращает клиент приложения без сетевого сервера."""
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                             base_url="http://test")
+
+
+def test_report_not_modified(db_path):
+    """Повторный запрос с If-None-Match получает 304."""
+    async def scenario():
+        await ingest(make_candle_rows(300))
+        async with client() as http:
+            first = await http.get("/api/report", params=REPORT)
+            again = await http.get(
+                "/api/report", params=REPORT,
+                headers={"If-None-Match": first.headers["etag"]})
+        return first, again
+
+    first, again = asyncio.run(scenario())
+
+    assert first.status_code == 200
+    assert again.status_code == 304
+    assert again.headers["etag"] == first.headers["etag"]
+
+
+def test_etag_changes_after_new_run(db_path):
+    """Новый расчет и новая загрузка свечей меняют ETag."""
+    async def scenario():
+        await ingest(make_candle_rows(300))
+        async with client() as http:
+            report = await http.get("/api/report", params=REPORT)
+            trades = await http.get(f"/api/trades/{TICKER}")
+
+            await http.get("/api/report",
+                           params={**REPORT, "sell_price": "115"})
+            trades_after_run = await http.get(
+                f"/api/trades/{TICKER}",
+                headers={"If-None-Match": trades.headers["etag"]})
+
+            await ingest(make_candle_rows(301))
+            report_after_ingest = await http.get(
+                "/api/report", params=REPORT,
+                headers={"If-None-Match": report.headers["etag"]})
+        return report, trades, trades_after_run, report_after_ingest
+
+    report, trades, trades_after_run, report_after_ingest = asyncio.run(
+        scenario())
+
+    assert trades.status_code == 200
+    assert trades_after_run.status_code == 200
+    assert trades_after_run.headers["etag"] != trades.headers["etag"]
+    assert report_after_ingest.status_code == 200
+    assert report_after_ingest.headers["etag"] != report.headers["etag"]
+
+
+def test_bump_candles_keeps_results_tag(db_path):
+    """Загрузка свечей увеличивает версию и не трогает тег результатов."""
+    async def scenario():
+        await ingest(make_candle_rows(100))
+        await data_versions.get(TICKER)
+        # Тег записан в БД другим процессом: в памяти его нет
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("UPDATE data_versions SET results_tag = 'other' "
+                         "WHERE ticker = ?", (TICKER,))
+        before = await data_versions.get(TICKER)
+        version = await data_versions.bump_candles(TICKER)
+        return before, version, await data_versions.get(TICKER)
+
+    before, version, after = asyncio.run(scenario())
+
+    with sqlite3.connect(db_path) as conn:
+        row = conn.execute("SELECT candles_version, results_tag "
+                           "FROM data_versions WHERE ticker = ?",
+                           (TICKER,)).fetchone()
+    assert version == before.candles + 1
+    assert row == (version, "other")
+    assert (after.candles, after.results) == row
@@ -0,0 +1,75 @@
+""" Тесты постраничной загрузки истории свечей. """
+
+import asyncio
+import sqlite3
+from decimal import Decimal
+
+import pytest
+
+from tests.conftest import ListSource, make_candle_rows
+from trading_strategy_tester.api.schemas import RequestParameters
+from trading_strategy_tester.config import settings
+from trading_strategy_tester.services.database_gateway import DatabaseGateway
+from trading_strategy_tester.services.facade import Facade
+
+TICKER = "LOAD"
+
+
+async def ingest(source: ListSource) -> str:
+    """Загружает свечи тикера из источника."""
+    return await Facade.run_parsing(
+        RequestParameters(ticker=TICKER, start="2020-01-01",
+                          end="2030-01-01"), source)
+
+
+async def stored_closes():
+    """Цены закрытия сохраненной истории тикера."""
+    async with DatabaseGateway() as gateway:
+        return list((await gateway.load_candle_series(TICKER)).close)
+
+
+def closes(rows):
+    return [Decimal(str(row[1])) for row in rows]
+
+
+def tables(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'")}
+
+
+def test_concurrent_loads(db_path, monkeypatch):
+    """Одновременные загрузки одного тикера не мешают друг другу:
+    остается история одного из источников."""
+    # Мелкие страницы, чтобы записи загрузок чередовались
+    monkeypatch.setattr(settings, "ingest_page_rows", 50)
+    first = make_candle_rows(700, base=100)
+    second = make_candle_rows(600, base=300)
+
+    async def scenario():
+        results = await asyncio.gather(ingest(ListSource(first)),
+                                       ingest(ListSource(second)))
+        return results, await stored_closes()
+
+    results, stored = asyncio.run(scenario())
+
+    assert len(results) == 2
+    assert stored in (closes(first), closes(second))
+    assert tables(db_path) >= {"load_dataframe"}
+    assert not [name for name in tables(db_path) if "_loading" in name]
+
+
+def test_failed_load_keeps_history(db_path, monkeypatch):
+    """Ошибка источника посреди загрузки не меняет прежнюю историю."""
+    monkeypatch.setattr(settings, "ingest_page_rows", 50)
+    rows = make_candle_rows(300)
+
+    async def scenario():
+        await ingest(ListSource(rows))
+        with pytest.raises(ConnectionError):
+            await ingest(ListSource(make_candle_rows(1200, base=300),
+                                    fail_after=1))
+        return await stored_closes()
+
+    assert asyncio.run(scenario()) == closes(rows)
+    assert not [name for name in tables(db_path) if "_loading" in name]
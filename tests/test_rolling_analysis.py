@@ -0,0 +1,83 @@
+""" Тесты анализа по датам начала (векторизованный движок). """
+
+from decimal import Decimal
+
+import pytest
+
+from tests.conftest import make_candle_rows
+from trading_strategy_tester.api.schemas import StrategyParameters
+from trading_strategy_tester.models.candle_series import CandleSeries
+from trading_strategy_tester.models.fill_model import FillModel
+from trading_strategy_tester.services.facade import Facade
+from trading_strategy_tester.services.rolling_analysis import rolling_sweep
+
+COMPARED = ("total_income_perc", "incom_year_pers", "sell_count",
+            "final_overall_result")
+
+
+@pytest.fixture
+def series():
+    """Ряд из 400 дневных свечей (с переходом через 20 декабря)."""
+    return CandleSeries.from_rows(make_candle_rows(400, "2021-06-01"))
+
+
+def parameters(buy_price: str, sell_price: str,
+               commission_rate: str) -> StrategyParameters:
+    """Параметры стратегии тестового тикера."""
+    return StrategyParameters(ticker="LANE", initial_cache=Decimal("10000"),
+                              buy_price=Decimal(buy_price),
+                              sell_price=Decimal(sell_price),
+                              commission_rate=Decimal(commission_rate),
+                              tax_rate=Decimal("0.13"))
+
+
+def calculator_runs(series, param, rows):
+    """Итоги StrategyCalculator с даты начала каждой строки."""
+    candles = series.candles()
+    starts = {day: i for i, day in enumerate(series.dates.dates)}
+    for row in rows:
+        _, summary, _ = Facade.calculate(
+            candles[starts[row["start_date"]]:], param, summary_only=True)
+        yield row, summary
+
+
+@pytest.mark.parametrize("fill", [None, FillModel()])
+def test_rolling_matches_calculator(series, fill):
+    """
+    Запуск с каждой даты совпадает с расчетом StrategyCalculator
+    (доходность в год округляется так же, как в CalculateResult).
+
+    Модель исполнения без ограничений не меняет суммы, но считает
+    только покупки с исполнением (калькулятор учитывает и покупку
+    0 акций, когда кэша не хватает на комиссию).
+    """
+    param = parameters("90.5", "112.3", "0.0005")
+
+    result = rolling_sweep(series.candles(), param, dates=series.dates,
+                           fill=fill)
+
+    assert result["runs"] == len(series) - 1
+    for row, summary in calculator_runs(series, param, result["rows"]):
+        for name in COMPARED:
+            assert Decimal(str(row[name])) == summary[name], (
+                row["start_date"], name)
+        if fill is None:
+            assert row["buy_count"] == summary["buy_count"]
+        else:
+            assert row["buy_count"] <= summary["buy_count"]
+
+
+def test_rolling_amounts_within_kopeck(series):
+    """
+    Суммы во float64 отличаются от расчета в Decimal (10 значащих
+    цифр) не больше чем на копейку.
+    """
+    param = parameters("92.3", "108", "0.003")
+
+    result = rolling_sweep(series.candles(), param, dates=series.dates)
+
+    differences = [
+        abs(Decimal(str(row["final_overall_result"]))
+            - summary["final_overall_result"])
+        for row, summary in calculator_runs(series, param, result["rows"])]
+    assert max(differences) <= Decimal("0.01")
@@ -0,0 +1,31 @@
+""" Тесты параметров отбора тикеров. """
+
+from decimal import Decimal
+
+import pytest
+
+from trading_strategy_tester.api.schemas import ScreenParameters
+from trading_strategy_tester.services.screening import relative_parameters
+
+RULE = ScreenParameters(initial_cache=Decimal("10000"),
+                        buy_pct=Decimal("-10"), sell_pct=Decimal("10"),
+                        commission_rate=Decimal("0.0005"),
+                        tax_rate=Decimal("0.13"))
+
+
+def test_levels_rounded_like_calculator():
+    """Уровни округляются до копеек банковским округлением."""
+    param = relative_parameters(RULE, "TEST", Decimal("100.25"))
+
+    assert param.buy_price == Decimal("90.22")
+    assert param.sell_price == Decimal("110.28")
+    assert param.buy_price.as_tuple().exponent == -2
+    assert (param.ticker, param.initial_cache, param.tax_rate) == (
+        "TEST", RULE.initial_cache, RULE.tax_rate)
+
+
+@pytest.mark.parametrize("reference", [Decimal("0"), Decimal("0.004")])
+def test_levels_rejected_below_kopeck(reference):
+    """Опорная цена без уровня покупки в копейках отклоняется."""
+    with pytest.raises(ValueError):
+        relative_parameters(RULE, "TEST", reference)
@@ -0,0 +1,58 @@
+""" Тесты расчета стратегии по дням. """
+
+from decimal import Decimal
+
+from tests.conftest import make_candle_rows
+from trading_strategy_tester.api.schemas import StrategyParameters
+from trading_strategy_tester.models.candle_series import CandleSeries
+from trading_strategy_tester.services.facade import Facade
+from trading_strategy_tester.services.strategy_calculator import (
+    StrategyCalculator)
+
+
+def test_calculates_data(strategy_parameters, trading_data,
+                         expected_results, expected_transactions):
+    """Строки по дням и счетчики сделок совпадают с эталоном."""
+    calculator = StrategyCalculator(strategy_parameters)
+
+    results, transactions = calculator.calculates_data(trading_data)
+
+    assert results == expected_results
+    assert transactions == expected_transactions
+
+
+def test_empty_data(strategy_parameters):
+    """Пустая история не дает строк и сделок."""
+    calculator = StrategyCalculator(strategy_parameters)
+
+    results, _ = calculator.calculates_data([])
+
+    assert results == []
+    assert calculator.trades == []
+
+
+def test_summary_only_matches_full_mode():
+    """Режим только итогов дает те же итоги, сделки и крайние строки,
+    что и полный расчет (в том числе с налогом в конце года)."""
+    series = CandleSeries.from_rows(make_candle_rows(900))
+    param = StrategyParameters(ticker="TEST", initial_cache=Decimal("10000"),
+                               buy_price=Decimal("91.3"),
+                               sell_price=Decimal("109.7"),
+                               commission_rate=Decimal("0.0005"),
+                               tax_rate=Decimal("0.13"))
+    candles = series.candles()
+
+    full, full_final, full_trades = Facade.calculate(
+        candles, param, dates=series.dates)
+    calculator = StrategyCalculator(param, summary_only=True)
+    edges, _ = calculator.calculates_data(candles, dates=series.dates)
+    rows, final, trades = Facade.calculate(
+        candles, param, dates=series.dates, summary_only=True)
+
+    assert full_final["sell_count"] > 1
+    assert any(row.total_tax for row in full)
+    assert rows == []
+    assert final == full_final
+    assert trades == full_trades
+    assert edges == [full[0], full[-1]]
+    assert calculator.day_states == []
@@ -0,0 +1,95 @@
+""" Тесты журнала сделок и статистики оборотов. """
+
+from decimal import Decimal
+
+from trading_strategy_tester.api.schemas import StrategyParameters
+from trading_strategy_tester.models.trade import Trade
+from trading_strategy_tester.services.strategy_calculator import (
+    StrategyCalculator)
+from trading_strategy_tester.services.trade_stats import TradeStats
+
+
+def trade(date_str, side, price, quantity, commission, tax="0", trip=1):
+    return Trade(date_str=date_str, side=side, price=Decimal(price),
+                 quantity=quantity, commission=Decimal(commission),
+                 tax=Decimal(tax), trip=trip)
+
+
+LEDGER = [
+    trade("2023-01-02", "buy", "100", 10, "1.00"),
+    trade("2023-01-05", "buy", "94", 5, "0.47"),
+    trade("2023-01-12", "sell", "110", 15, "1.65", "20.00"),
+    trade("2023-02-01", "buy", "120", 10, "1.20", trip=2),
+    trade("2023-02-03", "sell", "115", 10, "1.15", trip=2),
+    trade("2023-03-01", "buy", "100", 7, "0.70", trip=3),
+]
+
+
+def test_from_trades_round_trips():
+    """Обороты собираются из покупок до продажи."""
+    stats = TradeStats.from_trades(LEDGER)
+
+    first, second = (trip.as_dict() for trip in stats.trips)
+    assert first == {
+        "trip": 1, "open_date": "2023-01-02", "close_date": "2023-01-12",
+        "buys": 2, "quantity": 15, "avg_buy_price": Decimal("98.00"),
+        "sell_price": Decimal("110"), "gross": Decimal("180.00"),
+        "commission": Decimal("3.12"), "tax": Decimal("20.00"),
+        "net": Decimal("156.88"), "holding_days": 10,
+    }
+    assert second["net"] == Decimal("-52.35")
+    assert second["holding_days"] == 2
+    assert stats.open_trip.trip == 3
+
+
+def test_summary():
+    """Итоги оборотов и открытая позиция."""
+    summary = TradeStats.from_trades(LEDGER).summary()
+
+    assert summary == {
+        "trips": 2,
+        "wins": 1,
+        "losses": 1,
+        "win_rate_perc": Decimal("50.00"),
+        "gross_profit": Decimal("156.88"),
+        "gross_loss": Decimal("52.35"),
+        "profit_factor": Decimal("3.00"),
+        "net_result": Decimal("104.53"),
+        "avg_net": Decimal("52.26"),
+        "best_net": Decimal("156.88"),
+        "worst_net": Decimal("-52.35"),
+        "avg_holding_days": 6.0,
+        "commission": Decimal("5.47"),
+        "tax": Decimal("20.00"),
+        "open_position": {
+            "open_date": "2023-03-01", "quantity": 7,
+            "avg_buy_price": Decimal("100.00"),
+            "commission": Decimal("0.70"),
+        },
+    }
+
+
+def test_empty_ledger():
+    """Пустой журнал не дает оборотов."""
+    summary = TradeStats.from_trades([]).summary()
+
+    assert summary["trips"] == 0
+    assert summary["win_rate_perc"] is None
+    assert summary["open_position"] is None
+
+
+def test_calculator_ledger_rounded(trading_data):
+    """Комиссия и налог в журнале калькулятора округлены до копеек."""
+    param = StrategyParameters(ticker="TEST", initial_cache=Decimal("10000"),
+                               buy_price=Decimal("100.37"),
+                               sell_price=Decimal("150.11"),
+                               commission_rate=Decimal("0.0005"),
+                               tax_rate=Decimal("0.13"))
+    calculator = StrategyCalculator(param)
+
+    calculator.calculates_data(trading_data)
+
+    assert [t.side for t in calculator.trades] == ["buy", "sell"]
+    for item in calculator.trades:
+        assert item.commission.as_tuple().exponent == -2
+        assert item.tax.as_tuple().exponent == -2
@@ -1,15 +1,23 @@
 """Точка входа в приложение."""
 
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
 
 import logging
-import uvicorn
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.staticfiles import StaticFiles
 
+from trading_strategy_tester.api.middleware import RequestContextMiddleware
 from trading_strategy_tester.api.routers import router
+from trading_strategy_tester.config import settings
+from trading_strategy_tester.services.admission import Overloaded
+from trading_strategy_tester.services.candle_cache import (candle_cache,
+                                                           warm_tickers)
+from trading_strategy_tester.services.compute_pool import compute_pool
+from trading_strategy_tester.services.maintenance import DatabaseMaintenance
 from trading_strategy_tester.utils.logger import setup_logging
 
 logger = logging.getLogger(__name__)
@@ -17,12 +25,41 @@ logger = logging.getLogger(__name__)
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 STATIC_DIR = BASE_DIR / "static"
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Запуск и остановка фоновых ресурсов приложения."""
+    setup_logging()
+    # Свечи часто запрашиваемых тикеров загружаются до первого запроса
+    tickers = warm_tickers()
+    if tickers:
+        loaded = await candle_cache.warm(tickers)
+        logger.info("Свечи загружены в кэш: %s", ", ".join(loaded) or "-")
+    maintenance_task = None
+    if settings.maintenance_interval_s > 0:
+        maintenance_task = asyncio.create_task(
+            DatabaseMaintenance().run_forever(
+                settings.maintenance_interval_s))
+
+    yield
+
+    if maintenance_task is not None:
+        maintenance_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await maintenance_task
+    compute_pool.shutdown()
+    candle_cache.close()
+
+
 app = FastAPI(
     title="Trading Strategy Tester",
     description="API для тестирования торговых стратегий.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+app.add_middleware(RequestContextMiddleware)
+
 app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 app.include_router(router)
@@ -42,6 +79,21 @@ async def validation_exception_handler(request: Request,
     )
 
 
+@app.exception_handler(Overloaded)
+async def overloaded_exception_handler(request: Request, exc: Overloaded):
+    """
+    Обработчик отклонения тяжелой операции при заполненной очереди.
+    Возвращает 429 с заголовком Retry-After.
+    """
+    logger.warning("Запрос %s отклонен: %s", request.url.path, exc)
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Сервер перегружен, повторите запрос позже",
+                 "retry_after": exc.retry_after},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """
@@ -55,6 +107,9 @@ async def general_exception_handler(request: Request, exc: Exception):
     )
 
 if __name__ == "__main__":
+    import uvicorn
+
     setup_logging()
     logger.info("Запуск сервера Uvicorn")
-    uvicorn.run(app, host="127.0.0.1", port=8080)
+    # Журналы uvicorn пишутся через очередь setup_logging
+    uvicorn.run(app, host="127.0.0.1", port=8080, log_config=None)
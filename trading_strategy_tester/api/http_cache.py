@@ -0,0 +1,113 @@
+"""
+Содержит поддержку условных запросов (ETag, If-None-Match) и сжатия
+ответов gzip/brotli по заголовку Accept-Encoding.
+"""
+
+import gzip
+import hashlib
+from typing import Dict, List, Optional
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # brotli - необязательная зависимость
+    brotli = None
+
+# Ответы меньше этого размера не сжимаются
+MIN_COMPRESS_SIZE = 1024
+
+# Кэш разрешен, но перед использованием ответ проверяется на сервере
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: object) -> str:
+    """Возвращает сильный ETag из частей, определяющих ответ."""
+    digest = hashlib.sha256(
+        "|".join(str(part) for part in parts).encode()).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def _strip_encoding(tag: str) -> str:
+    """Убирает из ETag суффикс кодировки сжатого представления."""
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for encoding in ("br", "gzip"):
+        suffix = f'-{encoding}"'
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Проверяет, совпадает ли ETag с заголовком If-None-Match."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(_strip_encoding(tag) == etag for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """Возвращает ответ 304 Not Modified."""
+    return Response(status_code=304, headers={
+        "ETag": etag, "Cache-Control": CACHE_CONTROL,
+        "Vary": "Accept-Encoding"})
+
+
+def _accepted_encodings(request: Request) -> Dict[str, float]:
+    """Разбирает Accept-Encoding в словарь кодировка -> q."""
+    accepted = {}
+    for item in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(request: Request) -> Optional[str]:
+    """
+    Выбирает кодировку ответа: brotli (если установлен), затем gzip.
+
+    Returns:
+        Optional[str]: br, gzip или None без сжатия.
+    """
+    accepted = _accepted_encodings(request)
+    candidates: List[str] = ["br", "gzip"] if brotli else ["gzip"]
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def cached_response(request: Request, body: bytes, etag: str,
+                    media_type: str = "application/json") -> Response:
+    """
+    Возвращает ответ с ETag, сжатый выбранной клиентом кодировкой.
+    У сжатого представления свой сильный ETag с суффиксом кодировки.
+    """
+    headers = {"Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    encoding = choose_encoding(request) if len(body) >= MIN_COMPRESS_SIZE \
+        else None
+    if encoding == "br":
+        body = brotli.compress(body, quality=5)
+    elif encoding == "gzip":
+        body = gzip.compress(body, compresslevel=6)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        etag = f'{etag[:-1]}-{encoding}"'
+    headers["ETag"] = etag
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -0,0 +1,63 @@
+"""
+Содержит ASGI-middleware контекста запроса: идентификатор запроса
+и время этапов обработки для журнала.
+"""
+
+import logging
+import time
+import uuid
+
+from trading_strategy_tester.utils.logger import (request_id_var,
+                                                  stage_timings_var)
+
+logger = logging.getLogger("trading_strategy_tester.access")
+
+REQUEST_ID_HEADER = b"x-request-id"
+
+
+class RequestContextMiddleware:
+    """
+    Назначает запросу идентификатор (из заголовка X-Request-ID или
+    новый), возвращает его в ответе и после ответа пишет в журнал
+    запись о запросе: метод, путь, код, длительность и этапы.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER:
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        id_token = request_id_var.set(request_id)
+        timings_token = stage_timings_var.set({})
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (REQUEST_ID_HEADER, request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            logger.info(
+                "%s %s %s %s мс", scope["method"], scope["path"], status,
+                duration_ms,
+                extra={"method": scope["method"], "path": scope["path"],
+                       "status": status, "duration_ms": duration_ms})
+            stage_timings_var.reset(timings_token)
+            request_id_var.reset(id_token)
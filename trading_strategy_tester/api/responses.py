@@ -0,0 +1,132 @@
+"""
+Содержит быструю сериализацию в JSON ответов с Decimal: итогов стратегии
+и рядов результатов по дням.
+
+Decimal записываются числами с фиксированной точкой без преобразования
+во float. Числовые колонки из БД уже хранятся строками с фиксированной
+точкой и пишутся в JSON как есть, без разбора.
+"""
+
+import math
+from datetime import date
+from decimal import Decimal
+from json.encoder import encode_basestring
+from typing import Any, Iterable, List, Sequence
+
+from fastapi.responses import Response
+
+
+def format_decimal(value: Decimal) -> str:
+    """Возвращает Decimal в виде JSON-числа с фиксированной точкой."""
+    if not value.is_finite():
+        return "null"
+    return format(value, "f")
+
+
+def _number_from_column(value: Any) -> str:
+    """
+    Возвращает значение числовой колонки как JSON-число.
+    Строки с фиксированной точкой из БД пишутся без разбора.
+    """
+    if type(value) is str:
+        if not value:
+            return "null"
+        # Экспоненциальная запись, NaN и Infinity приводятся к виду JSON
+        if not value[-1].isdigit() or "E" in value or "e" in value:
+            return format_decimal(Decimal(value))
+        return value
+    return encode_value(value)
+
+
+def encode_value(value: Any) -> str:
+    """Сериализует значение в JSON (Decimal - числом с фиксированной
+    точкой, даты - строкой ISO)."""
+    kind = type(value)
+    if kind is str:
+        return encode_basestring(value)
+    if kind is Decimal:
+        return format_decimal(value)
+    if value is None:
+        return "null"
+    if kind is bool:
+        return "true" if value else "false"
+    if kind is int:
+        return str(value)
+    if kind is float:
+        return repr(value) if math.isfinite(value) else "null"
+    if isinstance(value, dict):
+        return "{" + ",".join(
+            f"{encode_basestring(str(key))}:{encode_value(item)}"
+            for key, item in value.items()) + "}"
+    if isinstance(value, (list, tuple)):
+        return "[" + ",".join(encode_value(item) for item in value) + "]"
+    if isinstance(value, date):
+        return encode_basestring(value.isoformat())
+    # Подклассы базовых типов (IntEnum, str-Enum и т.п.)
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, int):
+        return int.__repr__(value)
+    if isinstance(value, float):
+        return encode_value(float(value))
+    if isinstance(value, Decimal):
+        return format_decimal(value)
+    raise TypeError(f"Тип {kind.__name__} не сериализуется в JSON")
+
+
+def encode_series(columns: Sequence[str], rows: Iterable[Sequence[Any]],
+                  numeric_columns: Iterable[str]) -> str:
+    """
+    Сериализует ряд строк таблицы в JSON-массив массивов.
+
+    Args:
+        columns: Имена колонок в порядке значений строки.
+        rows: Строки таблицы.
+        numeric_columns: Колонки, значения которых пишутся числами.
+
+    Returns:
+        str: JSON-массив строк.
+    """
+    numeric = set(numeric_columns)
+    encoders = [_number_from_column if name in numeric else encode_value
+                for name in columns]
+    parts: List[str] = []
+    for row in rows:
+        parts.append("[" + ",".join(
+            encode(value) for encode, value in zip(encoders, row)) + "]")
+    return "[" + ",".join(parts) + "]"
+
+
+class RawJSON(str):
+    """Готовый фрагмент JSON, вставляемый в ответ без сериализации."""
+
+
+class DecimalJSONResponse(Response):
+    """
+    JSON-ответ с быстрой сериализацией Decimal и готовых фрагментов
+    RawJSON (например, ряда из encode_series).
+    Возвращается из обработчика экземпляром, чтобы FastAPI не выполнял
+    jsonable_encoder.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return render_json(content)
+
+
+def render_json(content: Any) -> bytes:
+    """Сериализует содержимое ответа в JSON (UTF-8)."""
+    return _encode_with_raw(content).encode("utf-8")
+
+
+def _encode_with_raw(value: Any) -> str:
+    if isinstance(value, RawJSON):
+        return str(value)
+    if isinstance(value, dict):
+        return "{" + ",".join(
+            f"{encode_basestring(str(key))}:{_encode_with_raw(item)}"
+            for key, item in value.items()) + "}"
+    return encode_value(value)
@@ -1,15 +1,38 @@
 """Маршруты FastAPI."""
 
+import hashlib
+import json
 import logging
+from dataclasses import asdict
 from decimal import Decimal
-from fastapi import APIRouter, Request, Form
-from fastapi.responses import HTMLResponse
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Form
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 
+from trading_strategy_tester.api.http_cache import (
+    CACHE_CONTROL, cached_response, etag_matches, make_etag, not_modified)
+from trading_strategy_tester.api.responses import (
+    DecimalJSONResponse, RawJSON, encode_series, encode_value, render_json)
 from trading_strategy_tester.api.schemas import (RequestParameters,
+                                                 ScreenParameters,
                                                  StrategyParameters)
+from trading_strategy_tester.models.fill_model import FillModel
+from trading_strategy_tester.services.data_versions import data_versions
+from trading_strategy_tester.services.chart_data import (CHART_METHODS,
+                                                        chart_cache)
 from trading_strategy_tester.services.facade import Facade
-from trading_strategy_tester.services.database_gateway import DatabaseGateway
+from trading_strategy_tester.services.database_gateway import (
+    RESULT_COLUMNS, RESULT_SORT_COLUMNS, SUMMARY_RANK_COLUMNS,
+    DatabaseGateway)
+from trading_strategy_tester.services.exporter import (EXPORT_TABLES,
+                                                      TableExporter)
+from trading_strategy_tester.services.maintenance import refresh_db_stats
+from trading_strategy_tester.services.metrics import metrics
+from trading_strategy_tester.services.progress import progress_hub
+from trading_strategy_tester.services.screening import screen_universe
+from trading_strategy_tester.services.summary_query import SummaryQuery
+from trading_strategy_tester.services.trade_stats import TradeStats
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +53,8 @@ async def read_root(request: Request):
 async def fetch_data(
     ticker: str = Form(...),
     start: str = Form(...),
-    end: str = Form(...)
+    end: str = Form(...),
+    task_id: Optional[str] = Form(None)
 ):
     """Получает данные с MOEX и сохраняет их."""
     parameters = RequestParameters(
@@ -38,7 +62,8 @@ async def fetch_data(
         start=start,
         end=end
     )
-    success = await Facade.run_parsing(parameters)
+    progress = progress_hub.reporter(task_id) if task_id else None
+    success = await Facade.run_parsing(parameters, progress=progress)
     return {"success": success}
 
 
@@ -49,9 +74,13 @@ async def generate_report(
     buy_price: str = Form(...),
     sell_price: str = Form(...),
     commission_rate: str = Form(...),
-    tax_rate: str = Form(...)
+    tax_rate: str = Form(...),
+    task_id: Optional[str] = Form(None)
 ):
-    """Запускает торговую стратегию."""
+    """
+    Запускает торговую стратегию. Повторный запуск с теми же
+    параметрами на тех же данных возвращает сохраненные итоги без расчета.
+    """
     parameters = StrategyParameters(
         ticker=ticker,
         initial_cache=Decimal(initial_cache),
@@ -60,23 +89,182 @@ async def generate_report(
         commission_rate=Decimal(commission_rate),
         tax_rate=Decimal(tax_rate)
     )
+    progress = progress_hub.reporter(task_id) if task_id else None
+    success = await Facade.run_trading_strategy(parameters, progress)
+    return DecimalJSONResponse({"success": success})
+
+
+@router.get("/api/report")
+async def get_report(
+    request: Request,
+    ticker: str = Query(...),
+    initial_cache: Decimal = Query(...),
+    buy_price: Decimal = Query(...),
+    sell_price: Decimal = Query(...),
+    commission_rate: Decimal = Query(...),
+    tax_rate: Decimal = Query(...)
+):
+    """
+    Итоги торговой стратегии с поддержкой условных запросов.
+    ETag определяется тикером, параметрами и версией данных; если
+    результаты этого запуска уже сохранены, на совпадающий
+    If-None-Match отвечает 304 без обращения к БД и расчета.
+    """
+    parameters = StrategyParameters(
+        ticker=ticker,
+        initial_cache=initial_cache,
+        buy_price=buy_price,
+        sell_price=sell_price,
+        commission_rate=commission_rate,
+        tax_rate=tax_rate
+    )
+    tag = await Facade.report_tag(parameters)
+    etag = make_etag("report", tag)
+    version = await data_versions.get(ticker)
+    if version.results == tag and etag_matches(request, etag):
+        return not_modified(etag)
+
     success = await Facade.run_trading_strategy(parameters)
-    return {"success": success}
+    return DecimalJSONResponse({"success": success},
+                               headers={"ETag": etag,
+                                        "Cache-Control": CACHE_CONTROL})
 
 
-@router.post("/api/show-history")
-async def show_history(ticker: str = Form(...)):
+@router.get("/api/rolling/{ticker}")
+async def get_rolling_analysis(
+    request: Request,
+    ticker: str,
+    initial_cache: Decimal = Query(...),
+    buy_price: Decimal = Query(...),
+    sell_price: Decimal = Query(...),
+    commission_rate: Decimal = Query(...),
+    tax_rate: Decimal = Query(...),
+    step: int = Query(1, ge=1),
+    rows: bool = Query(True),
+    participation: Optional[float] = Query(None, gt=0, le=1),
+    slippage: float = Query(0, ge=0, lt=1),
+    task_id: Optional[str] = Query(None)
+):
     """
-    Возвращает HTML таблицу с историей торговой стратегии.
-    Данные берутся из таблицы {ticker}_results в БД.
+    Анализ по датам начала: стратегия запускается с каждой step-й даты
+    истории тикера. Возвращает доходность, годовую доходность и
+    максимальную просадку каждого запуска и их распределение.
+
+    participation - доля объема свечи, которую может исполнить запуск
+    (остаток заявки переносится на следующие свечи), slippage -
+    проскальзывание цены исполнения; без них заявки исполняются
+    полностью по цене заявки.
     """
-    async with DatabaseGateway() as gateway:
-        results = await gateway.load_strategy_results(ticker)
+    parameters = StrategyParameters(
+        ticker=ticker,
+        initial_cache=initial_cache,
+        buy_price=buy_price,
+        sell_price=sell_price,
+        commission_rate=commission_rate,
+        tax_rate=tax_rate
+    )
+    fill = None
+    if participation is not None or slippage:
+        fill = FillModel(participation or 1.0, slippage)
+    etag = make_etag("rolling", await Facade.report_tag(parameters), step,
+                     rows, *(() if fill is None else (fill,)))
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
-    if not results:
-        return {"success": False, "error": "Нет данных для отображения"}
+    progress = progress_hub.reporter(task_id) if task_id else None
+    try:
+        result = await Facade.run_rolling_analysis(parameters, step,
+                                                   progress, fill)
+    except ValueError as e:
+        raise HTTPException(status_code=404,
+                            detail="Нет данных для анализа") from e
+    if not rows:
+        result.pop("rows")
+    return DecimalJSONResponse({"success": True, "ticker": ticker.upper(),
+                                **result},
+                               headers={"ETag": etag,
+                                        "Cache-Control": CACHE_CONTROL})
+
+
+@router.get("/api/screen")
+async def screen_tickers(
+    initial_cache: Decimal = Query(...),
+    buy_pct: Decimal = Query(..., gt=-100),
+    sell_pct: Decimal = Query(...),
+    commission_rate: Decimal = Query(...),
+    tax_rate: Decimal = Query(...),
+    rank_by: str = Query("incom_year_pers"),
+    limit: Optional[int] = Query(None, ge=1),
+    tickers: Optional[str] = Query(None),
+    task_id: Optional[str] = Query(None)
+):
+    """
+    Отбор по всем тикерам с загруженной историей (или по списку
+    tickers=SBER,GAZP): уровни покупки и продажи задаются в процентах
+    от цены закрытия первой свечи тикера.
+
+    Ответ - поток NDJSON: список тикеров, итоги каждого тикера по мере
+    готовности и последней строкой таблица ranking по убыванию rank_by.
+    """
+    if sell_pct <= buy_pct:
+        raise HTTPException(status_code=400,
+                            detail="sell_pct должен быть больше buy_pct")
+    if rank_by not in SUMMARY_RANK_COLUMNS:
+        raise HTTPException(status_code=400,
+                            detail=f"Неизвестная метрика: {rank_by}")
+    rule = ScreenParameters(initial_cache=initial_cache, buy_pct=buy_pct,
+                            sell_pct=sell_pct,
+                            commission_rate=commission_rate,
+                            tax_rate=tax_rate)
+    selected = None
+    if tickers is not None:
+        selected = [ticker.strip() for ticker in tickers.split(",")
+                    if ticker.strip()]
 
-    # Формируем HTML таблицу
+    progress = progress_hub.reporter(task_id) if task_id else None
+    events = screen_universe(rule, selected, rank_by, limit, progress)
+    # Первое событие получаем до ответа: отказ в допуске - это 429
+    try:
+        first = await events.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def lines():
+        try:
+            if first is not None:
+                yield encode_value(first) + "\n"
+            async for event in events:
+                yield encode_value(event) + "\n"
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache",
+                                      "X-Accel-Buffering": "no"})
+
+
+@router.get("/api/progress/{task_id}")
+async def stream_progress(task_id: str):
+    """
+    Поток событий прогресса задачи (Server-Sent Events).
+    Идентификатор задачи передается клиентом в поле task_id формы.
+    """
+    async def events():
+        async for event in progress_hub.subscribe(task_id):
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _render_history_table(results: List[dict]) -> str:
+    """Формирует HTML таблицу с историей торговой стратегии."""
     html_table = """
     <table class="trading-results">
         <thead>
@@ -116,9 +304,330 @@ async def show_history(ticker: str = Form(...)):
         </tbody>
     </table>
     """
+    return html_table
+
+
+async def _history_response(request: Request, ticker: str,
+                            conditional: bool, fmt: str = "html"):
+    """
+    Возвращает историю торговой стратегии тикера со сжатием и ETag.
+    ETag - это тег запуска, заполнившего {ticker}_results; при
+    conditional совпадение с If-None-Match дает 304 без чтения БД.
+
+    fmt: html (HTML таблица) или rows (колонки и ряд значений,
+    числа с фиксированной точкой).
+    """
+    version = await data_versions.get(ticker)
+    etag = (make_etag("history", fmt, ticker.upper(), version.results)
+            if version.results else None)
+    if conditional and etag and etag_matches(request, etag):
+        return not_modified(etag)
+
+    async with DatabaseGateway() as gateway:
+        results = await gateway.load_strategy_results(ticker)
+
+    if not results:
+        return {"success": False, "error": "Нет данных для отображения"}
+
+    if fmt == "rows":
+        table = EXPORT_TABLES["results"]
+        columns = table.column_names
+        numeric = [name for name, kind in table.columns
+                   if kind in ("int", "float")]
+        body = render_json({
+            "success": True,
+            "ticker": ticker.upper(),
+            "columns": columns,
+            "rows": RawJSON(encode_series(
+                columns, ([row[name] for name in columns]
+                          for row in results), numeric)),
+        })
+    else:
+        body = json.dumps({
+            "success": True,
+            "html_table": _render_history_table(results),
+            "ticker": ticker.upper()
+        }, ensure_ascii=False).encode("utf-8")
+    if etag is None:
+        # Результаты сохранены до учета версий: тег по содержимому
+        etag = make_etag("history", hashlib.sha256(body).hexdigest())
+        if conditional and etag_matches(request, etag):
+            return not_modified(etag)
+    return cached_response(request, body, etag)
+
+
+@router.post("/api/show-history")
+async def show_history(request: Request, ticker: str = Form(...)):
+    """
+    Возвращает HTML таблицу с историей торговой стратегии.
+    Данные берутся из таблицы {ticker}_results в БД.
+    """
+    return await _history_response(request, ticker, conditional=False)
 
-    return {
+
+@router.get("/api/history/{ticker}")
+async def get_history(request: Request, ticker: str,
+                      format: str = Query("html", pattern="^(html|rows)$")):
+    """
+    История торговой стратегии с поддержкой условных запросов
+    (If-None-Match -> 304) и сжатия gzip/brotli.
+    format=rows возвращает колонки и строки вместо HTML таблицы.
+    """
+    return await _history_response(request, ticker, conditional=True,
+                                   fmt=format)
+
+
+def _check_result_sort(sort: str) -> None:
+    """Проверяет колонку сортировки страниц истории."""
+    if sort not in RESULT_SORT_COLUMNS:
+        raise HTTPException(status_code=400,
+                            detail=f"Недопустимая колонка сортировки: {sort}")
+
+
+@router.get("/api/results/{ticker}")
+async def get_results_range(
+    request: Request,
+    ticker: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=5000),
+    sort: str = Query("date_str"),
+    descending: bool = Query(False)
+):
+    """
+    Страница истории торговой стратегии для виртуализированной таблицы.
+    Строки выбираются по индексу колонки сортировки; share_change -
+    изменение количества акций относительно предыдущего дня.
+    """
+    _check_result_sort(sort)
+    ticker = ticker.upper()
+    version = await data_versions.get(ticker)
+    etag = (make_etag("results", ticker, version.results, offset, limit,
+                      sort, descending) if version.results else None)
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
+
+    try:
+        async with DatabaseGateway() as gateway:
+            total, rows = await gateway.load_results_range(
+                ticker, offset, limit, sort, descending)
+    except ValueError as e:
+        raise HTTPException(status_code=404,
+                            detail="Нет данных для отображения") from e
+
+    columns = [*RESULT_COLUMNS, "share_change"]
+    body = render_json({
+        "success": True,
+        "ticker": ticker,
+        "total": total,
+        "offset": offset,
+        "columns": columns,
+        "rows": RawJSON(encode_series(columns, rows, columns[1:])),
+    })
+    if etag is None:
+        etag = make_etag("results", hashlib.sha256(body).hexdigest())
+    return cached_response(request, body, etag)
+
+
+@router.get("/api/results/{ticker}/locate")
+async def locate_result_date(
+    ticker: str,
+    date: str = Query(..., pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    sort: str = Query("date_str"),
+    descending: bool = Query(False)
+):
+    """
+    Позиция первого дня не раньше date в заданном порядке сортировки
+    (для перехода к дате в таблице истории).
+    """
+    _check_result_sort(sort)
+    try:
+        async with DatabaseGateway() as gateway:
+            position = await gateway.locate_result_date(
+                ticker, date, sort, descending)
+    except ValueError as e:
+        raise HTTPException(status_code=404,
+                            detail="Нет данных для отображения") from e
+    return {"success": position is not None, "position": position}
+
+
+@router.get("/api/trades/{ticker}")
+async def get_trades(
+    request: Request,
+    ticker: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=10000),
+    side: Optional[str] = Query(None, pattern="^(buy|sell)$")
+):
+    """
+    Журнал сделок последнего расчета тикера: дата, направление, цена,
+    количество, комиссия, налог с продажи и номер оборота.
+    """
+    ticker = ticker.upper()
+    version = await data_versions.get(ticker)
+    etag = (make_etag("trades", ticker, version.results, offset, limit,
+                      side) if version.results else None)
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
+
+    try:
+        async with DatabaseGateway() as gateway:
+            total, trades = await gateway.load_trades(ticker, offset, limit,
+                                                      side)
+    except ValueError as e:
+        raise HTTPException(status_code=404,
+                            detail="Нет данных для отображения") from e
+
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL} if etag \
+        else None
+    return DecimalJSONResponse({
         "success": True,
-        "html_table": html_table,
-        "ticker": ticker.upper()
+        "ticker": ticker,
+        "total": total,
+        "offset": offset,
+        "trades": [asdict(trade) for trade in trades],
+    }, headers=headers)
+
+
+@router.get("/api/trades/{ticker}/stats")
+async def get_trade_stats(
+    request: Request,
+    ticker: str,
+    trips: bool = Query(False)
+):
+    """
+    Статистика сделок последнего расчета тикера по оборотам (покупки
+    до продажи): доля прибыльных, профит-фактор, средний результат,
+    срок владения. Считается по журналу сделок, а не по дневным
+    результатам. trips=true добавляет список оборотов.
+    """
+    ticker = ticker.upper()
+    version = await data_versions.get(ticker)
+    etag = (make_etag("trade-stats", ticker, version.results, trips)
+            if version.results else None)
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
+
+    try:
+        async with DatabaseGateway() as gateway:
+            _, trades = await gateway.load_trades(ticker)
+    except ValueError as e:
+        raise HTTPException(status_code=404,
+                            detail="Нет данных для отображения") from e
+
+    stats = TradeStats.from_trades(trades)
+    content = {"success": True, "ticker": ticker, **stats.summary()}
+    if trips:
+        content["round_trips"] = [trip.as_dict() for trip in stats.trips]
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL} if etag \
+        else None
+    return DecimalJSONResponse(content, headers=headers)
+
+
+@router.get("/api/chart/{ticker}")
+async def get_chart(
+    request: Request,
+    ticker: str,
+    width: int = Query(800, ge=10, le=20000),
+    start: Optional[str] = Query(None),
+    end: Optional[str] = Query(None),
+    method: str = Query("lttb")
+):
+    """
+    Ряды капитала, кэша и позиции для графика, прореженные на сервере
+    до width точек (LTTB или корзины min/max). start и end ('YYYY-MM-DD')
+    ограничивают период при масштабировании.
+    """
+    if method not in CHART_METHODS:
+        raise HTTPException(status_code=400,
+                            detail=f"Неизвестный алгоритм: {method}")
+
+    ticker = ticker.upper()
+    version = await data_versions.get(ticker)
+    etag = (make_etag("chart", ticker, version.results, width, start,
+                      end, method) if version.results else None)
+    if etag and etag_matches(request, etag):
+        return not_modified(etag)
+
+    levels, _ = await chart_cache.levels(ticker, method)
+    if levels is None:
+        raise HTTPException(status_code=404,
+                            detail="Нет данных для отображения")
+
+    series = levels.query(width, start, end)
+    content = {
+        "success": True,
+        "ticker": ticker,
+        "total": levels.total,
+        "points": len(series),
+        "dates": series.dates,
+        "equity": series.equity,
+        "cash": series.cash,
+        "position_value": series.position_value,
+        "shares": series.shares,
     }
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL} if etag \
+        else None
+    return DecimalJSONResponse(content, headers=headers)
+
+
+@router.get("/api/export/{ticker}/{kind}")
+async def export_table(
+    ticker: str,
+    kind: str,
+    format: str = Query("parquet"),
+    batch_size: int = Query(50000, ge=1, le=1000000)
+):
+    """
+    Потоковая выгрузка таблицы тикера.
+
+    kind: results ({ticker}_results), calculations ({ticker}_calculations),
+    candles ({ticker}_dataframe) или trades ({ticker}_trades).
+    format: arrow (Arrow IPC stream), parquet или csv.
+    """
+    try:
+        exporter = TableExporter(ticker, kind, format, batch_size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    if not await exporter.exists():
+        raise HTTPException(status_code=404,
+                            detail="Нет данных для выгрузки")
+
+    return StreamingResponse(
+        exporter.stream(),
+        media_type=exporter.media_type,
+        headers={"Content-Disposition":
+                 f'attachment; filename="{exporter.filename}"'},
+    )
+
+
+@router.get("/api/summaries")
+async def query_summaries(
+    where: List[str] = Query([]),
+    tickers: Optional[str] = Query(None),
+    order_by: str = Query("incom_year_pers"),
+    descending: bool = Query(True),
+    limit: int = Query(20, ge=1, le=10000),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Возвращает сохраненные итоги расчетов всех тикеров.
+
+    Пример: /api/summaries?order_by=incom_year_pers&limit=20
+    &where=buy_count>5&tickers=SBER,GAZP
+    """
+    try:
+        query = SummaryQuery.from_params(where, tickers, order_by,
+                                         descending, limit, offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    rows = await query.execute()
+    return DecimalJSONResponse({"success": True, "rows": rows})
+
+
+@router.get("/api/metrics")
+async def get_metrics():
+    """Возвращает метрики процесса, включая размер и фрагментацию БД."""
+    await refresh_db_stats()
+    return metrics.snapshot()
@@ -36,3 +36,26 @@ class StrategyParameters(BaseModel):
     sell_price: Decimal
     commission_rate: Decimal
     tax_rate: Decimal
+
+
+class ScreenParameters(BaseModel):
+    """
+    Модель относительных параметров стратегии для отбора по всем тикерам.
+
+    Уровни покупки и продажи задаются в процентах от опорной цены тикера
+    (цены закрытия первой свечи истории), поэтому одни параметры
+    применимы к акциям с разными ценами.
+
+    Атрибуты:
+        initial_cache (Decimal): Сумма кэша на начало стратегии.
+        buy_pct (Decimal): Уровень покупки, % от опорной цены
+            (например, -5 - на 5% ниже).
+        sell_pct (Decimal): Уровень продажи, % от опорной цены.
+        commission_rate (Decimal): Процентая ставка комиссии брокера.
+        tax_rate (Decimal): Налоговая ставка.
+    """
+    initial_cache: Decimal
+    buy_pct: Decimal
+    sell_pct: Decimal
+    commission_rate: Decimal
+    tax_rate: Decimal
@@ -0,0 +1,267 @@
+"""
+Консольный пакетный запуск бэктестов без веб-сервера.
+
+Файл заданий (YAML, JSON или CSV) содержит список параметров стратегии:
+ticker, initial_cache, buy_price, sell_price, commission_rate, tax_rate.
+Для YAML/JSON допускается форма {"defaults": {...}, "jobs": [...]}.
+
+Пример:
+    tst-batch jobs.yaml --workers 4 --output summaries.parquet
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from trading_strategy_tester.api.schemas import StrategyParameters
+from trading_strategy_tester.models.date_index import DateIndex
+from trading_strategy_tester.models.stock_candle import StockCandle
+from trading_strategy_tester.services.database_gateway import DatabaseGateway
+from trading_strategy_tester.services.facade import Facade
+
+logger = logging.getLogger(__name__)
+
+# Значения по умолчанию, совпадающие с формой веб-интерфейса
+JOB_DEFAULTS = {"commission_rate": "0.00035", "tax_rate": "0.13"}
+
+# Сколько тикеров держит в памяти один рабочий процесс
+WORKER_CACHE_SIZE = 4
+
+_worker_candles: Dict[str, Tuple[List[StockCandle], DateIndex]] = {}
+
+
+def load_jobs(path: Path) -> List[StrategyParameters]:
+    """
+    Читает файл заданий.
+
+    Args:
+        path (Path): Путь к файлу .yaml/.yml, .json или .csv.
+
+    Returns:
+        List[StrategyParameters]: Параметры стратегий.
+
+    Raises:
+        ValueError: Если формат файла не поддерживается или задания
+            содержат ошибки (перечисляются все ошибочные задания).
+        RuntimeError: Если для чтения YAML не установлен PyYAML.
+    """
+    suffix = path.suffix.lower()
+    if suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as e:
+            raise RuntimeError(
+                "Для чтения YAML установите пакет PyYAML "
+                "(дополнение yaml: pip install "
+                "'trading-strategy-tester[yaml]')") from e
+        raw = yaml.safe_load(path.read_text(encoding="utf-8"))
+    elif suffix == ".json":
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    elif suffix == ".csv":
+        with path.open(encoding="utf-8", newline="") as f:
+            raw = list(csv.DictReader(f))
+    else:
+        raise ValueError(f"Неподдерживаемый формат файла заданий: {path}")
+
+    defaults = dict(JOB_DEFAULTS)
+    if isinstance(raw, dict):
+        defaults.update(raw.get("defaults") or {})
+        raw = raw.get("jobs") or []
+
+    if not isinstance(raw, list):
+        raise ValueError(f"Файл заданий {path} не содержит списка заданий")
+
+    jobs = []
+    errors = []
+    for number, item in enumerate(raw, 1):
+        if not isinstance(item, dict):
+            errors.append(f"задание {number}: ожидался словарь параметров")
+            continue
+        job = dict(defaults)
+        job.update({key: value for key, value in item.items()
+                    if value not in (None, "")})
+        try:
+            # Строковое представление исключает погрешность float
+            # в Decimal
+            jobs.append(StrategyParameters(**{
+                key: str(value) for key, value in job.items()}))
+        except ValidationError as e:
+            fields = "; ".join(
+                f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                for error in e.errors())
+            errors.append(f"задание {number} ({job.get('ticker', '?')}): "
+                          f"{fields}")
+    if errors:
+        raise ValueError("Ошибки в файле заданий:\n  "
+                         + "\n  ".join(errors))
+    return jobs
+
+
+def _load_candles(ticker: str) -> Tuple[List[StockCandle], DateIndex]:
+    """Загружает свечи тикера и индекс их дат с кэшированием
+    в рабочем процессе."""
+    loaded = _worker_candles.get(ticker)
+    if loaded is None:
+        async def load():
+            async with DatabaseGateway() as gateway:
+                return await gateway.load_candle_series(ticker)
+
+        series = asyncio.run(load())
+        loaded = series.candles(), series.dates
+        if len(_worker_candles) >= WORKER_CACHE_SIZE:
+            _worker_candles.pop(next(iter(_worker_candles)))
+        _worker_candles[ticker] = loaded
+    return loaded
+
+
+def run_job(param: StrategyParameters
+            ) -> Tuple[Optional[Dict[str, Any]], int, Optional[str]]:
+    """
+    Выполняет одно задание.
+
+    Returns:
+        Tuple: Итоги стратегии (или None), количество обработанных свечей
+            и текст ошибки (или None).
+    """
+    try:
+        candles, dates = _load_candles(param.ticker.upper())
+        _, summary, _ = Facade.calculate(candles, param, dates=dates,
+                                         summary_only=True)
+        return summary, len(candles), None
+    except Exception as e:  # задание с ошибкой не прерывает пакет
+        return None, 0, f"{type(e).__name__}: {e}"
+
+
+def write_output(rows: List[Dict[str, Any]], path: Path) -> None:
+    """
+    Записывает итоги в Parquet или CSV в зависимости от расширения.
+
+    В CSV значения Decimal пишутся без потери точности, в Parquet
+    приводятся к float64. Целые колонки (buy_count, sell_count и т.п.)
+    остаются целыми и при пропусках в строках с ошибкой.
+    """
+    import pandas as pd
+
+    suffix = path.suffix.lower()
+    if suffix not in (".parquet", ".csv"):
+        raise ValueError(f"Неподдерживаемый формат вывода: {path}")
+
+    df = pd.DataFrame(rows)
+    for name in df.columns:
+        # Строки с ошибкой не содержат итогов и дают пропуски
+        values = [row[name] for row in rows if name in row]
+        if values and all(type(value) is int for value in values):
+            df[name] = df[name].astype("Int64")
+        elif suffix == ".parquet":
+            df[name] = df[name].map(
+                lambda v: float(v) if isinstance(v, Decimal) else v)
+    if suffix == ".parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+async def persist_summaries(rows: List[Dict[str, Any]]) -> None:
+    """Сохраняет успешные итоги в таблицы {ticker}_calculations."""
+    async with DatabaseGateway() as gateway:
+        for row in rows:
+            if row.get("error") is None:
+                summary = {key: value for key, value in row.items()
+                           if key not in ("ticker", "error")}
+                await gateway.saves_calculations(summary, row["ticker"])
+
+
+def run_batch(jobs: List[StrategyParameters], workers: int
+              ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Выполняет задания параллельно в пуле процессов.
+
+    Args:
+        jobs (List[StrategyParameters]): Задания.
+        workers (int): Количество рабочих процессов.
+
+    Returns:
+        Tuple: Строки итогов в порядке заданий и статистика пропускной
+            способности.
+    """
+    # Задания одного тикера идут подряд, чтобы процессы
+    # переиспользовали загруженные свечи.
+    order = sorted(range(len(jobs)), key=lambda i: jobs[i].ticker.upper())
+    ordered_jobs = [jobs[i] for i in order]
+
+    started = time.perf_counter()
+    if workers <= 1:
+        outcomes = [run_job(job) for job in ordered_jobs]
+    else:
+        chunksize = max(1, len(ordered_jobs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(run_job, ordered_jobs,
+                                     chunksize=chunksize))
+    elapsed = time.perf_counter() - started
+
+    rows: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+    total_candles = 0
+    errors = 0
+    for index, job, (summary, candle_count, error) in zip(
+            order, ordered_jobs, outcomes):
+        total_candles += candle_count
+        errors += error is not None
+        rows[index] = {"ticker": job.ticker.upper(), **(summary or {}),
+                       "error": error}
+
+    stats = {
+        "runs": len(jobs),
+        "errors": errors,
+        "workers": workers,
+        "elapsed_s": round(elapsed, 3),
+        "runs_per_s": round(len(jobs) / elapsed, 2) if elapsed else None,
+        "rows_per_s": round(total_candles / elapsed, 1) if elapsed else None,
+    }
+    return rows, stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Точка входа консольной команды tst-batch."""
+    parser = argparse.ArgumentParser(
+        prog="tst-batch",
+        description="Пакетный запуск бэктестов без веб-сервера.")
+    parser.add_argument("jobs", type=Path,
+                        help="Файл заданий: .yaml, .json или .csv")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Количество рабочих процессов")
+    parser.add_argument("-o", "--output", type=Path,
+                        default=Path("summaries.csv"),
+                        help="Файл итогов: .parquet или .csv")
+    parser.add_argument("--persist", action="store_true",
+                        help="Сохранить итоги в таблицы *_calculations")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    try:
+        jobs = load_jobs(args.jobs)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"tst-batch: {e}", file=sys.stderr)
+        return 2
+    rows, stats = run_batch(jobs, args.workers)
+    write_output(rows, args.output)
+    if args.persist:
+        asyncio.run(persist_summaries(rows))
+
+    stats["output"] = str(args.output)
+    print(json.dumps(stats, ensure_ascii=False, indent=2))
+    return 1 if stats["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
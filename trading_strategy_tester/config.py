@@ -0,0 +1,130 @@
+"""Настройки приложения, считываемые из переменных окружения."""
+
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+def _env_str(name: str, default: str) -> str:
+    """Возвращает строковое значение переменной окружения."""
+    return os.environ.get(name, default)
+
+
+def _env_int(name: str, default: int) -> int:
+    """Возвращает целое значение переменной окружения."""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_path(name: str, default: Path) -> Path:
+    """Возвращает путь из переменной окружения."""
+    value = os.environ.get(name)
+    return Path(value) if value else default
+
+
+@dataclass
+class Settings:
+    """
+    Настройки приложения.
+
+    Атрибуты:
+        db_path (Path): Путь к файлу базы данных SQLite.
+        candle_source (str): Источник свечей: live (moexalgo), iss
+            (HTTP-запросы к ISS), record (live с записью ответов на диск),
+            replay (только записанные ответы).
+        recordings_dir (Path): Каталог записанных ответов MOEX.
+        iss_base_url (str): Базовый адрес ISS (можно указать локальную
+            заглушку).
+        compute_mode (str): Где выполняются расчеты стратегий: process
+            (пул процессов) или thread (пул потоков).
+        compute_workers (int): Количество процессов/потоков пула расчетов.
+        compute_max_pending (int): Сколько расчетов одновременно передается
+            в пул, остальные ожидают своей очереди.
+        retention_keep_last (int): Сколько последних итогов хранить на
+            тикер (0 - без ограничения).
+        retention_max_age_days (int): Удалять итоги старше N дней
+            (0 - без ограничения).
+        db_size_budget_mb (int): Бюджет размера БД в МБ, при превышении
+            вытесняются данные давно не использованных тикеров
+            (0 - без ограничения).
+        maintenance_interval_s (int): Период обслуживания БД в секундах
+            (0 - не запускать по расписанию).
+        ingest_page_rows (int): Сколько свечей записывается в БД одной
+            транзакцией при загрузке истории.
+        ingest_queue_pages (int): Сколько страниц свечей может ожидать
+            записи, пока загрузка следующих приостановлена.
+        admission_limits (str): Пределы допуска тяжелых операций в виде
+            'имя=параллельность:стоимость очереди,...' для report
+            (расчет стратегии), rolling (анализ по датам начала),
+            ingest (загрузка истории) и screen (отбор по всем тикерам).
+            Стоимость - свечи x количество запусков (для отбора -
+            количество тикеров); параллельность 0 - по числу
+            исполнителей пула.
+        log_level (str): Уровень логирования.
+        log_format (str): Формат журнала: text или json.
+        log_file (Path): Файл журнала.
+        log_max_mb (int): Размер файла журнала в МБ, при котором он
+            переименовывается в резервную копию.
+        log_backups (int): Количество резервных копий журнала.
+        log_rate_limit (float): Предел записей ниже ERROR в секунду из
+            одного места вызова (0 - без ограничения).
+        candle_cache_mb (int): Бюджет памяти кэша свечей в МБ в режиме
+            memory (0 - кэш отключен).
+        candle_cache_warm (str): Тикеры через запятую, свечи которых
+            загружаются в кэш при запуске приложения.
+        candle_store (str): Хранение свечей кэша: memory (в памяти
+            процесса) или shared (сегменты рядом с БД, общие для всех
+            воркеров).
+    """
+    db_path: Path = field(default_factory=lambda: _env_path(
+        "TST_DB_PATH",
+        Path.cwd() / "database" / "trading_strategy_tester.db"))
+    candle_source: str = field(default_factory=lambda: _env_str(
+        "TST_CANDLE_SOURCE", "live"))
+    recordings_dir: Path = field(default_factory=lambda: _env_path(
+        "TST_RECORDINGS_DIR", Path.cwd() / "recordings"))
+    iss_base_url: str = field(default_factory=lambda: _env_str(
+        "TST_ISS_BASE_URL", "https://iss.moex.com"))
+    compute_mode: str = field(default_factory=lambda: _env_str(
+        "TST_COMPUTE_MODE", "process"))
+    compute_workers: int = field(default_factory=lambda: _env_int(
+        "TST_COMPUTE_WORKERS", os.cpu_count() or 1))
+    compute_max_pending: int = field(default_factory=lambda: _env_int(
+        "TST_COMPUTE_MAX_PENDING", 2 * (os.cpu_count() or 1)))
+    retention_keep_last: int = field(default_factory=lambda: _env_int(
+        "TST_RETENTION_KEEP_LAST", 0))
+    retention_max_age_days: int = field(default_factory=lambda: _env_int(
+        "TST_RETENTION_MAX_AGE_DAYS", 0))
+    db_size_budget_mb: int = field(default_factory=lambda: _env_int(
+        "TST_DB_SIZE_BUDGET_MB", 0))
+    maintenance_interval_s: int = field(default_factory=lambda: _env_int(
+        "TST_MAINTENANCE_INTERVAL_S", 3600))
+    ingest_page_rows: int = field(default_factory=lambda: _env_int(
+        "TST_INGEST_PAGE_ROWS", 5000))
+    ingest_queue_pages: int = field(default_factory=lambda: _env_int(
+        "TST_INGEST_QUEUE_PAGES", 2))
+    admission_limits: str = field(default_factory=lambda: _env_str(
+        "TST_ADMISSION_LIMITS",
+        "report=0:1000000,rolling=1:200000000,ingest=2:200000,"
+        "screen=1:2000"))
+    log_level: str = field(default_factory=lambda: _env_str(
+        "TST_LOG_LEVEL", "INFO"))
+    log_format: str = field(default_factory=lambda: _env_str(
+        "TST_LOG_FORMAT", "text"))
+    log_file: Path = field(default_factory=lambda: _env_path(
+        "TST_LOG_FILE", Path.cwd() / "logs" / "app.log"))
+    log_max_mb: int = field(default_factory=lambda: _env_int(
+        "TST_LOG_MAX_MB", 10))
+    log_backups: int = field(default_factory=lambda: _env_int(
+        "TST_LOG_BACKUPS", 5))
+    log_rate_limit: float = field(default_factory=lambda: float(
+        _env_str("TST_LOG_RATE_LIMIT", "20")))
+    candle_cache_mb: int = field(default_factory=lambda: _env_int(
+        "TST_CANDLE_CACHE_MB", 256))
+    candle_cache_warm: str = field(default_factory=lambda: _env_str(
+        "TST_CANDLE_CACHE_WARM", ""))
+    candle_store: str = field(default_factory=lambda: _env_str(
+        "TST_CANDLE_STORE", "memory"))
+
+
+settings = Settings()
@@ -0,0 +1,74 @@
+"""
+Модуль для хранения свечей тикера по колонкам.
+"""
+
+import sys
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import List, Optional, Sequence, Tuple
+
+from trading_strategy_tester.models.date_index import DateIndex
+from trading_strategy_tester.models.stock_candle import StockCandle
+
+PRICE_FIELDS = ("open", "close", "high", "low", "value", "volume")
+
+
+@dataclass(frozen=True)
+class CandleSeries:
+    """Свечи тикера в виде колонок.
+
+    Хранит:
+    - Цены, оборот и объем как кортежи Decimal (разобраны один раз)
+    - Даты начала и окончания в строковом ISO формате
+    - Индекс дат (DateIndex), разобранный при загрузке
+
+    Колонки неизменяемы, поэтому один ряд можно отдавать нескольким
+    расчетам одновременно; каждый расчет получает свои объекты свечей.
+    """
+    open: Tuple[Decimal, ...]
+    close: Tuple[Decimal, ...]
+    high: Tuple[Decimal, ...]
+    low: Tuple[Decimal, ...]
+    value: Tuple[Decimal, ...]
+    volume: Tuple[Decimal, ...]
+    begin: Tuple[str, ...]
+    end: Tuple[str, ...]
+    nbytes: int = field(default=0, compare=False)
+    dates: Optional[DateIndex] = field(default=None, compare=False)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence]) -> "CandleSeries":
+        """Создает ряд из строк таблицы свечей.
+
+        Args:
+            rows: Строки (open, close, high, low, value, volume, begin,
+                end); цены - текст или числа.
+
+        Returns:
+            CandleSeries: Ряд свечей.
+        """
+        if not rows:
+            return cls.from_columns(*([()] * 8))
+        return cls.from_columns(*zip(*rows))
+
+    @classmethod
+    def from_columns(cls, *columns: Sequence) -> "CandleSeries":
+        """Создает ряд из колонок open, close, high, low, value, volume,
+        begin, end; цены - текст или числа."""
+        prices = [tuple(map(Decimal, map(str, column)))
+                  for column in columns[:6]]
+        dates = [tuple(map(str, column)) for column in columns[6:8]]
+        index = DateIndex.from_begins(dates[0])
+        nbytes = sum(sys.getsizeof(column) + sum(map(sys.getsizeof, column))
+                     for column in prices + dates + [index.dates,
+                                                     index.ordinals])
+        return cls(*prices, *dates, nbytes=nbytes, dates=index)
+
+    def candles(self) -> List[StockCandle]:
+        """Возвращает новые объекты свечей ряда."""
+        return list(map(StockCandle, self.open, self.close, self.high,
+                        self.low, self.value, self.volume, self.begin,
+                        self.end))
+
+    def __len__(self) -> int:
+        return len(self.begin)
@@ -0,0 +1,62 @@
+"""
+Модуль для хранения разобранных дат торговых дней.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterable, Optional, Tuple
+
+# Первый день декабря, с которого списывается налог за год
+TAX_DAY_FROM = 20
+
+
+@dataclass(frozen=True)
+class DateIndex:
+    """Даты свечей, разобранные один раз для всех расчетов.
+
+    Хранит по каждой свече:
+    - dates: дату в формате 'YYYY-MM-DD'
+    - ordinals: порядковый номер даты (date.toordinal)
+    - year, month: год и месяц
+    - tax_day: попадает ли дата в период списания налога за год
+      (с 20 по 31 декабря)
+
+    Значения хранятся кортежами чисел Python: расчеты по строкам
+    перебирают их быстрее, чем массивы numpy.
+    """
+    dates: Tuple[str, ...]
+    ordinals: Tuple[int, ...]
+    year: Tuple[int, ...]
+    month: Tuple[int, ...]
+    tax_day: Tuple[bool, ...]
+
+    @classmethod
+    def from_begins(cls, begins: Iterable[str]) -> "DateIndex":
+        """Создает индекс из дат начала свечей ('YYYY-MM-DD HH:MM:SS').
+
+        Args:
+            begins: Даты начала свечей в порядке свечей.
+
+        Returns:
+            DateIndex: Индекс дат.
+        """
+        dates = tuple(begin.split()[0] for begin in begins)
+        parsed = [date.fromisoformat(value) for value in dates]
+        return cls(
+            dates=dates,
+            ordinals=tuple(d.toordinal() for d in parsed),
+            year=tuple(d.year for d in parsed),
+            month=tuple(d.month for d in parsed),
+            tax_day=tuple(d.month == 12 and d.day >= TAX_DAY_FROM
+                          for d in parsed),
+        )
+
+    def slice(self, start: int,
+              stop: Optional[int] = None) -> "DateIndex":
+        """Возвращает индекс свечей [start:stop]."""
+        return DateIndex(self.dates[start:stop], self.ordinals[start:stop],
+                         self.year[start:stop], self.month[start:stop],
+                         self.tax_day[start:stop])
+
+    def __len__(self) -> int:
+        return len(self.dates)
@@ -0,0 +1,27 @@
+"""
+Модуль для хранения параметров модели исполнения заявок.
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class FillModel:
+    """
+    Модель исполнения заявок с учетом ликвидности.
+
+    Атрибуты:
+        participation (float): Доля объема свечи, которую дорожка может
+            купить и продать за свечу (0 < participation <= 1).
+        slippage (float): Проскальзывание, доля цены: покупка
+            исполняется по buy_price * (1 + slippage), продажа - по
+            sell_price * (1 - slippage).
+    """
+    participation: float = 1.0
+    slippage: float = 0.0
+
+    def __post_init__(self):
+        if not 0 < self.participation <= 1:
+            raise ValueError("Доля объема должна быть в (0, 1]")
+        if not 0 <= self.slippage < 1:
+            raise ValueError("Проскальзывание должно быть в [0, 1)")
@@ -6,7 +6,10 @@
 from dataclasses import dataclass
 from decimal import Decimal
 from datetime import datetime
-import pandas as pd
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # pandas загружается при первом использовании
+    import pandas as pd
 
 
 @dataclass
@@ -34,8 +37,8 @@ class StockCandle:
                           low: Decimal,
                           value: Decimal,
                           volume: Decimal,
-                          begin: pd.Timestamp,
-                          end: pd.Timestamp):
+                          begin: "pd.Timestamp",
+                          end: "pd.Timestamp"):
         """Альтернативный конструктор для создания из pandas.Timestamp.
 
         Args:
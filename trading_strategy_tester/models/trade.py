@@ -0,0 +1,28 @@
+""" Содержит класс для хранения сделки торговой стратегии. """
+
+from dataclasses import dataclass
+from decimal import Decimal
+
+
+@dataclass
+class Trade:
+    """
+    Класс для хранения сделки торговой стратегии.
+
+    Атрибуты:
+        date_str (str): Дата сделки в формате 'YYYY-MM-DD'.
+        side (str): Направление: 'buy' или 'sell'.
+        price (Decimal): Цена сделки.
+        quantity (int): Количество акций.
+        commission (Decimal): Комиссия брокера за сделку.
+        tax (Decimal): Налог с прибыли от продажи (для покупки - 0).
+        trip (int): Номер оборота: покупки до продажи и сама продажа
+            имеют один номер.
+    """
+    date_str: str
+    side: str
+    price: Decimal
+    quantity: int
+    commission: Decimal
+    tax: Decimal
+    trip: int
@@ -0,0 +1,238 @@
+"""
+Содержит допуск тяжелых операций (расчеты стратегий, анализ по датам
+начала, загрузка истории): у каждого вида операций ограничено число
+одновременно выполняемых и суммарная стоимость ожидающих. Стоимость
+операции оценивается как количество свечей x количество запусков.
+Если очередь заполнена, операция сразу отклоняется с оценкой времени,
+через которое стоит повторить запрос.
+"""
+
+import asyncio
+import math
+import time
+from datetime import date
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from trading_strategy_tester.config import settings
+from trading_strategy_tester.services.database_gateway import DatabaseGateway
+from trading_strategy_tester.services.data_versions import data_versions
+from trading_strategy_tester.services.metrics import metrics
+from trading_strategy_tester.services.progress import ProgressReporter
+from trading_strategy_tester.utils.logger import record_stage
+
+# Пределы оценки времени до повторного запроса, секунды
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 120
+
+
+class Overloaded(Exception):
+    """
+    Операция отклонена: очередь вида операций заполнена.
+
+    Атрибуты:
+        name (str): Вид операций.
+        retry_after (int): Через сколько секунд стоит повторить запрос.
+    """
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"Очередь операций {name} заполнена")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class AdmissionQueue:
+    """
+    Очередь допуска одного вида операций.
+
+    Операция выполняется сразу, если есть свободное место и нет
+    ожидающих; иначе ждет в порядке очереди, если суммарная стоимость
+    ожидающих с ее учетом не превышает max_queue_cost, или отклоняется.
+    """
+
+    def __init__(self, name: str, concurrency: int, max_queue_cost: int):
+        """
+        Args:
+            name (str): Вид операций (для метрик).
+            concurrency (int): Предел одновременно выполняемых операций.
+            max_queue_cost (int): Предел суммарной стоимости ожидающих.
+        """
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.max_queue_cost = max_queue_cost
+        self.running = 0
+        self.running_cost = 0
+        self.queued = 0
+        self.queued_cost = 0
+        # Сглаженное время выполнения единицы стоимости, секунды
+        self.seconds_per_cost: Optional[float] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.concurrency)
+            self._slots_loop = loop
+        return self._slots
+
+    @property
+    def busy(self) -> bool:
+        """Будет ли новая операция ждать своей очереди."""
+        return self.running >= self.concurrency or self.queued > 0
+
+    def retry_after(self) -> int:
+        """Оценивает, через сколько секунд освободится очередь."""
+        if self.seconds_per_cost is None:
+            return MIN_RETRY_AFTER
+        backlog = (self.queued_cost + self.running_cost) \
+            * self.seconds_per_cost / self.concurrency
+        return min(MAX_RETRY_AFTER, max(MIN_RETRY_AFTER,
+                                        math.ceil(backlog)))
+
+    def _publish(self) -> None:
+        prefix = f"admission_{self.name}"
+        metrics.set_gauge(f"{prefix}_running", self.running)
+        metrics.set_gauge(f"{prefix}_queue_depth", self.queued)
+        metrics.set_gauge(f"{prefix}_queued_cost", self.queued_cost)
+
+    @asynccontextmanager
+    async def admit(self, cost: int) -> AsyncIterator[None]:
+        """
+        Допускает операцию стоимостью cost на время блока.
+
+        Raises:
+            Overloaded: Если очередь заполнена.
+        """
+        cost = max(1, cost)
+        prefix = f"admission_{self.name}"
+        if self.busy and self.queued_cost + cost > self.max_queue_cost:
+            metrics.inc(f"{prefix}_rejected")
+            raise Overloaded(self.name, self.retry_after())
+
+        slots = self._get_slots()
+        self.queued += 1
+        self.queued_cost += cost
+        self._publish()
+        waiting_since = time.monotonic()
+        try:
+            await slots.acquire()
+        finally:
+            self.queued -= 1
+            self.queued_cost -= cost
+        waited = time.monotonic() - waiting_since
+        metrics.inc(f"{prefix}_admitted")
+        metrics.observe(f"{prefix}_wait_s", waited)
+        record_stage("queued", waited)
+
+        self.running += 1
+        self.running_cost += cost
+        self._publish()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            slots.release()
+            self.running -= 1
+            self.running_cost -= cost
+            self._publish()
+            per_cost = (time.monotonic() - started) / cost
+            self.seconds_per_cost = per_cost if self.seconds_per_cost \
+                is None else 0.8 * self.seconds_per_cost + 0.2 * per_cost
+
+
+def parse_limits(text: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Разбирает пределы вида 'report=4:1000000,rolling=1:200000000'.
+
+    Returns:
+        Dict[str, Tuple[int, int]]: Вид операций -> (параллельность,
+            предел стоимости очереди).
+
+    Raises:
+        ValueError: Если строка имеет неверный формат.
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, _, value = item.partition("=")
+        concurrency, _, queue_cost = value.partition(":")
+        try:
+            limits[name.strip()] = (int(concurrency), int(queue_cost))
+        except ValueError:
+            raise ValueError(f"Неверный предел допуска: {item}") from None
+    return limits
+
+
+class AdmissionScheduler:
+    """Очереди допуска по видам операций и оценка их стоимости."""
+
+    def __init__(self, limits: Optional[str] = None):
+        """
+        Args:
+            limits (Optional[str]): Пределы в формате parse_limits.
+                По умолчанию берутся из настроек.
+        """
+        self.queues: Dict[str, AdmissionQueue] = {}
+        for name, (concurrency, queue_cost) in parse_limits(
+                limits or settings.admission_limits).items():
+            self.queues[name] = AdmissionQueue(
+                name, concurrency or settings.compute_workers, queue_cost)
+        # Количество свечей по тикеру и версии свечей
+        self._candles: Dict[str, Tuple[int, int]] = {}
+
+    def queue(self, name: str) -> Optional[AdmissionQueue]:
+        """Возвращает очередь вида операций (None - без ограничений)."""
+        return self.queues.get(name)
+
+    @asynccontextmanager
+    async def admit(self, name: str, cost: int,
+                    progress: Optional[ProgressReporter] = None
+                    ) -> AsyncIterator[None]:
+        """
+        Допускает операцию вида name стоимостью cost на время блока.
+
+        Args:
+            name (str): Вид операций.
+            cost (int): Оценка стоимости операции.
+            progress (Optional[ProgressReporter]): Репортер прогресса,
+                получает этап queued, если операция будет ждать.
+
+        Raises:
+            Overloaded: Если очередь заполнена.
+        """
+        queue = self.queues.get(name)
+        if queue is None:
+            yield
+            return
+        if progress and queue.busy:
+            progress.stage("queued")
+        async with queue.admit(cost):
+            yield
+
+    async def candle_count(self, ticker: str) -> int:
+        """Возвращает количество свечей тикера для оценки стоимости."""
+        ticker = ticker.upper()
+        version = (await data_versions.get(ticker)).candles
+        cached = self._candles.get(ticker)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        async with DatabaseGateway() as gateway:
+            count = await gateway.count_candles(ticker)
+        self._candles[ticker] = (version, count)
+        return count
+
+
+def period_days(start: str, end: str) -> int:
+    """
+    Оценивает количество дневных свечей периода загрузки (календарные
+    дни; 1, если даты не разбираются).
+    """
+    try:
+        days = (date.fromisoformat(end[:10])
+                - date.fromisoformat(start[:10])).days + 1
+    except ValueError:
+        return 1
+    return max(1, days)
+
+
+admission = AdmissionScheduler()
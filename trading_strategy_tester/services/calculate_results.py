@@ -6,18 +6,19 @@
 import logging
 from datetime import datetime
 from typing import Dict, List
-from decimal import Decimal, ROUND_HALF_EVEN, getcontext
+from decimal import Decimal, ROUND_HALF_EVEN, localcontext
 from trading_strategy_tester.api.schemas import StrategyParameters
 from trading_strategy_tester.models.trading_result import TradingResult
 
 logger = logging.getLogger(__name__)
 
-getcontext().prec = 8
-
 
 class CalculateResult:
     """ Класс, для рассчита итогов финансовых результатов стратегии."""
 
+    # Точность контекста Decimal, в котором выполняется расчет итогов
+    DECIMAL_PRECISION = 10
+
     @classmethod
     def round_money(cls, value: Decimal) -> Decimal:
         """Унифицированное округление денежных величин
@@ -64,6 +65,14 @@ class CalculateResult:
             TypeError: Если тип данных не соответствует ожидаемому.
             ZeroDivisionError: Если происходит деление на ноль.
         """
+        with localcontext() as ctx:
+            ctx.prec = self.DECIMAL_PRECISION
+            return self._calculates_results(data, param, transactions)
+
+    def _calculates_results(self, data: List[TradingResult],
+                            param: StrategyParameters,
+                            transactions: List[int]) -> Dict[str, any]:
+        """Рассчитывает итоги в текущем контексте Decimal."""
         results = {}
 
         # Блок обработки дат
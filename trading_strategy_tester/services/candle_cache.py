@@ -0,0 +1,248 @@
+"""
+Содержит кэш свечей.
+
+Загрузка новой истории или вытеснение тикера увеличивает версию
+свечей, поэтому устаревшие свечи не отдаются и перечитываются из БД.
+
+В режиме memory разобранные свечи тикера хранятся колонками
+(CandleSeries) в памяти процесса вместе с версией, на которой они
+загружены; размер кэша ограничен бюджетом памяти, при превышении
+вытесняются ряды, к которым дольше всего не обращались. Версия свечей
+берется из data_versions процесса, поэтому режим рассчитан на один
+процесс.
+
+В режиме shared свечи хранятся в сегментах, общих для всех процессов
+(candle_segments): версия определяется при каждом обращении по сегменту
+с наибольшей версией, поэтому загрузка истории в одном воркере видна
+остальным. Процесс не хранит своей копии свечей: ряд (SegmentSeries)
+читает колонки прямо из отображения сегмента, бюджет памяти кэша не
+используется. При промахе свечи и их версия читаются из БД одним
+снимком, и записывается сегмент этой версии.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import aiosqlite
+
+from trading_strategy_tester.config import settings
+from trading_strategy_tester.models.candle_series import CandleSeries
+from trading_strategy_tester.services.candle_segments import (SegmentStore,
+                                                              segments_dir)
+from trading_strategy_tester.services.database_gateway import DatabaseGateway
+from trading_strategy_tester.services.data_versions import data_versions
+from trading_strategy_tester.services.metrics import metrics
+from trading_strategy_tester.services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+CANDLE_STORES = ("memory", "shared")
+
+
+class CandleCache:
+    """
+    Кэш свечей тикеров: LRU в памяти процесса с бюджетом памяти,
+    в режиме shared - ряды общих сегментов без копии в процессе.
+
+    Одновременные промахи по одному тикеру выполняют одну загрузку.
+    Метрики: candle_cache_hits, candle_cache_misses,
+    candle_cache_evictions, candle_cache_bytes, candle_cache_tickers.
+    """
+
+    def __init__(self, budget_mb: Optional[int] = None,
+                 store: Optional[str] = None):
+        """
+        Args:
+            budget_mb (Optional[int]): Бюджет памяти режима memory в МБ
+                (0 - кэш отключен). По умолчанию берется из настроек.
+            store (Optional[str]): memory или shared. По умолчанию
+                берется из настроек.
+        """
+        if budget_mb is None:
+            budget_mb = settings.candle_cache_mb
+        self.budget = max(0, budget_mb) * 2 ** 20
+        self.store = (store or settings.candle_store).lower()
+        if self.store not in CANDLE_STORES:
+            raise ValueError(f"Неизвестное хранилище свечей: {self.store}")
+        self.size = 0
+        # Тикер -> (версия свечей, ряд)
+        self._series: "OrderedDict[str, Tuple[int, CandleSeries]]" = \
+            OrderedDict()
+        self._segments: Optional[SegmentStore] = None
+        self._loads = SingleFlight("candle_cache_loads")
+        self._loaded_for: Optional[Path] = None
+
+    @property
+    def shared(self) -> bool:
+        """Хранятся ли свечи в общих сегментах."""
+        return self.store == "shared"
+
+    def _check_db(self) -> None:
+        """Сбрасывает кэш, если изменился путь к БД."""
+        db_path = DatabaseGateway._get_db_path()
+        if self._loaded_for != db_path:
+            self.close()
+            if self.shared:
+                self._segments = SegmentStore(segments_dir(db_path))
+            self._loaded_for = db_path
+
+    async def get(self, ticker: str) -> CandleSeries:
+        """
+        Возвращает свечи тикера из кэша или из БД.
+
+        Args:
+            ticker (str): Тикер акции.
+
+        Returns:
+            CandleSeries: Свечи тикера (в режиме shared - SegmentSeries
+                с тем же интерфейсом).
+
+        Raises:
+            ValueError: Если история тикера не загружена.
+        """
+        ticker = ticker.upper()
+        self._check_db()
+        if self.shared:
+            version = self._segments.latest(ticker)
+            if version is not None:
+                data_versions.observe_candles(ticker, version)
+                series = self._segments.series(ticker, version)
+                if series is not None:
+                    metrics.inc("candle_cache_hits")
+                    return series
+            metrics.inc("candle_cache_misses")
+            return await self._loads.run(
+                (ticker, version), lambda: self._load_shared(ticker))
+
+        version = (await data_versions.get(ticker)).candles
+        series = self._cached(ticker, version)
+        if series is not None:
+            metrics.inc("candle_cache_hits")
+            return series
+        metrics.inc("candle_cache_misses")
+        return await self._loads.run(
+            (ticker, version), lambda: self._load(ticker, version))
+
+    def _cached(self, ticker: str,
+                version: int) -> Optional[CandleSeries]:
+        cached = self._series.get(ticker)
+        if cached is None or cached[0] != version:
+            return None
+        self._series.move_to_end(ticker)
+        return cached[1]
+
+    async def _load(self, ticker: str, version: int) -> CandleSeries:
+        async with DatabaseGateway() as gateway:
+            series = await gateway.load_candle_series(ticker)
+        # Версия могла измениться, пока шла загрузка
+        if (await data_versions.get(ticker)).candles == version:
+            self._store(ticker, version, series)
+        return series
+
+    async def _load_shared(self, ticker: str) -> CandleSeries:
+        async with DatabaseGateway() as gateway:
+            version, series = await gateway.load_candle_snapshot(ticker)
+        data_versions.observe_candles(ticker, version)
+        # Сегмент не записывается, если другой процесс уже записал
+        # более новую версию
+        try:
+            await asyncio.to_thread(self._segments.write, ticker, version,
+                                    series)
+        except (OSError, ValueError) as e:
+            # Без сегментов прежних версий процессы прочитают новые
+            # свечи из БД
+            logger.warning("Сегмент свечей %s не записан: %s", ticker, e)
+            self._segments.remove(ticker)
+            return series
+        shared = self._segments.series(ticker, version)
+        return shared if shared is not None else series
+
+    def _store(self, ticker: str, version: int,
+               series: CandleSeries) -> None:
+        self._drop(ticker)
+        if series.nbytes > self.budget:
+            return
+        self._series[ticker] = (version, series)
+        self.size += series.nbytes
+        while self.size > self.budget:
+            _, (_, evicted) = self._series.popitem(last=False)
+            self.size -= evicted.nbytes
+            metrics.inc("candle_cache_evictions")
+        self._publish()
+
+    def _drop(self, ticker: str) -> None:
+        cached = self._series.pop(ticker, None)
+        if cached is not None:
+            self.size -= cached[1].nbytes
+            self._publish()
+
+    def invalidate(self, ticker: str) -> None:
+        """Удаляет свечи тикера из кэша (и его сегменты)."""
+        ticker = ticker.upper()
+        self._check_db()
+        self._drop(ticker)
+        if self._segments is not None:
+            self._segments.remove(ticker)
+
+    async def reload(self, ticker: str) -> None:
+        """
+        Обновляет свечи тикера после загрузки истории: ряд прежней
+        версии удаляется, а в режиме shared сразу записывается сегмент
+        новой версии для всех процессов.
+        """
+        ticker = ticker.upper()
+        self._drop(ticker)
+        if self.shared:
+            self._check_db()
+            await self._loads.run((ticker, "reload"),
+                                  lambda: self._load_shared(ticker))
+
+    def clear(self) -> None:
+        """Очищает кэш в памяти процесса."""
+        self._series.clear()
+        self.size = 0
+        self._publish()
+
+    def close(self) -> None:
+        """Очищает кэш и закрывает отображенные сегменты."""
+        self.clear()
+        if self._segments is not None:
+            self._segments.close()
+
+    async def warm(self, tickers: Iterable[str]) -> List[str]:
+        """
+        Загружает свечи тикеров в кэш.
+
+        Args:
+            tickers (Iterable[str]): Тикеры.
+
+        Returns:
+            List[str]: Загруженные тикеры (тикеры без истории
+                пропускаются).
+        """
+        loaded = []
+        for ticker in tickers:
+            try:
+                await self.get(ticker)
+            except (ValueError, aiosqlite.Error) as e:
+                logger.warning("Свечи %s не загружены в кэш: %s", ticker, e)
+                continue
+            loaded.append(ticker.upper())
+        return loaded
+
+    def _publish(self) -> None:
+        metrics.set_gauge("candle_cache_bytes", self.size)
+        metrics.set_gauge("candle_cache_tickers", len(self._series))
+
+
+def warm_tickers(text: Optional[str] = None) -> List[str]:
+    """Разбирает список тикеров для прогрева вида 'SBER,GAZP'."""
+    text = settings.candle_cache_warm if text is None else text
+    return [ticker.strip().upper() for ticker in text.split(",")
+            if ticker.strip()]
+
+
+candle_cache = CandleCache()
@@ -0,0 +1,438 @@
+"""
+Содержит общие для процессов сегменты свечей.
+
+Сегмент - файл со свечами одной версии тикера рядом с БД
+({db}_segments/{TICKER}.{версия}.seg). Файл записывается один раз
+(при загрузке истории или первом чтении новой версии) и затем
+отображается в память каждым процессом только для чтения. Колонки
+сегмента - числа фиксированной ширины, которые процесс читает прямо из
+отображения (memoryview.cast) без копирования, поэтому страницы
+сегмента разделяются между воркерами uvicorn через кэш страниц ОС,
+а память процессов не растет с их количеством. Объекты Decimal
+и строки дат создаются только на время расчета (SegmentSeries.candles).
+
+Версия в имени файла - версия свечей в БД, прочитанная вместе со
+свечами, поэтому сегмент с наибольшей версией - общая для всех процессов
+отметка актуальных свечей тикера. Сегмент не записывается, если уже есть
+сегмент той же или более новой версии, и удаляет только более старые.
+
+Формат: сигнатура, длина заголовка, заголовок JSON (тикер, версия,
+количество свечей, порядок байтов, смещения и масштабы колонок),
+выравнивание до 8 байт и колонки: цены, оборот и объем - int64,
+умноженные на 10**масштаб колонки (Decimal восстанавливаются без потери
+точности), начало и окончание свечи - int64 секунды от 0001-01-01,
+порядковые номера дат начала - int32.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from contextlib import suppress
+from datetime import date, datetime
+from decimal import Context, Decimal, localcontext
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from trading_strategy_tester.models.candle_series import (PRICE_FIELDS,
+                                                          CandleSeries)
+from trading_strategy_tester.models.date_index import (TAX_DAY_FROM,
+                                                       DateIndex)
+from trading_strategy_tester.models.stock_candle import StockCandle
+
+SEGMENT_MAGIC = b"TSTCSEG2"
+SEGMENT_SUFFIX = ".seg"
+DATE_FIELDS = ("begin", "end")
+# Колонки сегмента и коды их типов (array/memoryview)
+COLUMNS = tuple((name, "q") for name in PRICE_FIELDS + DATE_FIELDS) \
+    + (("ordinal", "i"),)
+
+_HEADER_LENGTH = struct.Struct("<I")
+_DAY_SECONDS = 86400
+# Контекст, в котором восстановление Decimal из int64 всегда точное
+_EXACT = Context(prec=40)
+
+
+def segments_dir(db_path: Path) -> Path:
+    """Возвращает каталог сегментов базы данных."""
+    return db_path.parent / f"{db_path.stem}_segments"
+
+
+def segment_versions(directory: Path, ticker: str) -> Dict[int, Path]:
+    """Возвращает записанные сегменты тикера по версиям."""
+    ticker = ticker.upper()
+    versions = {}
+    for path in directory.glob(f"{ticker}.*{SEGMENT_SUFFIX}"):
+        version = path.name[len(ticker) + 1:-len(SEGMENT_SUFFIX)]
+        if version.isdigit():
+            versions[int(version)] = path
+    return versions
+
+
+def _scaled(values: Sequence[Decimal]) -> Tuple[array, int]:
+    """
+    Переводит значения колонки в целые числа с общим масштабом.
+
+    Returns:
+        Tuple[array, int]: Значения, умноженные на 10**масштаб,
+            и масштаб.
+
+    Raises:
+        ValueError: Если значение не конечно или не помещается в int64.
+    """
+    scale = max((-value.as_tuple().exponent for value in values
+                 if value.is_finite()), default=0)
+    scale = max(0, scale)
+    try:
+        scaled = array("q", (int(value.scaleb(scale)) for value in values))
+    except (ValueError, OverflowError) as e:
+        raise ValueError(f"Значение колонки не помещается в int64: {e}") \
+            from None
+    return scaled, scale
+
+
+def _seconds(values: Sequence[str]) -> array:
+    """
+    Переводит даты 'YYYY-MM-DD HH:MM:SS' в секунды от 0001-01-01.
+
+    Raises:
+        ValueError: Если дата записана в другом виде.
+    """
+    seconds = array("q")
+    for value in values:
+        moment = datetime.fromisoformat(value)
+        if moment.isoformat(sep=" ") != value:
+            raise ValueError(f"Дата свечи в неподдерживаемом виде: {value}")
+        seconds.append(moment.toordinal() * _DAY_SECONDS
+                       + moment.hour * 3600 + moment.minute * 60
+                       + moment.second)
+    return seconds
+
+
+def write_segment(directory: Path, ticker: str, version: int,
+                  series: CandleSeries) -> Path:
+    """
+    Записывает сегмент свечей и удаляет сегменты прежних версий.
+
+    Файл сначала пишется во временный и затем переименовывается,
+    поэтому читатели видят только полностью записанный сегмент. Если
+    другой процесс уже записал сегмент той же или более новой версии,
+    запись пропускается.
+
+    Args:
+        directory (Path): Каталог сегментов.
+        ticker (str): Тикер.
+        version (int): Версия свечей.
+        series (CandleSeries): Свечи.
+
+    Returns:
+        Path: Путь к сегменту наибольшей версии.
+
+    Raises:
+        ValueError: Если свечи нельзя записать колонками фиксированной
+            ширины.
+    """
+    ticker = ticker.upper()
+    existing = segment_versions(directory, ticker)
+    newest = max(existing, default=None)
+    if newest is not None and newest >= version:
+        return existing[newest]
+
+    blobs = {}
+    scales = {}
+    for name in PRICE_FIELDS:
+        blobs[name], scales[name] = _scaled(getattr(series, name))
+    for name in DATE_FIELDS:
+        blobs[name] = _seconds(getattr(series, name))
+    blobs["ordinal"] = array("i", (
+        value // _DAY_SECONDS for value in blobs["begin"]))
+    columns = {}
+    position = 0
+    for name, _ in COLUMNS:
+        columns[name] = [position, scales.get(name, 0)]
+        position += len(blobs[name]) * blobs[name].itemsize
+    header = json.dumps({"ticker": ticker, "version": version,
+                         "count": len(series), "byteorder": sys.byteorder,
+                         "columns": columns}).encode()
+    start = len(SEGMENT_MAGIC) + _HEADER_LENGTH.size + len(header)
+    header += b" " * (-start % 8)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{ticker}.{version}{SEGMENT_SUFFIX}"
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as file:
+            file.write(SEGMENT_MAGIC)
+            file.write(_HEADER_LENGTH.pack(len(header)))
+            file.write(header)
+            for name, _ in COLUMNS:
+                blobs[name].tofile(file)
+        os.replace(tmp_path, path)
+    finally:
+        with suppress(OSError):
+            tmp_path.unlink()
+    remove_segments(directory, ticker, below=version)
+    return path
+
+
+def remove_segments(directory: Path, ticker: str,
+                    below: Optional[int] = None) -> None:
+    """
+    Удаляет сегменты тикера версий ниже below (None - все). Процессы,
+    отобразившие удаленный файл, продолжают читать его до закрытия.
+    """
+    for version, path in segment_versions(directory, ticker).items():
+        if below is None or version < below:
+            with suppress(OSError):
+                path.unlink()
+
+
+class ScaledColumn(Sequence):
+    """
+    Колонка Decimal поверх целых чисел сегмента: значение создается
+    при обращении и не хранится.
+    """
+
+    def __init__(self, values: memoryview, scale: int):
+        """
+        Args:
+            values (memoryview): Значения, умноженные на 10**scale.
+            scale (int): Масштаб колонки.
+        """
+        self._values = values
+        self._unit = Decimal(1).scaleb(-scale) if scale else None
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __getitem__(self, index):
+        values = self._values[index]
+        unit = self._unit
+        if unit is None:
+            if isinstance(index, slice):
+                return list(map(Decimal, values))
+            return Decimal(values)
+        with localcontext(_EXACT):
+            if isinstance(index, slice):
+                return [Decimal(value) * unit for value in values]
+            return Decimal(values) * unit
+
+
+class SegmentSeries:
+    """
+    Свечи сегмента с интерфейсом CandleSeries: колонки читаются
+    из отображения сегмента без копирования.
+
+    Атрибуты:
+        open, close, high, low, value, volume (ScaledColumn): Цены,
+            оборот и объем.
+        ordinals (memoryview): Порядковые номера дат начала свечей.
+        nbytes (int): Размер колонок в сегменте.
+    """
+
+    def __init__(self, columns: Dict[str, memoryview],
+                 scales: Dict[str, int]):
+        for name in PRICE_FIELDS:
+            setattr(self, name, ScaledColumn(columns[name], scales[name]))
+        self._begin = columns["begin"]
+        self._end = columns["end"]
+        self.ordinals = columns["ordinal"]
+        self.nbytes = sum(column.nbytes for column in columns.values())
+
+    @staticmethod
+    def _format(values: memoryview,
+                days: Optional[Dict[int, str]] = None) -> List[str]:
+        """
+        Возвращает даты 'YYYY-MM-DD HH:MM:SS' из секунд.
+
+        Args:
+            values (memoryview): Секунды от 0001-01-01.
+            days (Optional[Dict[int, str]]): Уже отформатированные дни
+                (общие для дат начала и окончания).
+        """
+        days = {} if days is None else days
+        times: Dict[int, str] = {}
+        formatted = []
+        for value in values:
+            ordinal, second = divmod(value, _DAY_SECONDS)
+            day = days.get(ordinal)
+            if day is None:
+                day = days[ordinal] = date.fromordinal(ordinal).isoformat()
+            clock = times.get(second)
+            if clock is None:
+                hours, rest = divmod(second, 3600)
+                clock = times[second] = "%02d:%02d:%02d" % (
+                    hours, *divmod(rest, 60))
+            formatted.append(f"{day} {clock}")
+        return formatted
+
+    @property
+    def begin(self) -> List[str]:
+        """Даты начала свечей."""
+        return self._format(self._begin)
+
+    @property
+    def end(self) -> List[str]:
+        """Даты окончания свечей."""
+        return self._format(self._end)
+
+    @property
+    def dates(self) -> DateIndex:
+        """Индекс дат свечей (создается при каждом обращении)."""
+        parsed = [date.fromordinal(value) for value in self.ordinals]
+        return DateIndex(
+            dates=tuple(d.isoformat() for d in parsed),
+            ordinals=tuple(self.ordinals),
+            year=tuple(d.year for d in parsed),
+            month=tuple(d.month for d in parsed),
+            tax_day=tuple(d.month == 12 and d.day >= TAX_DAY_FROM
+                          for d in parsed),
+        )
+
+    def candles(self) -> List[StockCandle]:
+        """Возвращает новые объекты свечей ряда."""
+        days: Dict[int, str] = {}
+        return list(map(StockCandle, *(
+            getattr(self, name)[:] for name in PRICE_FIELDS),
+            self._format(self._begin, days), self._format(self._end, days)))
+
+    def __len__(self) -> int:
+        return len(self.ordinals)
+
+
+class CandleSegment:
+    """
+    Сегмент свечей, отображенный в память только для чтения.
+
+    Атрибуты:
+        ticker (str): Тикер.
+        version (int): Версия свечей.
+        count (int): Количество свечей.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path (Path): Путь к сегменту.
+
+        Raises:
+            ValueError: Если файл не является сегментом свечей.
+        """
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if self._map[:len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+                raise ValueError(f"Файл {path} не является сегментом свечей")
+            start = len(SEGMENT_MAGIC)
+            (length,) = _HEADER_LENGTH.unpack_from(self._map, start)
+            start += _HEADER_LENGTH.size
+            header = json.loads(self._map[start:start + length])
+            if header["byteorder"] != sys.byteorder:
+                raise ValueError(f"Сегмент {path} записан с другим "
+                                 f"порядком байтов")
+            self.ticker: str = header["ticker"]
+            self.version: int = header["version"]
+            self.count: int = header["count"]
+            self._series = self._read(start + length, header["columns"])
+        except (ValueError, KeyError, TypeError, struct.error):
+            self.close()
+            raise
+
+    def _read(self, data_start: int,
+              columns: Dict[str, list]) -> SegmentSeries:
+        """Создает представления колонок поверх отображения."""
+        data = memoryview(self._map)
+        views = {}
+        for name, code in COLUMNS:
+            offset = data_start + columns[name][0]
+            size = self.count * array(code).itemsize
+            if offset + size > len(data):
+                raise ValueError("Сегмент свечей обрезан")
+            views[name] = data[offset:offset + size].cast(code)
+        return SegmentSeries(views, {name: columns[name][1]
+                                     for name in PRICE_FIELDS})
+
+    def series(self) -> SegmentSeries:
+        """Возвращает свечи сегмента (без копирования)."""
+        return self._series
+
+    def close(self) -> None:
+        """
+        Закрывает отображение файла. Если ряд сегмента еще используется,
+        отображение закроется, когда на него не останется ссылок.
+        """
+        self.__dict__.pop("_series", None)
+        with suppress(BufferError):
+            self._map.close()
+
+
+class SegmentStore:
+    """
+    Сегменты свечей базы данных, открытые процессом.
+
+    У тикера открыт сегмент последней запрошенной версии; при запросе
+    другой версии прежнее отображение закрывается.
+    """
+
+    def __init__(self, directory: Path):
+        """
+        Args:
+            directory (Path): Каталог сегментов.
+        """
+        self.directory = directory
+        self._segments: Dict[str, CandleSegment] = {}
+        self._lock = threading.Lock()
+
+    def latest(self, ticker: str) -> Optional[int]:
+        """Возвращает наибольшую записанную версию сегмента тикера."""
+        return max(segment_versions(self.directory, ticker), default=None)
+
+    def open(self, ticker: str, version: int) -> Optional[CandleSegment]:
+        """
+        Возвращает сегмент версии version тикера (None, если его еще
+        не записали).
+        """
+        ticker = ticker.upper()
+        with self._lock:
+            segment = self._segments.get(ticker)
+            if segment is not None and segment.version == version:
+                return segment
+            path = self.directory / f"{ticker}.{version}{SEGMENT_SUFFIX}"
+            try:
+                opened = CandleSegment(path)
+            except (OSError, ValueError):
+                return None
+            if segment is not None:
+                segment.close()
+            self._segments[ticker] = opened
+            return opened
+
+    def series(self, ticker: str,
+               version: int) -> Optional[SegmentSeries]:
+        """Возвращает свечи сегмента версии version (None, если его нет)."""
+        segment = self.open(ticker, version)
+        return segment.series() if segment is not None else None
+
+    def write(self, ticker: str, version: int,
+              series: CandleSeries) -> Path:
+        """Записывает сегмент версии version тикера."""
+        return write_segment(self.directory, ticker, version, series)
+
+    def remove(self, ticker: str) -> None:
+        """Закрывает и удаляет сегменты тикера."""
+        ticker = ticker.upper()
+        with self._lock:
+            segment = self._segments.pop(ticker, None)
+            if segment is not None:
+                segment.close()
+        remove_segments(self.directory, ticker)
+
+    def close(self) -> None:
+        """Закрывает все отображения."""
+        with self._lock:
+            for segment in self._segments.values():
+                segment.close()
+            self._segments.clear()
@@ -0,0 +1,385 @@
+"""
+Содержит источники свечей MOEX: живой запрос через moexalgo,
+HTTP-запрос к ISS, запись ответов на диск и воспроизведение записей.
+"""
+
+import json
+import logging
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+from pathlib import Path
+from typing import (TYPE_CHECKING, Any, Dict, Iterator, List, Optional,
+                    Tuple)
+
+from trading_strategy_tester.config import settings
+
+if TYPE_CHECKING:  # pandas загружается при первом использовании
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Порядок колонок свечей, как в ответе ISS
+CANDLE_COLUMNS = ["open", "close", "high", "low", "value", "volume",
+                  "begin", "end"]
+
+# Соответствие периодов moexalgo интервалам ISS
+ISS_INTERVALS = {"1min": 1, "10min": 10, "1h": 60, "1d": 24, "1w": 7,
+                 "1m": 31}
+
+# Максимальное количество свечей в одной странице ответа ISS
+ISS_PAGE_SIZE = 500
+
+# Длина окна запроса moexalgo в календарных днях по периоду свечи:
+# в окне порядка нескольких сотен свечей, поэтому в памяти находится
+# только одно окно, а не весь период загрузки
+MOEXALGO_WINDOW_DAYS = {"1min": 1, "10min": 7, "1h": 60, "1d": 365,
+                        "1w": 3650, "1m": 36500}
+
+
+def frame_to_iss(df: "pd.DataFrame") -> Dict[str, Any]:
+    """
+    Преобразует DataFrame свечей в формат ответа ISS.
+
+    Args:
+        df (pd.DataFrame): DataFrame с колонками CANDLE_COLUMNS.
+
+    Returns:
+        Dict[str, Any]: Словарь вида {"candles": {"columns", "data"}}.
+    """
+    import pandas as pd
+
+    data = []
+    if not df.empty:
+        frame = df[CANDLE_COLUMNS].copy()
+        for column in ("begin", "end"):
+            frame[column] = pd.to_datetime(frame[column]).dt.strftime(
+                "%Y-%m-%d %H:%M:%S")
+        data = frame.values.tolist()
+    return {"candles": {"columns": CANDLE_COLUMNS, "data": data}}
+
+
+def iss_to_frame(payload: Dict[str, Any]) -> "pd.DataFrame":
+    """
+    Преобразует ответ ISS в DataFrame свечей.
+
+    Args:
+        payload (Dict[str, Any]): Ответ ISS с блоком "candles".
+
+    Returns:
+        pd.DataFrame: DataFrame с колонками CANDLE_COLUMNS.
+    """
+    import pandas as pd
+
+    block = payload["candles"]
+    df = pd.DataFrame(block["data"], columns=block["columns"])
+    if df.empty:
+        return pd.DataFrame()
+    df = df[CANDLE_COLUMNS]
+    df["begin"] = pd.to_datetime(df["begin"])
+    df["end"] = pd.to_datetime(df["end"])
+    return df
+
+
+def iss_rows(block: Dict[str, Any]) -> List[list]:
+    """
+    Возвращает строки блока "candles" ответа ISS в порядке колонок
+    CANDLE_COLUMNS.
+    """
+    columns = block["columns"]
+    if list(columns) == CANDLE_COLUMNS:
+        return block["data"]
+    indexes = [columns.index(name) for name in CANDLE_COLUMNS]
+    return [[row[i] for i in indexes] for row in block["data"]]
+
+
+def date_windows(start: str, end: str,
+                 days: int) -> Iterator[Tuple[str, str]]:
+    """
+    Делит период [start, end] на последовательные окна не длиннее days
+    календарных дней (границы включительно, формат 'YYYY-MM-DD').
+    Если даты не разбираются, возвращает весь период одним окном.
+    """
+    try:
+        first = date.fromisoformat(start[:10])
+        last = date.fromisoformat(end[:10])
+    except ValueError:
+        yield start, end
+        return
+    while first <= last:
+        window_end = min(last, first + timedelta(days=days - 1))
+        yield first.isoformat(), window_end.isoformat()
+        first = window_end + timedelta(days=1)
+
+
+class CandleSource(ABC):
+    """Базовый класс источника свечей."""
+
+    @abstractmethod
+    def fetch(self, ticker: str, start: str, end: str,
+              period: str = "1d") -> "pd.DataFrame":
+        """
+        Возвращает свечи по акции за период.
+
+        Args:
+            ticker (str): Тикер акции.
+            start (str): Начальная дата.
+            end (str): Конечная дата.
+            period (str): Период свечи в формате moexalgo.
+
+        Returns:
+            pd.DataFrame: DataFrame со свечами.
+        """
+
+    def iter_pages(self, ticker: str, start: str, end: str,
+                   period: str = "1d") -> Iterator[List[list]]:
+        """
+        Возвращает свечи по акции за период страницами строк ISS
+        (колонки CANDLE_COLUMNS, даты строками).
+
+        По умолчанию ответ запрашивается целиком и делится на страницы;
+        источники, которые получают свечи постранично, отдают страницы
+        по мере получения.
+
+        Yields:
+            List[list]: Строки очередной страницы.
+        """
+        data = frame_to_iss(self.fetch(ticker, start, end, period))[
+            "candles"]["data"]
+        for offset in range(0, len(data), ISS_PAGE_SIZE):
+            yield data[offset:offset + ISS_PAGE_SIZE]
+
+
+class MoexAlgoSource(CandleSource):
+    """Живой источник свечей через библиотеку moexalgo."""
+
+    def fetch(self, ticker: str, start: str, end: str,
+              period: str = "1d") -> "pd.DataFrame":
+        from moexalgo import Ticker
+
+        return Ticker(ticker).candles(start=start, end=end, period=period)
+
+    def iter_pages(self, ticker: str, start: str, end: str,
+                   period: str = "1d") -> Iterator[List[list]]:
+        """
+        Запрашивает свечи окнами дат (MOEXALGO_WINDOW_DAYS) и отдает
+        страницы каждого окна по мере получения. Свечи с датой начала
+        не позже уже отданных (пересечение окон) пропускаются.
+        """
+        begin_index = CANDLE_COLUMNS.index("begin")
+        last_begin = None
+        for window_start, window_end in date_windows(
+                start, end, MOEXALGO_WINDOW_DAYS.get(period, 365)):
+            data = frame_to_iss(self.fetch(
+                ticker, window_start, window_end, period))[
+                "candles"]["data"]
+            if last_begin is not None:
+                data = [row for row in data if row[begin_index] > last_begin]
+            if not data:
+                continue
+            last_begin = data[-1][begin_index]
+            for offset in range(0, len(data), ISS_PAGE_SIZE):
+                yield data[offset:offset + ISS_PAGE_SIZE]
+
+
+class IssHttpSource(CandleSource):
+    """
+    Источник свечей, обращающийся к эндпоинту свечей ISS по HTTP.
+
+    Позволяет указать базовый адрес локальной заглушки вместо биржи.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, timeout: float = 30):
+        """
+        Args:
+            base_url (Optional[str]): Базовый адрес ISS.
+            timeout (float): Таймаут запроса в секундах.
+        """
+        self.base_url = (base_url or settings.iss_base_url).rstrip("/")
+        self.timeout = timeout
+
+    def fetch_page(self, ticker: str, start: str, end: str,
+                   period: str = "1d", offset: int = 0) -> Dict[str, Any]:
+        """
+        Запрашивает одну страницу свечей ISS.
+
+        Args:
+            offset (int): Смещение первой свечи страницы.
+
+        Returns:
+            Dict[str, Any]: Необработанный ответ ISS.
+        """
+        import requests
+
+        url = (f"{self.base_url}/iss/engines/stock/markets/shares/"
+               f"securities/{ticker.upper()}/candles.json")
+        response = requests.get(url, timeout=self.timeout, params={
+            "from": start,
+            "till": end,
+            "interval": ISS_INTERVALS[period],
+            "start": offset,
+            "iss.meta": "off",
+        })
+        response.raise_for_status()
+        return response.json()
+
+    def fetch(self, ticker: str, start: str, end: str,
+              period: str = "1d") -> "pd.DataFrame":
+        data: List[list] = []
+        for rows in self.iter_pages(ticker, start, end, period):
+            data.extend(rows)
+        return iss_to_frame({"candles": {"columns": CANDLE_COLUMNS,
+                                         "data": data}})
+
+    def iter_pages(self, ticker: str, start: str, end: str,
+                   period: str = "1d") -> Iterator[List[list]]:
+        offset = 0
+        while True:
+            page = self.fetch_page(ticker, start, end, period, offset)
+            rows = iss_rows(page["candles"])
+            if rows:
+                yield rows
+            offset += len(rows)
+            if len(rows) < ISS_PAGE_SIZE:
+                break
+
+
+class RecordingStore:
+    """
+    Хранилище записанных ответов MOEX на диске.
+
+    Каждый запрос хранится в отдельном JSON-файле в формате ответа ISS:
+    {root}/{TICKER}/{period}_{start}_{end}.json
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        """
+        Args:
+            root (Optional[Path]): Каталог записей.
+        """
+        self.root = Path(root or settings.recordings_dir)
+
+    def path_for(self, ticker: str, start: str, end: str,
+                 period: str = "1d") -> Path:
+        """Возвращает путь к файлу записи запроса."""
+        return self.root / ticker.upper() / f"{period}_{start}_{end}.json"
+
+    def save(self, ticker: str, start: str, end: str, period: str,
+             df: "pd.DataFrame") -> Path:
+        """Записывает ответ на диск и возвращает путь к файлу."""
+        return self.save_payload(ticker, start, end, period,
+                                 frame_to_iss(df))
+
+    def save_payload(self, ticker: str, start: str, end: str, period: str,
+                     payload: Dict[str, Any]) -> Path:
+        """Записывает ответ в формате ISS и возвращает путь к файлу."""
+        path = self.path_for(ticker, start, end, period)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(payload), encoding="utf-8")
+        tmp_path.replace(path)
+        logger.info("Ответ MOEX записан в %s", path)
+        return path
+
+    def load(self, ticker: str, start: str, end: str,
+             period: str = "1d") -> Dict[str, Any]:
+        """
+        Читает записанный ответ.
+
+        Raises:
+            LookupError: Если запись отсутствует.
+        """
+        path = self.path_for(ticker, start, end, period)
+        if not path.exists():
+            raise LookupError(f"Нет записи ответа MOEX: {path}")
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def load_ticker(self, ticker: str, period: str = "1d") -> List[list]:
+        """
+        Возвращает все записанные свечи тикера без повторов,
+        отсортированные по дате начала.
+        """
+        rows = {}
+        for path in sorted((self.root / ticker.upper()).glob(
+                f"{period}_*.json")):
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            for row in payload["candles"]["data"]:
+                rows[row[CANDLE_COLUMNS.index("begin")]] = row
+        return [rows[key] for key in sorted(rows)]
+
+
+class RecordingSource(CandleSource):
+    """Источник, который сохраняет ответы другого источника на диск."""
+
+    def __init__(self, inner: CandleSource,
+                 store: Optional[RecordingStore] = None):
+        """
+        Args:
+            inner (CandleSource): Источник, ответы которого записываются.
+            store (Optional[RecordingStore]): Хранилище записей.
+        """
+        self.inner = inner
+        self.store = store or RecordingStore()
+
+    def fetch(self, ticker: str, start: str, end: str,
+              period: str = "1d") -> "pd.DataFrame":
+        df = self.inner.fetch(ticker, start, end, period)
+        self.store.save(ticker, start, end, period, df)
+        return df
+
+    def iter_pages(self, ticker: str, start: str, end: str,
+                   period: str = "1d") -> Iterator[List[list]]:
+        # Запись сохраняется после последней страницы: неполный ответ
+        # не должен попасть в хранилище
+        data: List[list] = []
+        for rows in self.inner.iter_pages(ticker, start, end, period):
+            data.extend(rows)
+            yield rows
+        self.store.save_payload(ticker, start, end, period, {
+            "candles": {"columns": CANDLE_COLUMNS, "data": data}})
+
+
+class ReplaySource(CandleSource):
+    """Источник, который отдает только ранее записанные ответы."""
+
+    def __init__(self, store: Optional[RecordingStore] = None):
+        """
+        Args:
+            store (Optional[RecordingStore]): Хранилище записей.
+        """
+        self.store = store or RecordingStore()
+
+    def fetch(self, ticker: str, start: str, end: str,
+              period: str = "1d") -> "pd.DataFrame":
+        return iss_to_frame(self.store.load(ticker, start, end, period))
+
+    def iter_pages(self, ticker: str, start: str, end: str,
+                   period: str = "1d") -> Iterator[List[list]]:
+        data = iss_rows(self.store.load(ticker, start, end, period)[
+            "candles"])
+        for offset in range(0, len(data), ISS_PAGE_SIZE):
+            yield data[offset:offset + ISS_PAGE_SIZE]
+
+
+def create_candle_source(mode: Optional[str] = None) -> CandleSource:
+    """
+    Создает источник свечей по режиму из настроек.
+
+    Args:
+        mode (Optional[str]): live, iss, record или replay.
+
+    Returns:
+        CandleSource: Источник свечей.
+
+    Raises:
+        ValueError: Если режим неизвестен.
+    """
+    mode = (mode or settings.candle_source).lower()
+    if mode == "live":
+        return MoexAlgoSource()
+    if mode == "iss":
+        return IssHttpSource()
+    if mode == "record":
+        return RecordingSource(MoexAlgoSource())
+    if mode == "replay":
+        return ReplaySource()
+    raise ValueError(f"Неизвестный источник свечей: {mode}")
@@ -0,0 +1,243 @@
+"""
+Содержит подготовку данных для графиков результатов стратегии:
+прореживание рядов капитала, кэша и позиции до ширины графика
+алгоритмом LTTB или корзинами min/max и кэш многоуровневого
+прореживания для каждого запуска.
+"""
+
+import asyncio
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from trading_strategy_tester.services.database_gateway import DatabaseGateway
+from trading_strategy_tester.services.data_versions import data_versions
+
+CHART_METHODS = ("lttb", "minmax")
+
+# Наименьший заранее рассчитанный уровень прореживания
+MIN_LEVEL_POINTS = 256
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float],
+         threshold: int) -> List[int]:
+    """
+    Прореживает ряд алгоритмом Largest-Triangle-Three-Buckets.
+
+    Args:
+        xs: Координаты X (возрастающие).
+        ys: Значения ряда.
+        threshold: Количество точек результата.
+
+    Returns:
+        List[int]: Индексы выбранных точек, первая и последняя
+            точки сохраняются.
+    """
+    size = len(xs)
+    if threshold >= size or threshold < 3:
+        return list(range(size))
+
+    selected = [0]
+    bucket = (size - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Среднее следующей корзины - третья вершина треугольника
+        next_start = int((i + 1) * bucket) + 1
+        next_end = min(int((i + 2) * bucket) + 1, size)
+        count = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / count
+        avg_y = sum(ys[next_start:next_end]) / count
+
+        start = int(i * bucket) + 1
+        end = int((i + 1) * bucket) + 1
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay)
+                       - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(size - 1)
+    return selected
+
+
+def minmax_buckets(ys: Sequence[float], threshold: int) -> List[int]:
+    """
+    Прореживает ряд корзинами: из каждой корзины берутся точки минимума
+    и максимума в порядке следования, первая и последняя точки
+    сохраняются.
+
+    Returns:
+        List[int]: Индексы выбранных точек.
+    """
+    size = len(ys)
+    if threshold >= size or threshold < 4:
+        return list(range(size))
+
+    buckets = (threshold - 2) // 2
+    selected = {0, size - 1}
+    for i in range(buckets):
+        start = i * size // buckets
+        end = (i + 1) * size // buckets
+        selected.add(min(range(start, end), key=ys.__getitem__))
+        selected.add(max(range(start, end), key=ys.__getitem__))
+    return sorted(selected)
+
+
+@dataclass
+class ChartSeries:
+    """
+    Ряды результатов стратегии для графиков.
+
+    Атрибуты:
+        dates (List[str]): Даты в формате 'YYYY-MM-DD'.
+        equity (List[float]): Общий результат (капитал).
+        cash (List[float]): Кэш.
+        position_value (List[float]): Стоимость акций.
+        shares (List[int]): Количество акций.
+    """
+    dates: List[str] = field(default_factory=list)
+    equity: List[float] = field(default_factory=list)
+    cash: List[float] = field(default_factory=list)
+    position_value: List[float] = field(default_factory=list)
+    shares: List[int] = field(default_factory=list)
+
+    @classmethod
+    def from_results(cls, results: List[dict]) -> "ChartSeries":
+        """Создает ряды из строк таблицы {ticker}_results."""
+        return cls(
+            dates=[row["date_str"] for row in results],
+            equity=[float(row["overall_result"]) for row in results],
+            cash=[float(row["cache"]) for row in results],
+            position_value=[float(row["amount_in_shares"])
+                            for row in results],
+            shares=[int(row["share_count"]) for row in results],
+        )
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def take(self, indexes: Sequence[int]) -> "ChartSeries":
+        """Возвращает выровненные ряды из точек с заданными индексами."""
+        return ChartSeries(
+            dates=[self.dates[i] for i in indexes],
+            equity=[self.equity[i] for i in indexes],
+            cash=[self.cash[i] for i in indexes],
+            position_value=[self.position_value[i] for i in indexes],
+            shares=[self.shares[i] for i in indexes],
+        )
+
+    def bounds(self, start: Optional[str], end: Optional[str]
+               ) -> Tuple[int, int]:
+        """Возвращает границы индексов периода дат включительно."""
+        lo = bisect_left(self.dates, start) if start else 0
+        hi = bisect_right(self.dates, end) if end else len(self.dates)
+        return lo, hi
+
+    def slice(self, start: Optional[str], end: Optional[str]
+              ) -> "ChartSeries":
+        """Возвращает ряды за период дат включительно."""
+        return self.take(range(*self.bounds(start, end)))
+
+    def downsample(self, width: int, method: str = "lttb"
+                   ) -> "ChartSeries":
+        """
+        Прореживает ряды до width точек по форме ряда капитала;
+        остальные ряды берутся в тех же точках.
+        """
+        if method == "minmax":
+            indexes = minmax_buckets(self.equity, width)
+        else:
+            indexes = lttb(range(len(self)), self.equity, width)
+        return self.take(indexes)
+
+
+class ChartLevels:
+    """
+    Многоуровневое прореживание рядов одного запуска: полный ряд
+    и уровни, каждый вдвое меньше предыдущего, до MIN_LEVEL_POINTS.
+    Запрос обслуживается с самого грубого уровня, в котором на
+    запрошенный период приходится не меньше точек, чем ширина графика.
+    """
+
+    def __init__(self, series: ChartSeries, method: str):
+        self.method = method
+        self.total = len(series)
+        self.levels: List[ChartSeries] = [series]
+        points = len(series) // 2
+        while points >= MIN_LEVEL_POINTS:
+            self.levels.append(series.downsample(points, method))
+            points //= 2
+
+    def query(self, width: int, start: Optional[str] = None,
+              end: Optional[str] = None) -> ChartSeries:
+        """Возвращает ряды периода, прореженные до ширины графика."""
+        chosen = self.levels[0]
+        for level in reversed(self.levels[1:]):
+            lo, hi = level.bounds(start, end)
+            if hi - lo >= width:
+                chosen = level
+                break
+        return chosen.slice(start, end).downsample(width, self.method)
+
+
+class ChartCache:
+    """Кэш уровней прореживания по тикеру, запуску и алгоритму (LRU)."""
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str], ChartLevels]" = \
+            OrderedDict()
+        self._locks: Dict[Tuple[str, str, str], asyncio.Lock] = {}
+
+    async def levels(self, ticker: str, method: str
+                     ) -> Tuple[Optional[ChartLevels], Optional[str]]:
+        """
+        Возвращает уровни прореживания текущих результатов тикера
+        и тег запуска, которым они получены.
+
+        Returns:
+            Tuple[Optional[ChartLevels], Optional[str]]: Уровни (None,
+                если результатов нет) и тег запуска.
+        """
+        ticker = ticker.upper()
+        tag = (await data_versions.get(ticker)).results
+        if tag is None:
+            # Результаты без тега запуска не кэшируются
+            return await self._build(ticker, method), None
+
+        key = (ticker, tag, method)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key], tag
+
+        # Одновременные запросы одного запуска строят уровни один раз
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            levels = self._entries.get(key)
+            if levels is None:
+                levels = await self._build(ticker, method)
+                if levels is not None:
+                    self._entries[key] = levels
+                    if len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+        self._locks.pop(key, None)
+        return levels, tag
+
+    @staticmethod
+    async def _build(ticker: str, method: str) -> Optional[ChartLevels]:
+        async with DatabaseGateway() as gateway:
+            if not await gateway.table_exists(f"{ticker.lower()}_results"):
+                return None
+            results = await gateway.load_strategy_results(ticker)
+        if not results:
+            return None
+        series = ChartSeries.from_results(results)
+        # Расчет уровней - синхронная работа процессора, вне цикла событий
+        return await asyncio.to_thread(ChartLevels, series, method)
+
+
+chart_cache = ChartCache()
@@ -0,0 +1,164 @@
+"""
+Содержит пул для CPU-емких расчетов, выполняемых вне цикла событий.
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import (Executor, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from typing import Any, Callable, Optional
+
+from trading_strategy_tester.config import settings
+from trading_strategy_tester.services.progress import (ProgressReporter,
+                                                       progress_hub)
+
+logger = logging.getLogger(__name__)
+
+
+class QueueSink:
+    """Получатель событий прогресса, пересылающий их через очередь
+    из рабочего процесса в основной."""
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def __call__(self, event):
+        self.queue.put(event)
+
+
+class ComputePool:
+    """
+    Пул для расчетов стратегий.
+
+    В режиме process расчеты выполняются в пуле процессов и используют
+    все ядра. В режиме thread - в пуле потоков. В обоих режимах точность
+    Decimal задается локальным контекстом внутри самого расчета, поэтому
+    параллельные расчеты не влияют друг на друга.
+
+    Одновременно в пул передается не больше max_pending задач, остальные
+    ожидают в цикле событий, не занимая память исполнителя.
+    """
+
+    def __init__(self, mode: Optional[str] = None,
+                 workers: Optional[int] = None,
+                 max_pending: Optional[int] = None):
+        """
+        Args:
+            mode (Optional[str]): process или thread.
+            workers (Optional[int]): Количество процессов/потоков.
+            max_pending (Optional[int]): Предел задач, переданных в пул.
+        """
+        self.mode = (mode or settings.compute_mode).lower()
+        if self.mode not in ("process", "thread"):
+            raise ValueError(f"Неизвестный режим пула расчетов: {self.mode}")
+        self.workers = max(1, workers or settings.compute_workers)
+        self.max_pending = max(1, max_pending or settings.compute_max_pending)
+        self.waiting = 0
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._manager = None
+        self._progress_queue = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.mode == "process":
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"))
+                else:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix="compute")
+                logger.info("Пул расчетов запущен: %s x %s",
+                            self.mode, self.workers)
+            return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._slots_loop = loop
+        return self._slots
+
+    def _remote_progress(self, progress: ProgressReporter
+                         ) -> ProgressReporter:
+        """
+        Возвращает репортер, который можно передать в рабочий процесс.
+        События пересылаются через очередь менеджера и публикуются
+        в progress_hub фоновым потоком основного процесса.
+        """
+        with self._lock:
+            if self._progress_queue is None:
+                self._manager = multiprocessing.get_context(
+                    "spawn").Manager()
+                self._progress_queue = self._manager.Queue()
+                threading.Thread(target=self._forward_progress,
+                                 name="progress-forwarder",
+                                 daemon=True).start()
+        remote = ProgressReporter(progress.task_id,
+                                  QueueSink(self._progress_queue),
+                                  progress.min_interval)
+        remote.stage_name = progress.stage_name
+        return remote
+
+    def _forward_progress(self) -> None:
+        queue = self._progress_queue
+        while True:
+            try:
+                event = queue.get()
+            except (EOFError, OSError):
+                return
+            if event is None:
+                return
+            progress_hub.publish(event)
+
+    async def run(self, func: Callable[..., Any], *args: Any,
+                  progress: Optional[ProgressReporter] = None,
+                  **kwargs: Any) -> Any:
+        """
+        Выполняет func(*args, progress=progress, **kwargs) в пуле.
+
+        Args:
+            func (Callable): Функция уровня модуля или статический метод
+                (в режиме process должна сериализоваться pickle).
+            progress (Optional[ProgressReporter]): Репортер прогресса.
+
+        Returns:
+            Any: Результат функции.
+        """
+        if progress is not None and self.mode == "process":
+            progress = self._remote_progress(progress)
+        call = functools.partial(func, *args, progress=progress, **kwargs)
+
+        slots = self._get_slots()
+        self.waiting += 1
+        try:
+            await slots.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), call)
+        finally:
+            slots.release()
+
+    def shutdown(self) -> None:
+        """Останавливает пул и пересылку прогресса."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+            if self._progress_queue is not None:
+                self._progress_queue.put(None)
+                self._manager.shutdown()
+                self._progress_queue = None
+                self._manager = None
+
+
+compute_pool = ComputePool()
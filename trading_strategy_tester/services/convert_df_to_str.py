@@ -3,13 +3,15 @@
 список объектов StockCandle с str значениями.
 """
 
-from typing import List
-import pandas as pd
+from typing import TYPE_CHECKING, List
 
 from trading_strategy_tester.models.stock_candle import StockCandle
 
+if TYPE_CHECKING:  # pandas загружается при первом использовании
+    import pandas as pd
 
-def converts_to_str(df: pd.DataFrame) -> List[StockCandle]:
+
+def converts_to_str(df: "pd.DataFrame") -> List[StockCandle]:
     """
     Преобразует DataFrame в список объектов StockCandle с str значениями.
 
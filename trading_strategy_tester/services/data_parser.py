@@ -2,10 +2,14 @@
 исторических данных. """
 
 import logging
-from moexalgo import Ticker
-import pandas as pd
+from typing import TYPE_CHECKING, Iterator, List, Optional
 
 from trading_strategy_tester.api.schemas import RequestParameters
+from trading_strategy_tester.services.candle_sources import (
+    CandleSource, create_candle_source)
+
+if TYPE_CHECKING:  # pandas загружается при первом использовании
+    import pandas as pd
 
 logger = logging.getLogger(__name__)
 
@@ -14,14 +18,18 @@ class DataframeParser:
     """ Класс для обработки запроса и получения
     датафрейм от MOEX. """
 
-    def __init__(self, parameters: RequestParameters):
+    def __init__(self, parameters: RequestParameters,
+                 source: Optional[CandleSource] = None):
         """ Инициализация класса DataParser.
         Args:
             parameters (RequestParameters): Параметры запроса.
+            source (Optional[CandleSource]): Источник свечей. По умолчанию
+                выбирается по настройке TST_CANDLE_SOURCE.
         """
         self.parameters = parameters
+        self.source = source or create_candle_source()
 
-    def fetch_data(self) -> pd.DataFrame:
+    def fetch_data(self) -> "pd.DataFrame":
         """
         Получает данные по акции за указанный период.
 
@@ -29,20 +37,43 @@ class DataframeParser:
             pd.DataFrame: DataFrame с данными по акции.
         """
         try:
-            # Объект класса Ticker
-            ticker = Ticker(self.parameters.ticker)
-
             # Свечи по акции за период
-            df = ticker.candles(start=self.parameters.start,
-                                end=self.parameters.end, period='1d')
+            df = self.source.fetch(self.parameters.ticker,
+                                   self.parameters.start,
+                                   self.parameters.end, period='1d')
 
             # Проверка, что данные получены
             if df.empty:
                 logger.warning("Нет данных за указанный период.")
-                return pd.DataFrame()
+                return df
             logger.info("Запрошенный датафрейм получен.")
             return df
 
         except Exception as e:
             logger.error("Ошибка при получении данных: %s", e)
             raise
+
+    def iter_pages(self) -> Iterator[List[list]]:
+        """
+        Получает данные по акции за указанный период страницами
+        строк ISS по мере их поступления от источника.
+
+        Yields:
+            List[list]: Строки очередной страницы.
+        """
+        try:
+            rows = 0
+            for page in self.source.iter_pages(self.parameters.ticker,
+                                               self.parameters.start,
+                                               self.parameters.end,
+                                               period='1d'):
+                rows += len(page)
+                yield page
+            if not rows:
+                logger.warning("Нет данных за указанный период.")
+            else:
+                logger.info("Запрошенные свечи получены: %s.", rows)
+
+        except Exception as e:
+            logger.error("Ошибка при получении данных: %s", e)
+            raise
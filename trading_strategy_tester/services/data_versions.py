@@ -0,0 +1,123 @@
+"""
+Содержит реестр версий данных тикеров.
+
+Версия свечей увеличивается при каждой загрузке истории, тег результатов
+указывает, каким запуском стратегии заполнена таблица {ticker}_results.
+Версии хранятся в БД и кэшируются в памяти процесса, поэтому проверка
+актуальности (ETag) не требует обращений к БД.
+"""
+
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from trading_strategy_tester.api.schemas import StrategyParameters
+from trading_strategy_tester.services.database_gateway import DatabaseGateway
+
+
+@dataclass
+class TickerVersion:
+    """
+    Версия данных тикера.
+
+    Атрибуты:
+        candles (int): Версия свечей.
+        results (Optional[str]): Тег запуска, результаты которого лежат
+            в {ticker}_results.
+    """
+    candles: int = 0
+    results: Optional[str] = None
+
+
+def run_tag(param: StrategyParameters, candles_version: int) -> str:
+    """
+    Возвращает тег запуска стратегии: хэш тикера, параметров и версии
+    свечей. Одинаковые запуски на одних данных дают одинаковый тег.
+    """
+    parts = [
+        param.ticker.upper(),
+        *(str(value.normalize()) for value in (
+            param.initial_cache, param.buy_price, param.sell_price,
+            param.commission_rate, param.tax_rate)),
+        str(candles_version),
+    ]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()[:32]
+
+
+class DataVersions:
+    """Кэш версий данных тикеров в памяти процесса."""
+
+    def __init__(self):
+        self._versions: Dict[str, TickerVersion] = {}
+        self._loaded_for: Optional[Path] = None
+        self._lock = asyncio.Lock()
+
+    async def _ensure_loaded(self) -> None:
+        db_path = DatabaseGateway._get_db_path()
+        if self._loaded_for == db_path:
+            return
+        async with self._lock:
+            if self._loaded_for == db_path:
+                return
+            async with DatabaseGateway() as gateway:
+                rows = await gateway.load_data_versions()
+            self._versions = {ticker: TickerVersion(*row)
+                              for ticker, row in rows.items()}
+            self._loaded_for = db_path
+
+    async def get(self, ticker: str) -> TickerVersion:
+        """Возвращает версию данных тикера."""
+        await self._ensure_loaded()
+        return self._versions.get(ticker.upper(), TickerVersion())
+
+    async def bump_candles(self, ticker: str) -> int:
+        """
+        Отмечает загрузку новых свечей и возвращает новую версию.
+
+        Версия увеличивается в БД, тег результатов не меняется; запись
+        в памяти обновляется по строке БД.
+        """
+        ticker = ticker.upper()
+        await self._ensure_loaded()
+        async with DatabaseGateway() as gateway:
+            candles, results = await gateway.bumps_candles_version(ticker)
+        self._versions[ticker] = TickerVersion(candles, results)
+        return candles
+
+    def mark_results(self, ticker: str, tag: str) -> None:
+        """
+        Отмечает в памяти, каким запуском заполнена таблица результатов.
+        В БД тег записывается вместе с результатами в одной транзакции
+        (DatabaseGateway.saves_report).
+        """
+        ticker = ticker.upper()
+        current = self._versions.get(ticker, TickerVersion())
+        self._versions[ticker] = TickerVersion(current.candles, tag)
+
+    def observe_candles(self, ticker: str, version: int) -> None:
+        """
+        Учитывает версию свечей, увиденную в общем хранилище (сегменты
+        свечей): если она новее версии в памяти, историю загрузил другой
+        процесс, и тег результатов в памяти сбрасывается.
+        """
+        ticker = ticker.upper()
+        current = self._versions.get(ticker)
+        if self._loaded_for is not None and (
+                current is None or current.candles < version):
+            self._versions[ticker] = TickerVersion(version)
+
+    def invalidate(self, ticker: str) -> None:
+        """
+        Отмечает в памяти удаление данных тикера (вытеснение): версия
+        свечей увеличивается, тег результатов сбрасывается. В БД то же
+        изменение выполняет вызывающий код в своей транзакции.
+        """
+        ticker = ticker.upper()
+        current = self._versions.get(ticker)
+        if current is not None:
+            self._versions[ticker] = TickerVersion(current.candles + 1)
+
+
+data_versions = DataVersions()
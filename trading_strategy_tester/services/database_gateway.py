@@ -1,28 +1,117 @@
 """Модуль для работы с SQLite базой данных тестера торговых стратегий."""
 
 import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
 from decimal import Decimal
-from typing import List, Dict
+from typing import (AsyncIterator, Awaitable, Callable, Dict, List,
+                    Optional, Sequence, Tuple)
 import aiosqlite
 
+from trading_strategy_tester.config import settings
+from trading_strategy_tester.models.candle_series import CandleSeries
 from trading_strategy_tester.models.stock_candle import StockCandle
+from trading_strategy_tester.models.trade import Trade
 from trading_strategy_tester.models.trading_result import TradingResult
 
 logger = logging.getLogger(__name__)
 
+# Таблица версий данных тикеров (для ETag и инвалидации кэшей)
+VERSIONS_TABLE = "data_versions"
+
+# Суффиксы таблиц, принадлежащих тикеру: {ticker}_{suffix}
+TICKER_TABLE_SUFFIXES = ("dataframe", "results", "calculations", "trades")
+
+# Общая таблица итогов всех тикеров с числовыми колонками
+SUMMARIES_TABLE = "calculation_summaries"
+
+# Колонки итогов в порядке хранения и их тип в SQLite
+SUMMARY_COLUMNS = (
+    ("start_date", "TEXT"),
+    ("end_date", "TEXT"),
+    ("initial_cache", "REAL"),
+    ("buy_price", "REAL"),
+    ("sell_price", "REAL"),
+    ("buy_count", "INTEGER"),
+    ("sell_count", "INTEGER"),
+    ("comission_percent", "REAL"),
+    ("tax_percent", "REAL"),
+    ("invest_period_days", "INTEGER"),
+    ("invest_period_years", "REAL"),
+    ("total_income_sum", "REAL"),
+    ("total_income_perc", "REAL"),
+    ("incom_year_sum", "REAL"),
+    ("incom_year_pers", "REAL"),
+    ("accumulated_commission", "REAL"),
+    ("final_cache", "REAL"),
+    ("final_amount_in_shares", "REAL"),
+    ("final_overall_result", "REAL"),
+    ("total_tax", "REAL"),
+)
+
+# Метрики, по которым строятся покрывающие индексы для рейтингов.
+# Индекс (метрика, buy_count, sell_count, ticker) содержит и rowid,
+# поэтому идентификаторы первых N строк в порядке метрики с фильтром
+# по числу сделок и тикеру выбираются без чтения самих строк таблицы;
+# полностью читаются только N строк страницы (query_summaries).
+SUMMARY_RANK_COLUMNS = ("incom_year_pers", "total_income_perc",
+                        "total_income_sum", "incom_year_sum",
+                        "final_overall_result")
+
+# Колонки таблицы {ticker}_results в порядке хранения
+RESULT_COLUMNS = ("date_str", "max_price", "min_price", "cache",
+                  "share_count", "amount_in_shares", "overall_result",
+                  "comiss_sum", "tax_sum", "total_tax")
+
+# Колонки результатов, по которым доступна сортировка страниц истории.
+# Числа хранятся текстом, поэтому индексы строятся по выражению CAST.
+RESULT_SORT_COLUMNS = ("date_str", "share_count", "overall_result",
+                       "cache", "amount_in_shares", "max_price",
+                       "min_price")
+
+
+# Колонки таблицы {ticker}_trades в порядке хранения
+TRADE_COLUMNS = ("date_str", "side", "price", "quantity", "commission",
+                 "tax", "trip")
+
+
+def result_sort_expr(column: str) -> str:
+    """Возвращает выражение сортировки колонки результатов."""
+    if column in ("date_str", "share_count"):
+        return column
+    return f"CAST({column} AS REAL)"
+
 
 class DatabaseGateway:
     """Класс для работы с SQLite базой данных тестера торговых стратегий."""
 
+    # Сколько секунд ждать освобождения БД другим соединением
+    BUSY_TIMEOUT = 30.0
+
+    # Базы данных, для которых таблица итогов уже создана и заполнена
+    _summaries_ready = set()
+
+    # Таблицы результатов (путь БД, имя), для которых созданы индексы
+    _results_indexed = set()
+
+    # Время последнего обращения к данным тикера (для вытеснения LRU).
+    # Хранится в памяти и периодически сбрасывается в таблицу
+    # table_access обслуживанием БД, чтобы чтения не порождали записи.
+    last_access: Dict[str, float] = {}
+
     def __init__(self):
         """Инициализирует параметры подключения к бд."""
         self.conn = None
         self.db_path = self._get_db_path()
 
     async def __aenter__(self):
-        self.conn = await aiosqlite.connect(self.db_path)
+        self.conn = await aiosqlite.connect(self.db_path,
+                                            timeout=self.BUSY_TIMEOUT)
         await self.conn.execute("PRAGMA foreign_keys = ON")
+        # WAL позволяет читать во время записи параллельного запроса
+        await self.conn.execute("PRAGMA journal_mode = WAL")
         return self
 
     async def __aexit__(self, *args):
@@ -32,12 +121,17 @@ class DatabaseGateway:
             logger.error("Ошибка при закрытии соединения: %s", e)
             raise
 
+    @staticmethod
+    def _touch(ticker: str) -> None:
+        """Отмечает обращение к данным тикера."""
+        DatabaseGateway.last_access[ticker.upper()] = time.time()
+
     @staticmethod
     def _get_db_path() -> Path:
         """Возвращает путь к файлу базы данных."""
-        path_dir = Path.cwd() / "database"
-        path_dir.mkdir(parents=True, exist_ok=True)
-        return path_dir / "trading_strategy_tester.db"
+        db_path = Path(settings.db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        return db_path
 
     @staticmethod
     async def _table_exists(cursor: aiosqlite.Cursor, table_name: str) -> bool:
@@ -80,10 +174,11 @@ class DatabaseGateway:
             raise ValueError("Список свечей не может быть пустым")
 
         table_name = f"{ticker.lower()}_dataframe"
+        self._touch(ticker)
 
         try:
             async with self.conn.cursor() as cursor:
-                await self.conn.execute("BEGIN TRANSACTION")
+                await self.conn.execute("BEGIN IMMEDIATE")
 
                 if clear_existing:
                     # Полное пересоздание таблицы вместо очистки
@@ -91,25 +186,10 @@ class DatabaseGateway:
                     logger.debug("Таблица %s удалена для пересоздания",
                                  table_name)
 
-                await cursor.execute(f"""
-                CREATE TABLE IF NOT EXISTS {table_name} (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    open TEXT NOT NULL,
-                    close TEXT NOT NULL,
-                    high TEXT NOT NULL,
-                    low TEXT NOT NULL,
-                    value TEXT NOT NULL,
-                    volume TEXT NOT NULL,
-                    begin TIMESTAMP NOT NULL,
-                    end TIMESTAMP NOT NULL,
-                    UNIQUE(begin, end) ON CONFLICT REPLACE
-                )
-                """)
+                await self._create_candles_table(cursor, table_name)
 
                 await cursor.executemany(
-                    f"""INSERT INTO {table_name}
-                    (open, close, high, low, value, volume, begin, end)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    self._candles_insert_sql(table_name),
                     [
                         (
                             str(candle.open),
@@ -135,6 +215,100 @@ class DatabaseGateway:
 
         return self._get_db_path()
 
+    @staticmethod
+    async def _create_candles_table(cursor: aiosqlite.Cursor,
+                                    table_name: str) -> None:
+        """Создает таблицу свечей, если она не существует."""
+        await cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            open TEXT NOT NULL,
+            close TEXT NOT NULL,
+            high TEXT NOT NULL,
+            low TEXT NOT NULL,
+            value TEXT NOT NULL,
+            volume TEXT NOT NULL,
+            begin TIMESTAMP NOT NULL,
+            end TIMESTAMP NOT NULL,
+            UNIQUE(begin, end) ON CONFLICT REPLACE
+        )
+        """)
+
+    @staticmethod
+    def _candles_insert_sql(table_name: str) -> str:
+        """Возвращает запрос вставки строки свечи."""
+        return (f"INSERT INTO {table_name} "
+                f"(open, close, high, low, value, volume, begin, end) "
+                f"VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+
+    @asynccontextmanager
+    async def candle_writer(self, ticker: str
+                            ) -> AsyncIterator[Callable[[List[tuple]],
+                                                        Awaitable[None]]]:
+        """
+        Постраничная запись свечей с заменой истории тикера.
+
+        Отдает функцию записи страницы: каждая страница пишется во
+        временную таблицу {ticker}_dataframe_loading_<id> своей
+        транзакцией. У каждой загрузки своя временная таблица, поэтому
+        одновременные загрузки одного тикера (в том числе из разных
+        процессов) не пишут в одну таблицу. При успешном выходе из
+        контекста временная таблица одной транзакцией заменяет
+        {ticker}_dataframe (при одновременных загрузках остается
+        история последней завершенной); при ошибке удаляется, прежняя
+        история остается без изменений.
+
+        Args:
+            ticker: Тикер акции.
+
+        Yields:
+            Функция записи страницы строк (open, close, high, low,
+            value, volume, begin, end).
+
+        Raises:
+            ValueError: Если не записано ни одной свечи.
+            sqlite3.Error: При ошибках работы с БД.
+        """
+        table_name = f"{ticker.lower()}_dataframe"
+        staging = f"{table_name}_loading_{uuid.uuid4().hex}"
+        insert_sql = self._candles_insert_sql(staging)
+        written = 0
+        self._touch(ticker)
+
+        async def write_page(rows: List[tuple]) -> None:
+            nonlocal written
+            await self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                await self.conn.executemany(insert_sql, rows)
+                await self.conn.commit()
+            except aiosqlite.Error:
+                await self.conn.rollback()
+                raise
+            written += len(rows)
+
+        async with self.conn.cursor() as cursor:
+            await self._create_candles_table(cursor, staging)
+            await self.conn.commit()
+            try:
+                yield write_page
+                if not written:
+                    raise ValueError("Список свечей не может быть пустым")
+                await self.conn.execute("BEGIN IMMEDIATE")
+                await cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+                await cursor.execute(
+                    f"ALTER TABLE {staging} RENAME TO {table_name}")
+                await self.conn.commit()
+                logger.info("Сохранено %s датафреймов в %s", written,
+                            table_name)
+            except BaseException as e:
+                if self.conn.in_transaction:
+                    await self.conn.rollback()
+                await cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+                await self.conn.commit()
+                if isinstance(e, aiosqlite.Error):
+                    logger.error("Ошибка сохранения датафреймов: %s", e)
+                raise
+
     async def saves_results(self, results: List[TradingResult], ticker: str,
                             clear_existing: bool = True) -> Path:
         """
@@ -156,56 +330,13 @@ class DatabaseGateway:
             raise ValueError("Список свечей не может быть пустым")
 
         table_name = f"{ticker.lower()}_results"
+        self._touch(ticker)
 
         try:
             async with self.conn.cursor() as cursor:
-                await self.conn.execute("BEGIN TRANSACTION")
-
-                if clear_existing:
-                    # Полное пересоздание таблицы вместо очистки
-                    await cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
-                    logger.debug("Таблица %s удалена для пересоздания",
-                                 table_name)
-
-                await cursor.execute(f"""
-                CREATE TABLE IF NOT EXISTS {table_name} (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    date_str TEXT NOT NULL,
-                    max_price TEXT NOT NULL,
-                    min_price TEXT NOT NULL,
-                    cache TEXT NOT NULL,
-                    share_count INTEGER NOT NULL,
-                    amount_in_shares TEXT NOT NULL,
-                    overall_result TEXT NOT NULL,
-                    comiss_sum TEXT NOT NULL,
-                    tax_sum TEXT NOT NULL,
-                    total_tax TEXT NOT NULL
-                )
-                """)
-                logger.debug("Таблица %s создана/проверена", table_name)
-
-                await cursor.executemany(
-                    f"""INSERT INTO {table_name}
-                    (date_str, max_price, min_price, cache, share_count,
-                    amount_in_shares, overall_result, comiss_sum, tax_sum,
-                    total_tax)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                    [
-                        (
-                            result.date_str,
-                            str(result.max_price),
-                            str(result.min_price),
-                            str(result.cache),
-                            result.share_count,
-                            str(result.amount_in_shares),
-                            str(result.overall_result),
-                            str(result.comiss_sum),
-                            str(result.tax_sum),
-                            str(result.total_tax)
-                        )
-                        for result in results
-                    ]
-                )
+                await self.conn.execute("BEGIN IMMEDIATE")
+                await self._write_results(cursor, table_name, results,
+                                          clear_existing)
                 await self.conn.commit()
                 logger.info("Сохранено %s записей в %s", len(results),
                             table_name)
@@ -217,6 +348,59 @@ class DatabaseGateway:
 
         return self._get_db_path()
 
+    async def _write_results(self, cursor: aiosqlite.Cursor,
+                             table_name: str, results: List[TradingResult],
+                             clear_existing: bool = True) -> None:
+        """Записывает результаты в таблицу в открытой транзакции."""
+        if clear_existing:
+            # Полное пересоздание таблицы вместо очистки
+            await cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+            logger.debug("Таблица %s удалена для пересоздания",
+                         table_name)
+
+        await cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date_str TEXT NOT NULL,
+            max_price TEXT NOT NULL,
+            min_price TEXT NOT NULL,
+            cache TEXT NOT NULL,
+            share_count INTEGER NOT NULL,
+            amount_in_shares TEXT NOT NULL,
+            overall_result TEXT NOT NULL,
+            comiss_sum TEXT NOT NULL,
+            tax_sum TEXT NOT NULL,
+            total_tax TEXT NOT NULL
+        )
+        """)
+        logger.debug("Таблица %s создана/проверена", table_name)
+
+        await cursor.executemany(
+            f"""INSERT INTO {table_name}
+            (date_str, max_price, min_price, cache, share_count,
+            amount_in_shares, overall_result, comiss_sum, tax_sum,
+            total_tax)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            [
+                (
+                    result.date_str,
+                    str(result.max_price),
+                    str(result.min_price),
+                    str(result.cache),
+                    result.share_count,
+                    str(result.amount_in_shares),
+                    str(result.overall_result),
+                    str(result.comiss_sum),
+                    str(result.tax_sum),
+                    str(result.total_tax)
+                )
+                for result in results
+            ]
+        )
+        # Индексы строятся после вставки: так быстрее, чем
+        # обновлять их на каждую строку
+        await self._ensure_results_indexes(cursor, table_name)
+
     async def saves_calculations(self, results: Dict[str, any],
                                  ticker: str) -> Path:
         """Сохраняет результаты расчетов в базу данных.
@@ -236,6 +420,7 @@ class DatabaseGateway:
             raise ValueError("Список свечей не может быть пустым")
 
         table_name = f"{ticker.lower()}_calculations"
+        self._touch(ticker)
 
         data = (
                 results["start_date"],
@@ -262,7 +447,7 @@ class DatabaseGateway:
 
         try:
             async with self.conn.cursor() as cursor:
-                await self.conn.execute("BEGIN TRANSACTION")
+                await self.conn.execute("BEGIN IMMEDIATE")
 
                 await cursor.execute(f"""
                 CREATE TABLE IF NOT EXISTS {table_name} (
@@ -304,6 +489,13 @@ class DatabaseGateway:
                     final_amount_in_shares, final_overall_result, total_tax
                     )
                     VALUES ({','.join(['?'] * 20)})""", data)
+
+                await self._ensure_summaries(cursor)
+                await cursor.execute(
+                    f"""INSERT INTO {SUMMARIES_TABLE}
+                    (ticker, {', '.join(c for c, _ in SUMMARY_COLUMNS)})
+                    VALUES ({','.join(['?'] * 21)})""",
+                    (ticker.upper(),) + data)
                 await self.conn.commit()
                 logger.info("Сохранение расчетов в %s", table_name)
 
@@ -324,11 +516,28 @@ class DatabaseGateway:
         Returns:
             List[StockCandle]: Список объектов свечей.
 
+        Raises:
+            ValueError: Если таблица не существует.
+            sqlite3.Error: При ошибках работы с БД.
+        """
+        return (await self.load_candle_series(ticker)).candles()
+
+    async def load_candle_series(self, ticker: str) -> CandleSeries:
+        """
+        Загружает свечи из базы данных в виде колонок.
+
+        Args:
+            ticker: Тикер акции.
+
+        Returns:
+            CandleSeries: Свечи тикера в порядке дат.
+
         Raises:
             ValueError: Если таблица не существует.
             sqlite3.Error: При ошибках работы с БД.
         """
         table_name = f"{ticker.lower()}_dataframe"
+        self._touch(ticker)
 
         try:
             async with self.conn.cursor() as cursor:
@@ -347,24 +556,66 @@ class DatabaseGateway:
 
                 # Получение всех строк
                 rows = await cursor.fetchall()
-
-                return [
-                    StockCandle(
-                        open=Decimal(row[0]),
-                        close=Decimal(row[1]),
-                        high=Decimal(row[2]),
-                        low=Decimal(row[3]),
-                        value=Decimal(row[4]),
-                        volume=Decimal(row[5]),
-                        begin=str(row[6]),
-                        end=str(row[7])
-                    )
-                    for row in rows
-                ]
+                return CandleSeries.from_rows(rows)
 
         except aiosqlite.Error as e:
             raise aiosqlite.Error(f"Ошибка при загрузке данных: {e}")
 
+    async def load_candle_snapshot(self, ticker: str
+                                   ) -> Tuple[int, CandleSeries]:
+        """
+        Загружает свечи вместе с их версией из одного снимка БД.
+
+        Версия и свечи читаются в одной транзакции чтения, поэтому
+        свечи не могут оказаться старше прочитанной версии.
+
+        Args:
+            ticker: Тикер акции.
+
+        Returns:
+            Tuple[int, CandleSeries]: Версия свечей и свечи.
+
+        Raises:
+            ValueError: Если таблица не существует.
+            sqlite3.Error: При ошибках работы с БД.
+        """
+        await self.conn.execute("BEGIN")
+        try:
+            version = 0
+            async with self.conn.cursor() as cursor:
+                if await self._table_exists(cursor, VERSIONS_TABLE):
+                    await cursor.execute(
+                        f"SELECT candles_version FROM {VERSIONS_TABLE} "
+                        f"WHERE ticker = ?", (ticker.upper(),))
+                    row = await cursor.fetchone()
+                    if row is not None:
+                        version = row[0]
+            series = await self.load_candle_series(ticker)
+        finally:
+            await self.conn.rollback()
+        return version, series
+
+    async def count_candles(self, ticker: str) -> int:
+        """
+        Возвращает количество свечей тикера (0, если история не
+        загружена).
+        """
+        table_name = f"{ticker.lower()}_dataframe"
+        async with self.conn.cursor() as cursor:
+            if not await self._table_exists(cursor, table_name):
+                return 0
+            await cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+            return (await cursor.fetchone())[0]
+
+    async def list_candle_tickers(self) -> List[str]:
+        """Возвращает тикеры, у которых загружена история свечей."""
+        async with self.conn.cursor() as cursor:
+            await cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' "
+                "AND name LIKE '%\\_dataframe' ESCAPE '\\' ORDER BY name")
+            return [row[0][:-len("_dataframe")].upper()
+                    for row in await cursor.fetchall()]
+
     async def load_strategy_results(self, ticker: str) -> List[dict]:
         """
         Загружает результаты торговой стратегии из таблицы результатов.
@@ -381,6 +632,7 @@ class DatabaseGateway:
             sqlite3.Error: При ошибках БД
         """
         table_name = f"{ticker.lower()}_results"
+        self._touch(ticker)
 
         try:
             async with self.conn.cursor() as cursor:
@@ -404,3 +656,497 @@ class DatabaseGateway:
 
         except aiosqlite.Error as e:
             raise aiosqlite.Error(f"Ошибка загрузки результатов: {e}")
+
+    async def iter_table_batches(self, table_name: str,
+                                 columns: Sequence[str], order_by: str,
+                                 batch_size: int = 10000
+                                 ) -> AsyncIterator[List[tuple]]:
+        """
+        Построчно читает таблицу пакетами фиксированного размера.
+
+        Память не зависит от размера таблицы: в каждый момент
+        в памяти находится только один пакет строк.
+
+        Args:
+            table_name: Имя таблицы.
+            columns: Читаемые колонки.
+            order_by: Колонка сортировки.
+            batch_size: Количество строк в пакете.
+
+        Yields:
+            List[tuple]: Пакет строк.
+
+        Raises:
+            ValueError: Если таблица не существует.
+            sqlite3.Error: При ошибках работы с БД.
+        """
+        async with self.conn.cursor() as cursor:
+            if not await self._table_exists(cursor, table_name):
+                raise ValueError(
+                    f"Таблица {table_name} не найдена в базе данных"
+                )
+
+            await cursor.execute(
+                f"SELECT {', '.join(columns)} FROM {table_name} "
+                f"ORDER BY {order_by}")
+            while True:
+                rows = await cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+
+    async def table_exists(self, table_name: str) -> bool:
+        """Проверяет существование таблицы в базе данных."""
+        async with self.conn.cursor() as cursor:
+            return await self._table_exists(cursor, table_name)
+
+    async def _ensure_summaries(self, cursor: aiosqlite.Cursor) -> None:
+        """
+        Создает общую таблицу итогов с индексами и при первом создании
+        переносит в нее итоги из всех таблиц {ticker}_calculations.
+        """
+        if self.db_path in DatabaseGateway._summaries_ready:
+            return
+
+        created = not await self._table_exists(cursor, SUMMARIES_TABLE)
+        columns_sql = ",\n".join(
+            f"{name} {kind} NOT NULL" for name, kind in SUMMARY_COLUMNS)
+        await cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SUMMARIES_TABLE} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ticker TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            {columns_sql},
+            UNIQUE(ticker, start_date, end_date, initial_cache,
+                   buy_price, sell_price)
+            ON CONFLICT REPLACE
+        )
+        """)
+        for column in SUMMARY_RANK_COLUMNS:
+            await cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_summaries_{column} "
+                f"ON {SUMMARIES_TABLE} "
+                f"({column}, buy_count, sell_count, ticker)")
+        await cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_summaries_ticker "
+            f"ON {SUMMARIES_TABLE} (ticker, created_at)")
+
+        if created:
+            await cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' "
+                "AND name LIKE '%\\_calculations' ESCAPE '\\'")
+            tables = [row[0] for row in await cursor.fetchall()]
+            names = ", ".join(c for c, _ in SUMMARY_COLUMNS)
+            for table in tables:
+                ticker = table[:-len("_calculations")].upper()
+                await cursor.execute(
+                    f"INSERT INTO {SUMMARIES_TABLE} "
+                    f"(ticker, created_at, {names}) "
+                    f"SELECT ?, created_at, {names} FROM {table}",
+                    (ticker,))
+            logger.info("Итоги %s таблиц перенесены в %s", len(tables),
+                        SUMMARIES_TABLE)
+
+        DatabaseGateway._summaries_ready.add(self.db_path)
+
+    async def query_summaries(self, where_sql: str, params: Sequence,
+                              order_sql: str, limit: int,
+                              offset: int = 0) -> List[dict]:
+        """
+        Выбирает итоги расчетов всех тикеров.
+
+        Args:
+            where_sql: Условие WHERE с плейсхолдерами (или пустая строка).
+            params: Значения плейсхолдеров.
+            order_sql: Выражение ORDER BY.
+            limit: Максимальное количество строк.
+            offset: Смещение первой строки.
+
+        Returns:
+            List[dict]: Строки итогов.
+        """
+        try:
+            async with self.conn.cursor() as cursor:
+                if self.db_path not in DatabaseGateway._summaries_ready:
+                    await self.conn.execute("BEGIN IMMEDIATE")
+                    await self._ensure_summaries(cursor)
+                    await self.conn.commit()
+
+                # Страница выбирается по индексу (только id), затем
+                # читаются строки страницы, а не все пропущенные OFFSET
+                await cursor.execute(
+                    f"SELECT s.* FROM (SELECT id FROM {SUMMARIES_TABLE} "
+                    f"{'WHERE ' + where_sql if where_sql else ''} "
+                    f"ORDER BY {order_sql} LIMIT ? OFFSET ?) AS page "
+                    f"JOIN {SUMMARIES_TABLE} AS s ON s.id = page.id "
+                    f"ORDER BY {order_sql}",
+                    (*params, limit, offset))
+                columns = [col[0] for col in cursor.description]
+                rows = await cursor.fetchall()
+                return [dict(zip(columns, row)) for row in rows]
+
+        except aiosqlite.Error as e:
+            raise aiosqlite.Error(f"Ошибка загрузки итогов: {e}")
+
+    async def load_data_versions(self) -> Dict[str, tuple]:
+        """
+        Загружает версии данных всех тикеров.
+
+        Returns:
+            Dict[str, tuple]: Тикер -> (версия свечей, тег результатов).
+        """
+        async with self.conn.cursor() as cursor:
+            await self._ensure_versions_table(cursor)
+        await self.conn.commit()
+        async with self.conn.execute(
+                f"SELECT ticker, candles_version, results_tag "
+                f"FROM {VERSIONS_TABLE}") as cursor:
+            return {row[0]: (row[1], row[2])
+                    for row in await cursor.fetchall()}
+
+    @staticmethod
+    async def _ensure_versions_table(cursor: aiosqlite.Cursor) -> None:
+        """Создает таблицу версий данных тикеров."""
+        await cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {VERSIONS_TABLE} (
+            ticker TEXT PRIMARY KEY,
+            candles_version INTEGER NOT NULL DEFAULT 0,
+            results_tag TEXT
+        )
+        """)
+
+    async def bumps_candles_version(self, ticker: str
+                                    ) -> Tuple[int, Optional[str]]:
+        """
+        Увеличивает версию свечей тикера, не меняя тег результатов.
+
+        Приращение выполняется в БД, поэтому одновременные загрузки
+        и записи результатов (в том числе из других процессов) не
+        перезаписывают друг друга.
+
+        Returns:
+            Tuple[int, Optional[str]]: Новая версия свечей и тег
+                результатов из БД.
+        """
+        ticker = ticker.upper()
+        try:
+            async with self.conn.cursor() as cursor:
+                await self.conn.execute("BEGIN IMMEDIATE")
+                await self._ensure_versions_table(cursor)
+                await cursor.execute(
+                    f"INSERT INTO {VERSIONS_TABLE} "
+                    f"(ticker, candles_version) VALUES (?, 1) "
+                    f"ON CONFLICT(ticker) DO UPDATE SET "
+                    f"candles_version = candles_version + 1",
+                    (ticker,))
+                await cursor.execute(
+                    f"SELECT candles_version, results_tag "
+                    f"FROM {VERSIONS_TABLE} WHERE ticker = ?", (ticker,))
+                row = await cursor.fetchone()
+                await self.conn.commit()
+        except aiosqlite.Error as e:
+            await self.conn.rollback()
+            logger.error("Ошибка сохранения версии данных: %s", e)
+            raise
+        return row[0], row[1]
+
+    async def _ensure_results_indexes(self, cursor: aiosqlite.Cursor,
+                                      table_name: str) -> None:
+        """Создает индексы сортировки страниц таблицы результатов."""
+        for column in RESULT_SORT_COLUMNS:
+            await cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table_name}_{column} "
+                f"ON {table_name} ({result_sort_expr(column)})")
+        DatabaseGateway._results_indexed.add((self.db_path, table_name))
+
+    async def _prepare_results(self, cursor: aiosqlite.Cursor,
+                               ticker: str) -> str:
+        """
+        Проверяет таблицу результатов и при необходимости создает индексы
+        (для таблиц, сохраненных до их появления).
+
+        Raises:
+            ValueError: Если таблица не существует.
+        """
+        table_name = f"{ticker.lower()}_results"
+        self._touch(ticker)
+        if not await self._table_exists(cursor, table_name):
+            raise ValueError(f"Таблица {table_name} не найдена в базе данных")
+        if (self.db_path, table_name) in DatabaseGateway._results_indexed:
+            return table_name
+        await self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            await self._ensure_results_indexes(cursor, table_name)
+            await self.conn.commit()
+        except aiosqlite.Error:
+            await self.conn.rollback()
+            raise
+        return table_name
+
+    async def load_results_range(self, ticker: str, offset: int, limit: int,
+                                 order_by: str = "date_str",
+                                 descending: bool = False
+                                 ) -> Tuple[int, List[tuple]]:
+        """
+        Загружает страницу результатов стратегии в заданном порядке.
+
+        Порядок берется из индекса по колонке сортировки, поэтому
+        страница читается без сортировки всей таблицы. К строке
+        добавляется изменение количества акций относительно
+        предыдущего дня.
+
+        Args:
+            ticker: Тикер акции.
+            offset: Номер первой строки.
+            limit: Количество строк.
+            order_by: Колонка сортировки из RESULT_SORT_COLUMNS.
+            descending: Сортировка по убыванию.
+
+        Returns:
+            Tuple[int, List[tuple]]: Общее количество строк и строки
+                (колонки RESULT_COLUMNS и share_change).
+
+        Raises:
+            ValueError: Если таблица не существует или колонка
+                сортировки недопустима.
+        """
+        if order_by not in RESULT_SORT_COLUMNS:
+            raise ValueError(f"Недопустимая колонка сортировки: {order_by}")
+        direction = "DESC" if descending else "ASC"
+
+        try:
+            async with self.conn.cursor() as cursor:
+                table_name = await self._prepare_results(cursor, ticker)
+                await cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+                total = (await cursor.fetchone())[0]
+                # Строки сохраняются в порядке дат, поэтому предыдущий
+                # день - ближайший меньший id
+                await cursor.execute(f"""
+                    SELECT {', '.join(RESULT_COLUMNS)},
+                           share_count - coalesce((
+                               SELECT p.share_count FROM {table_name} p
+                               WHERE p.id < r.id
+                               ORDER BY p.id DESC LIMIT 1),
+                               share_count) AS share_change
+                    FROM {table_name} r
+                    ORDER BY {result_sort_expr(order_by)} {direction},
+                             id {direction}
+                    LIMIT ? OFFSET ?
+                    """, (limit, offset))
+                return total, await cursor.fetchall()
+
+        except aiosqlite.Error as e:
+            raise aiosqlite.Error(f"Ошибка загрузки результатов: {e}")
+
+    async def locate_result_date(self, ticker: str, date_str: str,
+                                 order_by: str = "date_str",
+                                 descending: bool = False
+                                 ) -> Optional[int]:
+        """
+        Возвращает позицию строки первого дня не раньше date_str
+        в заданном порядке сортировки.
+
+        Returns:
+            Optional[int]: Номер строки или None, если таких дней нет.
+
+        Raises:
+            ValueError: Если таблица не существует или колонка
+                сортировки недопустима.
+        """
+        if order_by not in RESULT_SORT_COLUMNS:
+            raise ValueError(f"Недопустимая колонка сортировки: {order_by}")
+        expr = result_sort_expr(order_by)
+        before = ">" if descending else "<"
+
+        try:
+            async with self.conn.cursor() as cursor:
+                table_name = await self._prepare_results(cursor, ticker)
+                await cursor.execute(
+                    f"SELECT id, {expr} FROM {table_name} "
+                    f"WHERE date_str >= ? ORDER BY date_str, id LIMIT 1",
+                    (date_str,))
+                row = await cursor.fetchone()
+                if row is None:
+                    return None
+                row_id, value = row
+                # Количество строк, стоящих в этом порядке раньше найденной
+                await cursor.execute(
+                    f"SELECT COUNT(*) FROM {table_name} "
+                    f"WHERE {expr} {before} ? "
+                    f"OR ({expr} = ? AND id {before} ?)",
+                    (value, value, row_id))
+                return (await cursor.fetchone())[0]
+
+        except aiosqlite.Error as e:
+            raise aiosqlite.Error(f"Ошибка поиска даты: {e}")
+
+    async def saves_trades(self, trades: List[Trade], ticker: str) -> Path:
+        """
+        Сохраняет журнал сделок расчета, заменяя журнал предыдущего.
+
+        Пустой журнал (за период не было сделок) сохраняется пустой
+        таблицей, чтобы не остался журнал прошлого расчета.
+
+        Args:
+            trades: Сделки в порядке исполнения.
+            ticker: Тикер акции.
+
+        Returns:
+            filepath: Путь к базе данных.
+
+        Raises:
+            sqlite3.Error: При ошибках работы с БД.
+        """
+        table_name = f"{ticker.lower()}_trades"
+        self._touch(ticker)
+
+        try:
+            async with self.conn.cursor() as cursor:
+                await self.conn.execute("BEGIN IMMEDIATE")
+                await self._write_trades(cursor, table_name, trades)
+                await self.conn.commit()
+                logger.info("Сохранено %s сделок в %s", len(trades),
+                            table_name)
+
+        except aiosqlite.Error as e:
+            await self.conn.rollback()
+            logger.error("Ошибка сохранения сделок: %s", e)
+            raise
+
+        return self._get_db_path()
+
+    @staticmethod
+    async def _write_trades(cursor: aiosqlite.Cursor, table_name: str,
+                            trades: List[Trade]) -> None:
+        """Записывает журнал сделок в таблицу в открытой транзакции."""
+        await cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+        await cursor.execute(f"""
+        CREATE TABLE {table_name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date_str TEXT NOT NULL,
+            side TEXT NOT NULL,
+            price TEXT NOT NULL,
+            quantity INTEGER NOT NULL,
+            commission TEXT NOT NULL,
+            tax TEXT NOT NULL,
+            trip INTEGER NOT NULL
+        )
+        """)
+        await cursor.executemany(
+            f"""INSERT INTO {table_name}
+            ({', '.join(TRADE_COLUMNS)})
+            VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            [
+                (trade.date_str, trade.side, str(trade.price),
+                 trade.quantity, str(trade.commission),
+                 str(trade.tax), trade.trip)
+                for trade in trades
+            ]
+        )
+        for column in ("trip", "date_str"):
+            await cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS "
+                f"idx_{table_name}_{column} "
+                f"ON {table_name} ({column})")
+
+    async def saves_report(self, results: List[TradingResult],
+                           trades: List[Trade], ticker: str,
+                           results_tag: str) -> Path:
+        """
+        Сохраняет результаты и журнал сделок расчета вместе с тегом
+        запуска в одной транзакции.
+
+        Одновременные расчеты тикера с разными параметрами не могут
+        оставить в {ticker}_results строки одного запуска с тегом
+        другого: тег всегда записывается вместе со своими строками.
+        Версия свечей в таблице версий не меняется.
+
+        Args:
+            results: Результаты по дням.
+            trades: Сделки в порядке исполнения.
+            ticker: Тикер акции.
+            results_tag: Тег запуска.
+
+        Returns:
+            filepath: Путь к базе данных.
+
+        Raises:
+            ValueError: Если список результатов пуст.
+            sqlite3.Error: При ошибках работы с БД.
+        """
+        if not results:
+            raise ValueError("Список свечей не может быть пустым")
+
+        self._touch(ticker)
+        try:
+            async with self.conn.cursor() as cursor:
+                await self.conn.execute("BEGIN IMMEDIATE")
+                await self._write_results(
+                    cursor, f"{ticker.lower()}_results", results)
+                await self._write_trades(
+                    cursor, f"{ticker.lower()}_trades", trades)
+                await self._ensure_versions_table(cursor)
+                await cursor.execute(
+                    f"INSERT INTO {VERSIONS_TABLE} (ticker, results_tag) "
+                    f"VALUES (?, ?) ON CONFLICT(ticker) "
+                    f"DO UPDATE SET results_tag = excluded.results_tag",
+                    (ticker.upper(), results_tag))
+                await self.conn.commit()
+                logger.info("Сохранено %s записей и %s сделок %s",
+                            len(results), len(trades), ticker.upper())
+
+        except aiosqlite.Error as e:
+            await self.conn.rollback()
+            logger.error("Ошибка сохранения результатов: %s", e)
+            raise
+
+        return self._get_db_path()
+
+    async def load_trades(self, ticker: str, offset: int = 0,
+                          limit: Optional[int] = None,
+                          side: Optional[str] = None
+                          ) -> Tuple[int, List[Trade]]:
+        """
+        Загружает сделки журнала в порядке исполнения.
+
+        Args:
+            ticker: Тикер акции.
+            offset: Номер первой сделки.
+            limit: Количество сделок (None - все).
+            side: Только сделки направления 'buy' или 'sell'.
+
+        Returns:
+            Tuple[int, List[Trade]]: Общее количество сделок с учетом
+                фильтра и сделки страницы.
+
+        Raises:
+            ValueError: Если журнал сделок не существует.
+        """
+        table_name = f"{ticker.lower()}_trades"
+        self._touch(ticker)
+        where, params = ("WHERE side = ?", (side,)) if side else ("", ())
+
+        try:
+            async with self.conn.cursor() as cursor:
+                if not await self._table_exists(cursor, table_name):
+                    raise ValueError(
+                        f"Таблица {table_name} не найдена в базе данных")
+                await cursor.execute(
+                    f"SELECT COUNT(*) FROM {table_name} {where}", params)
+                total = (await cursor.fetchone())[0]
+                await cursor.execute(
+                    f"SELECT {', '.join(TRADE_COLUMNS)} FROM {table_name} "
+                    f"{where} ORDER BY id LIMIT ? OFFSET ?",
+                    (*params, -1 if limit is None else limit, offset))
+                rows = await cursor.fetchall()
+
+        except aiosqlite.Error as e:
+            raise aiosqlite.Error(f"Ошибка загрузки сделок: {e}")
+
+        return total, [
+            Trade(date_str=date_str, side=trade_side, price=Decimal(price),
+                  quantity=quantity, commission=Decimal(commission),
+                  tax=Decimal(tax), trip=trip)
+            for date_str, trade_side, price, quantity, commission, tax, trip
+            in rows
+        ]
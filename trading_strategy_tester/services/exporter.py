@@ -0,0 +1,269 @@
+"""
+Содержит потоковую выгрузку таблиц результатов, итогов и свечей
+в форматах Arrow IPC, Parquet и CSV.
+"""
+
+import csv
+import io
+import logging
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Tuple
+
+from trading_strategy_tester.services.database_gateway import DatabaseGateway
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ExportTable:
+    """
+    Описание выгружаемой таблицы.
+
+    Атрибуты:
+        suffix (str): Суффикс имени таблицы после тикера.
+        columns (Tuple[Tuple[str, str], ...]): Колонки и их типы:
+            str, int, float, date или timestamp.
+        order_by (str): Колонка сортировки.
+    """
+    suffix: str
+    columns: Tuple[Tuple[str, str], ...]
+    order_by: str
+
+    def table_name(self, ticker: str) -> str:
+        """Возвращает имя таблицы тикера."""
+        return f"{ticker.lower()}_{self.suffix}"
+
+    @property
+    def column_names(self) -> List[str]:
+        """Возвращает имена колонок."""
+        return [name for name, _ in self.columns]
+
+
+EXPORT_TABLES = {
+    "results": ExportTable("results", (
+        ("date_str", "date"),
+        ("max_price", "float"),
+        ("min_price", "float"),
+        ("cache", "float"),
+        ("share_count", "int"),
+        ("amount_in_shares", "float"),
+        ("overall_result", "float"),
+        ("comiss_sum", "float"),
+        ("tax_sum", "float"),
+        ("total_tax", "float"),
+    ), "id"),
+    "calculations": ExportTable("calculations", (
+        ("created_at", "timestamp"),
+        ("start_date", "date"),
+        ("end_date", "date"),
+        ("initial_cache", "float"),
+        ("buy_price", "float"),
+        ("sell_price", "float"),
+        ("buy_count", "int"),
+        ("sell_count", "int"),
+        ("comission_percent", "float"),
+        ("tax_percent", "float"),
+        ("invest_period_days", "int"),
+        ("invest_period_years", "float"),
+        ("total_income_sum", "float"),
+        ("total_income_perc", "float"),
+        ("incom_year_sum", "float"),
+        ("incom_year_pers", "float"),
+        ("accumulated_commission", "float"),
+        ("final_cache", "float"),
+        ("final_amount_in_shares", "float"),
+        ("final_overall_result", "float"),
+        ("total_tax", "float"),
+    ), "id"),
+    "candles": ExportTable("dataframe", (
+        ("open", "float"),
+        ("close", "float"),
+        ("high", "float"),
+        ("low", "float"),
+        ("value", "float"),
+        ("volume", "float"),
+        ("begin", "timestamp"),
+        ("end", "timestamp"),
+    ), "begin"),
+    "trades": ExportTable("trades", (
+        ("date_str", "date"),
+        ("side", "str"),
+        ("price", "float"),
+        ("quantity", "int"),
+        ("commission", "float"),
+        ("tax", "float"),
+        ("trip", "int"),
+    ), "id"),
+}
+
+EXPORT_FORMATS = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+    "csv": "text/csv; charset=utf-8",
+}
+
+FILE_EXTENSIONS = {"arrow": "arrows", "parquet": "parquet", "csv": "csv"}
+
+
+class _ChunkSink:
+    """Файлоподобный приемник, из которого записанные байты
+    забираются по частям для потоковой отдачи."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class TableExporter:
+    """Потоковая выгрузка таблицы тикера из базы данных."""
+
+    def __init__(self, ticker: str, kind: str, fmt: str,
+                 batch_size: int = 50000):
+        """
+        Args:
+            ticker (str): Тикер акции.
+            kind (str): Ключ EXPORT_TABLES: results, calculations, candles,
+                trades.
+            fmt (str): Ключ EXPORT_FORMATS: arrow, parquet, csv.
+            batch_size (int): Количество строк в одном пакете.
+
+        Raises:
+            ValueError: Если таблица или формат неизвестны.
+        """
+        if kind not in EXPORT_TABLES:
+            raise ValueError(f"Неизвестная таблица выгрузки: {kind}")
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Неизвестный формат выгрузки: {fmt}")
+        self.ticker = ticker.upper()
+        self.table = EXPORT_TABLES[kind]
+        self.kind = kind
+        self.fmt = fmt
+        self.batch_size = batch_size
+
+    @property
+    def media_type(self) -> str:
+        """Возвращает MIME-тип выгрузки."""
+        return EXPORT_FORMATS[self.fmt]
+
+    @property
+    def filename(self) -> str:
+        """Возвращает имя файла выгрузки."""
+        return f"{self.ticker}_{self.kind}.{FILE_EXTENSIONS[self.fmt]}"
+
+    async def exists(self) -> bool:
+        """Проверяет, что выгружаемая таблица существует."""
+        async with DatabaseGateway() as gateway:
+            return await gateway.table_exists(
+                self.table.table_name(self.ticker))
+
+    async def _batches(self) -> AsyncIterator[List[tuple]]:
+        async with DatabaseGateway() as gateway:
+            async for rows in gateway.iter_table_batches(
+                    self.table.table_name(self.ticker),
+                    self.table.column_names, self.table.order_by,
+                    self.batch_size):
+                yield rows
+
+    def _arrow_schema(self):
+        import pyarrow as pa
+
+        types = {"str": pa.string(), "int": pa.int64(),
+                 "float": pa.float64(), "date": pa.date32(),
+                 "timestamp": pa.timestamp("s")}
+        return pa.schema([(name, types[kind])
+                          for name, kind in self.table.columns])
+
+    def _record_batch(self, rows: List[tuple], schema):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        arrays = []
+        for index, (_, kind) in enumerate(self.table.columns):
+            values = [row[index] for row in rows]
+            if kind == "float":
+                array = pa.array(values, pa.string()).cast(pa.float64())
+            elif kind == "int":
+                array = pa.array(values, pa.int64())
+            elif kind == "date":
+                array = pc.strptime(pa.array(values, pa.string()),
+                                    format="%Y-%m-%d",
+                                    unit="s").cast(pa.date32())
+            elif kind == "timestamp":
+                array = pc.strptime(pa.array(values, pa.string()),
+                                    format="%Y-%m-%d %H:%M:%S", unit="s")
+            else:
+                array = pa.array(values, pa.string())
+            arrays.append(array)
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """
+        Отдает выгрузку частями по мере чтения пакетов из БД.
+
+        Yields:
+            bytes: Очередная часть файла выгрузки.
+        """
+        if self.fmt == "csv":
+            async for chunk in self._stream_csv():
+                yield chunk
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = self._arrow_schema()
+        sink = _ChunkSink()
+        if self.fmt == "arrow":
+            writer = pa.ipc.new_stream(sink, schema)
+        else:
+            writer = pq.ParquetWriter(sink, schema)
+
+        rows_count = 0
+        async for rows in self._batches():
+            batch = self._record_batch(rows, schema)
+            if self.fmt == "arrow":
+                writer.write_batch(batch)
+            else:
+                writer.write_table(pa.Table.from_batches([batch]))
+            rows_count += len(rows)
+            yield sink.drain()
+
+        writer.close()
+        yield sink.drain()
+        logger.info("Выгружено %s строк %s в формате %s", rows_count,
+                    self.table.table_name(self.ticker), self.fmt)
+
+    async def _stream_csv(self) -> AsyncIterator[bytes]:
+        # Значения пишутся в том виде, в котором хранятся в БД,
+        # без преобразования чисел и потери точности.
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.table.column_names)
+        async for rows in self._batches():
+            writer.writerows(rows)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
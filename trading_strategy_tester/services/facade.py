@@ -3,20 +3,35 @@
 вызовов функций и классов для работы приложения.
 """
 
+import asyncio
 import logging
-from concurrent.futures import ThreadPoolExecutor
-from typing import Optional, Tuple, List
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, List
 
 from trading_strategy_tester.api.schemas import StrategyParameters
 from trading_strategy_tester.api.schemas import RequestParameters
+from trading_strategy_tester.models.date_index import DateIndex
+from trading_strategy_tester.models.fill_model import FillModel
+from trading_strategy_tester.models.stock_candle import StockCandle
+from trading_strategy_tester.models.trade import Trade
 from trading_strategy_tester.models.trading_result import TradingResult
+from trading_strategy_tester.services.admission import (admission,
+                                                       period_days)
+from trading_strategy_tester.services.candle_cache import candle_cache
+from trading_strategy_tester.services.candle_sources import CandleSource
 from trading_strategy_tester.services.data_parser import DataframeParser
-from trading_strategy_tester.services.convert_df_to_str import (
-    converts_to_str)
 from trading_strategy_tester.services.database_gateway import DatabaseGateway
+from trading_strategy_tester.services.data_versions import (data_versions,
+                                                            run_tag)
 from trading_strategy_tester.services.strategy_calculator import (
     StrategyCalculator)
 from trading_strategy_tester.services.calculate_results import CalculateResult
+from trading_strategy_tester.services.compute_pool import compute_pool
+from trading_strategy_tester.services.ingestion import ingest_candles
+from trading_strategy_tester.services.progress import ProgressReporter
+from trading_strategy_tester.services.rolling_analysis import rolling_sweep
+from trading_strategy_tester.services.single_flight import SingleFlight
+from trading_strategy_tester.utils.logger import timed_stage
 
 logger = logging.getLogger(__name__)
 
@@ -27,72 +42,267 @@ class Facade:
     при работе приложения.
     """
 
-    # Пул потоков для синхронных операций
-    _thread_pool = ThreadPoolExecutor(max_workers=4)
+    # Итоги последних запусков по тегу запуска (LRU)
+    _report_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    REPORT_CACHE_SIZE = 256
+
+    # Выполняемые расчеты стратегий по тегу запуска
+    _strategy_runs = SingleFlight("strategy_runs")
+
+    # Блокировки сохранения результатов по тикеру (с циклом событий,
+    # в котором созданы)
+    _save_locks: Dict[str, Tuple[asyncio.AbstractEventLoop,
+                                 asyncio.Lock]] = {}
+
+    @staticmethod
+    def _save_lock(ticker: str) -> asyncio.Lock:
+        """Возвращает блокировку сохранения результатов тикера."""
+        loop = asyncio.get_running_loop()
+        entry = Facade._save_locks.get(ticker)
+        if entry is None or entry[0] is not loop:
+            entry = (loop, asyncio.Lock())
+            Facade._save_locks[ticker] = entry
+        return entry[1]
 
     @staticmethod
-    async def run_parsing(param: RequestParameters) -> str:
+    async def run_parsing(param: RequestParameters,
+                          source: Optional[CandleSource] = None,
+                          progress: Optional[ProgressReporter] = None
+                          ) -> str:
         """ Запускает парсер и сохраняет результат в базу данных.
 
         Args:
             param (RequestParameters): Параметры запроса.
+            source (Optional[CandleSource]): Источник свечей. По умолчанию
+                выбирается по настройкам.
+            progress (Optional[ProgressReporter]): Репортер прогресса.
         """
         ticker = param.ticker.upper()
 
-        # Запрос датафрэйма
-        parser = DataframeParser(param)
-        df = parser.fetch_data()
+        try:
+            # Страницы свечей запрашиваются и преобразуются в отдельном
+            # потоке, пока предыдущая страница записывается в БД
+            cost = period_days(param.start, param.end)
+            async with admission.admit("ingest", cost, progress):
+                if progress:
+                    progress.stage("saving")
+                parser = DataframeParser(param, source)
+                with timed_stage("ingesting"):
+                    await ingest_candles(parser.iter_pages(), ticker,
+                                         progress)
+            # Версия в памяти обновляется по строке БД под той же
+            # блокировкой, что и тег результатов
+            async with Facade._save_lock(ticker):
+                await data_versions.bump_candles(ticker)
+            await candle_cache.reload(ticker)
+        except Exception as e:
+            if progress:
+                progress.finish(error=str(e))
+            raise
 
-        # Преобразование DataFrame в список объектов StockCandle с str.
-        processed_df = converts_to_str(df)
+        if progress:
+            progress.finish()
+        result = f"Исторические данные {ticker} успешно загружены."
+        return result
 
-        # Функция для сохранения в БД
-        async def save_to_db():
-            async with DatabaseGateway() as gateway:
-                await gateway.saves_candles(processed_df, ticker)
+    @staticmethod
+    def calculate(candles: List[StockCandle], param: StrategyParameters,
+                  progress: Optional[ProgressReporter] = None,
+                  dates: Optional[DateIndex] = None,
+                  summary_only: bool = False
+                  ) -> Tuple[List[TradingResult], Dict[str, Any],
+                             List[Trade]]:
+        """
+        Синхронно рассчитывает стратегию по загруженным свечам.
 
-        # Сохранение в БД
-        await save_to_db()
+        Args:
+            candles (List[StockCandle]): Свечи акции.
+            param (StrategyParameters): Параметры стратегии.
+            progress (Optional[ProgressReporter]): Репортер прогресса.
+            dates (Optional[DateIndex]): Индекс дат свечей.
+            summary_only (bool): Нужны только итоги: строки результатов
+                по дням не создаются (для переборов параметров).
 
-        result = f"Исторические данные {ticker} успешно загружены."
-        return result
+        Returns:
+            Tuple[List[TradingResult], Dict[str, Any], List[Trade]]:
+                Результаты по дням (в режиме summary_only - пустой
+                список), итоговые результаты стратегии и журнал сделок.
+        """
+        # Инициализация StrategyCalculator
+        strategy_calculator = StrategyCalculator(param, summary_only)
+
+        # Расчет данных
+        results, transactions = strategy_calculator.calculates_data(
+            candles, progress, dates)
+
+        # Рассчет итогов
+        calc_result = CalculateResult()
+        final_result = calc_result.calculates_results(results, param,
+                                                      transactions)
+        if summary_only:
+            results = []
+        return results, final_result, strategy_calculator.trades
+
+    @staticmethod
+    async def report_tag(param: StrategyParameters) -> str:
+        """Возвращает тег запуска стратегии на текущих данных тикера."""
+        version = await data_versions.get(param.ticker)
+        return run_tag(param, version.candles)
+
+    @staticmethod
+    async def cached_report(param: StrategyParameters
+                            ) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает итоги запуска без расчета, если такой же запуск уже
+        выполнен на текущих данных и его результаты не перезаписаны.
+        """
+        tag = await Facade.report_tag(param)
+        version = await data_versions.get(param.ticker)
+        if version.results != tag or tag not in Facade._report_cache:
+            return None
+        Facade._report_cache.move_to_end(tag)
+        return Facade._report_cache[tag]
 
     @staticmethod
     async def run_trading_strategy(
-        param: StrategyParameters
+        param: StrategyParameters,
+        progress: Optional[ProgressReporter] = None
          ) -> Optional[Tuple[List[TradingResult], List[int]]]:
         """
         Запускает торговую стратегию и возвращает результаты.
 
         Args:
             param (StrategyParameters): Параметры стратегии.
+            progress (Optional[ProgressReporter]): Репортер прогресса.
 
         Returns:
             Optional[Tuple[List[TradingResult], List[int]]]: Результаты
                 расчетов и количество сделок.
         """
-        ticker = param.ticker.upper()
+        cached = await Facade.cached_report(param)
+        if cached is not None:
+            if progress:
+                progress.finish()
+            return cached
 
-        # Асинхронная загрузка данных из БД
-        async with DatabaseGateway() as gateway:
-            sql_data = await gateway.load_dataframe_history(ticker)
+        try:
+            tag = await Facade.report_tag(param)
+            # Одновременные запуски с тем же тегом ждут одного расчета
+            # и одной записи результатов
+            if progress and Facade._strategy_runs.in_flight(tag):
+                progress.stage("waiting")
+            final_result = await Facade._strategy_runs.run(
+                tag, lambda: Facade._compute_report(param, tag, progress))
+        except Exception as e:
+            if progress:
+                progress.finish(error=str(e))
+            raise
 
-        # Инициализация StrategyCalculator
-        strategy_calculator = StrategyCalculator(param)
+        if progress:
+            progress.finish()
+        return final_result
 
-        # Расчет данных
-        results, transactions = strategy_calculator.calculates_data(sql_data)
+    @staticmethod
+    async def _compute_report(param: StrategyParameters, tag: str,
+                              progress: Optional[ProgressReporter]
+                              ) -> Dict[str, Any]:
+        """
+        Рассчитывает стратегию, сохраняет результаты и возвращает итоги.
 
-        # Рассчет итогов
-        calc_result = CalculateResult()
-        final_result = calc_result.calculates_results(results, param,
-                                                      transactions)
+        Args:
+            param (StrategyParameters): Параметры стратегии.
+            tag (str): Тег запуска.
+            progress (Optional[ProgressReporter]): Репортер прогресса
+                запуска, начавшего расчет.
+        """
+        ticker = param.ticker.upper()
+        cost = await admission.candle_count(ticker)
+
+        # Свечи, результаты и журнал сделок находятся в памяти только
+        # у допущенных расчетов
+        async with admission.admit("report", cost, progress):
+            # Свечи из кэша или из БД
+            if progress:
+                progress.stage("loading")
+            with timed_stage("loading"):
+                series = await candle_cache.get(ticker)
+                sql_data = series.candles()
+
+            # Расчет стратегии и итогов в пуле расчетов, чтобы не
+            # блокировать цикл событий на время бэктеста
+            if progress:
+                progress.stage("calculating", len(sql_data))
+            with timed_stage("calculating"):
+                results, final_result, trades = await compute_pool.run(
+                    Facade.calculate, sql_data, param, progress=progress,
+                    dates=series.dates)
 
-        # Асинхронное сохранение результатов
-        async with DatabaseGateway() as gateway:
-            await gateway.saves_results(results, ticker)
+            # Асинхронное сохранение результатов
+            if progress:
+                progress.stage("saving", len(results))
+            with timed_stage("saving"):
+                # Строки и тег запуска записываются одной транзакцией,
+                # а тег в памяти обновляется под блокировкой тикера,
+                # чтобы одновременные запуски не поменяли их порядок
+                async with Facade._save_lock(ticker):
+                    async with DatabaseGateway() as gateway:
+                        await gateway.saves_report(results, trades,
+                                                   ticker, tag)
+                    data_versions.mark_results(ticker, tag)
 
-        async with DatabaseGateway() as gateway:
-            await gateway.saves_calculations(final_result, ticker)
+                async with DatabaseGateway() as gateway:
+                    await gateway.saves_calculations(final_result, ticker)
 
+        Facade._report_cache[tag] = final_result
+        if len(Facade._report_cache) > Facade.REPORT_CACHE_SIZE:
+            Facade._report_cache.popitem(last=False)
         return final_result
+
+    @staticmethod
+    async def run_rolling_analysis(
+        param: StrategyParameters,
+        step: int = 1,
+        progress: Optional[ProgressReporter] = None,
+        fill: Optional[FillModel] = None
+         ) -> Dict[str, Any]:
+        """
+        Запускает стратегию с каждой step-й даты начала истории тикера.
+
+        Args:
+            param (StrategyParameters): Параметры стратегии.
+            step (int): Шаг дат начала в торговых днях.
+            progress (Optional[ProgressReporter]): Репортер прогресса.
+            fill (Optional[FillModel]): Модель исполнения с учетом
+                объема и проскальзывания.
+
+        Returns:
+            Dict[str, Any]: Запуски по датам начала и распределение
+                доходности и просадки.
+        """
+        ticker = param.ticker.upper()
+
+        try:
+            # Стоимость: свечи x количество дат начала
+            candles = await admission.candle_count(ticker)
+            cost = candles * -(-candles // step)
+            async with admission.admit("rolling", cost, progress):
+                if progress:
+                    progress.stage("loading")
+                with timed_stage("loading"):
+                    series = await candle_cache.get(ticker)
+                    sql_data = series.candles()
+
+                if progress:
+                    progress.stage("calculating", len(sql_data))
+                with timed_stage("calculating"):
+                    result = await compute_pool.run(
+                        rolling_sweep, sql_data, param, step,
+                        progress=progress, dates=series.dates, fill=fill)
+        except Exception as e:
+            if progress:
+                progress.finish(error=str(e))
+            raise
+
+        if progress:
+            progress.finish()
+        return result
@@ -0,0 +1,168 @@
+"""
+Содержит потоковую загрузку истории свечей в базу данных: страницы
+свечей запрашиваются в отдельном потоке, преобразуются по колонкам
+и записываются каждая своей транзакцией, пока запрашивается следующая.
+В памяти одновременно находится не больше нескольких страниц.
+"""
+
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, TypeVar
+
+from trading_strategy_tester.config import settings
+from trading_strategy_tester.services.candle_sources import CANDLE_COLUMNS
+from trading_strategy_tester.services.database_gateway import DatabaseGateway
+from trading_strategy_tester.services.progress import ProgressReporter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Колонки цен и объемов, которые хранятся в БД строками
+PRICE_COLUMNS = ("open", "close", "high", "low", "value", "volume")
+
+_DONE = object()
+
+
+def regroup(pages: Iterable[List[T]], size: int) -> Iterator[List[T]]:
+    """Объединяет страницы источника в страницы по size строк."""
+    buffer: List[T] = []
+    for page in pages:
+        buffer.extend(page)
+        while len(buffer) >= size:
+            yield buffer[:size]
+            del buffer[:size]
+    if buffer:
+        yield buffer
+
+
+def _timestamp(value) -> str:
+    """Приводит дату свечи к виду 'YYYY-MM-DD HH:MM:SS'."""
+    if isinstance(value, str) and len(value) == 19:
+        return value
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(str(value))
+    return value.isoformat(sep=" ", timespec="seconds")
+
+
+def candle_rows(page: List[list]) -> List[tuple]:
+    """
+    Преобразует страницу строк ISS в параметры вставки таблицы свечей.
+
+    Преобразование выполняется по колонкам: каждая колонка страницы
+    обрабатывается одним вызовом map без создания объектов свечей.
+
+    Args:
+        page (List[list]): Строки в порядке колонок CANDLE_COLUMNS.
+
+    Returns:
+        List[tuple]: Строки (open, close, high, low, value, volume,
+            begin, end).
+    """
+    if not page:
+        return []
+    columns = list(zip(*page))
+    converted = [list(map(str, columns[CANDLE_COLUMNS.index(name)]))
+                 for name in PRICE_COLUMNS]
+    converted += [list(map(_timestamp, columns[CANDLE_COLUMNS.index(name)]))
+                  for name in ("begin", "end")]
+    return list(zip(*converted))
+
+
+async def stream_pages(pages: Iterable[T],
+                       max_pending: int = 2) -> AsyncIterator[T]:
+    """
+    Отдает элементы синхронного итератора, который выполняется
+    в отдельном потоке.
+
+    Поток запрашивает следующие элементы, пока потребитель обрабатывает
+    текущий; очередь ограничена max_pending элементами, при ее
+    заполнении поток ждет. Исключение итератора передается потребителю.
+    Если потребитель прекращает чтение, поток останавливается.
+
+    Args:
+        pages (Iterable[T]): Синхронный итератор (например, страницы
+            сетевого ответа).
+        max_pending (int): Размер очереди.
+
+    Yields:
+        T: Очередной элемент.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(max(1, max_pending))
+    stop = threading.Event()
+
+    def put(item) -> None:
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def produce() -> None:
+        try:
+            for page in pages:
+                if stop.is_set():
+                    return
+                put((page, None))
+            item = (_DONE, None)
+        except Exception as e:
+            item = (_DONE, e)
+        if not stop.is_set():
+            put(item)
+
+    thread = threading.Thread(target=produce, name="candle-pages",
+                              daemon=True)
+    thread.start()
+    try:
+        while True:
+            page, error = await queue.get()
+            if page is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield page
+    finally:
+        stop.set()
+        # Освобождает место в очереди, если поток ждет записи
+        while not queue.empty():
+            queue.get_nowait()
+
+
+async def ingest_candles(pages: Iterable[List[list]], ticker: str,
+                         progress: Optional[ProgressReporter] = None,
+                         page_rows: Optional[int] = None,
+                         max_pending: Optional[int] = None) -> int:
+    """
+    Загружает страницы свечей в таблицу {ticker}_dataframe.
+
+    Страницы пишутся во временную таблицу, каждая своей транзакцией;
+    после последней страницы временная таблица заменяет прежнюю, так
+    что читатели видят либо старую, либо полную новую историю.
+
+    Args:
+        pages (Iterable[List[list]]): Страницы строк ISS источника.
+        ticker (str): Тикер акции.
+        progress (Optional[ProgressReporter]): Репортер прогресса.
+        page_rows (Optional[int]): Свечей в одной транзакции.
+        max_pending (Optional[int]): Страниц в очереди на запись.
+
+    Returns:
+        int: Количество сохраненных свечей.
+
+    Raises:
+        ValueError: Если источник не вернул свечей.
+    """
+    page_rows = page_rows or settings.ingest_page_rows
+    max_pending = max_pending or settings.ingest_queue_pages
+    # Страница преобразуется в потоке загрузки, пока пишется предыдущая
+    converted = map(candle_rows, regroup(pages, page_rows))
+
+    async with DatabaseGateway() as gateway:
+        saved = 0
+        async with gateway.candle_writer(ticker) as write_page:
+            async for rows in stream_pages(converted, max_pending):
+                await write_page(rows)
+                saved += len(rows)
+                if progress:
+                    progress.update(saved)
+    logger.info("Загружено %s свечей %s", saved, ticker)
+    return saved
@@ -0,0 +1,301 @@
+"""
+Содержит векторизованный движок пакетного расчета стратегии.
+
+Движок считает одновременно много независимых запусков стратегии
+("дорожек") на одном ряду свечей: у каждой дорожки свой день начала,
+цены покупки и продажи. Один проход по дням обновляет состояние всех
+начавшихся дорожек операциями numpy, поэтому перебор всех дат начала
+стоит O(дней) векторных шагов вместо O(дней²) вызовов
+StrategyCalculator.calculates_data.
+
+Правила сделок повторяют StrategyCalculator: покупка на весь кэш при
+минимуме дня не выше цены покупки (с тем же подбором количества при
+нехватке на комиссию и подсчетом покупок), продажа всех акций при
+максимуме дня не ниже цены продажи, в том числе в день покупки, налог
+с продажи списывается из кэша в первый день с 20 декабря, итоговый
+капитал - общий результат последней строки. Расчет ведется во float64
+с округлением до копеек там же, где округляет калькулятор. Калькулятор
+считает в Decimal с точностью 10 значащих цифр, поэтому суммы
+отдельных запусков могут отличаться на копейку (когда сумма близка
+к половине копейки). Доходность в процентах rolling_sweep считает
+в Decimal из целых копеек, и при равных суммах она совпадает
+с CalculateResult.
+
+С моделью исполнения (FillModel) сделки ограничены ликвидностью:
+за свечу дорожка исполняет не больше заданной доли объема свечи, цены
+исполнения смещены на проскальзывание. Неисполненный остаток заявки
+переносится на следующие свечи, на которых цена достигает ее уровня.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from trading_strategy_tester.models.date_index import DateIndex
+from trading_strategy_tester.models.fill_model import FillModel
+from trading_strategy_tester.models.stock_candle import StockCandle
+from trading_strategy_tester.services.progress import ProgressReporter
+
+
+def round_money(values: np.ndarray) -> np.ndarray:
+    """Округляет суммы до копеек (банковское округление)."""
+    return np.round(values, 2)
+
+
+@dataclass
+class CandleArrays:
+    """
+    Свечи тикера в виде массивов для векторных расчетов.
+
+    Атрибуты:
+        dates (List[str]): Даты в формате 'YYYY-MM-DD'.
+        ordinals (np.ndarray): Порядковые номера дат (date.toordinal).
+        low (np.ndarray): Минимальные цены.
+        high (np.ndarray): Максимальные цены.
+        close (np.ndarray): Цены закрытия.
+        volume (np.ndarray): Объем свечи в штуках.
+        year (np.ndarray): Год даты.
+        tax_day (np.ndarray): День, в который списывается налог за год
+            (с 20 по 31 декабря).
+    """
+    dates: List[str]
+    ordinals: np.ndarray
+    low: np.ndarray
+    high: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+    year: np.ndarray
+    tax_day: np.ndarray
+
+    @classmethod
+    def from_candles(cls, candles: Sequence[StockCandle],
+                     index: Optional[DateIndex] = None) -> "CandleArrays":
+        """Создает массивы из свечей, загруженных из БД.
+
+        Args:
+            candles (Sequence[StockCandle]): Свечи.
+            index (Optional[DateIndex]): Индекс дат свечей; если не
+                передан, строится по датам свечей.
+        """
+        if index is None:
+            index = DateIndex.from_begins(c.begin for c in candles)
+        return cls(
+            dates=list(index.dates),
+            ordinals=np.array(index.ordinals, dtype=np.int64),
+            low=np.array([float(c.low) for c in candles]),
+            high=np.array([float(c.high) for c in candles]),
+            close=np.array([float(c.close) for c in candles]),
+            volume=np.array([float(c.volume) for c in candles]),
+            year=np.array(index.year, dtype=np.int64),
+            tax_day=np.array(index.tax_day, dtype=bool),
+        )
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+
+@dataclass
+class LaneResults:
+    """
+    Итоги дорожек (в порядке, в котором дорожки переданы в движок).
+
+    Атрибуты:
+        start (np.ndarray): Индекс дня начала.
+        first_overall (np.ndarray): Общий результат первой строки.
+        final_overall (np.ndarray): Общий результат последней строки.
+        final_cache (np.ndarray): Итоговый кэш после вычета налога.
+        share_count (np.ndarray): Количество акций на конец периода.
+        buy_count (np.ndarray): Количество покупок.
+        sell_count (np.ndarray): Количество продаж.
+        comiss_sum (np.ndarray): Сумма комиссии.
+        total_tax (np.ndarray): Сумма налога.
+        max_drawdown (np.ndarray): Максимальная просадка общего
+            результата на конец дня, доля от предыдущего максимума.
+    """
+    start: np.ndarray
+    first_overall: np.ndarray
+    final_overall: np.ndarray
+    final_cache: np.ndarray
+    share_count: np.ndarray
+    buy_count: np.ndarray
+    sell_count: np.ndarray
+    comiss_sum: np.ndarray
+    total_tax: np.ndarray
+    max_drawdown: np.ndarray
+
+
+class LaneEngine:
+    """Пакетный расчет стратегии для множества дорожек."""
+
+    def __init__(self, candles: CandleArrays):
+        self.candles = candles
+
+    def run(self, start: Sequence[int], buy_price: Sequence[float],
+            sell_price: Sequence[float], initial_cache: float,
+            commission_rate: float, tax_rate: float,
+            progress: Optional[ProgressReporter] = None,
+            fill: Optional[FillModel] = None) -> LaneResults:
+        """
+        Рассчитывает дорожки от дня начала до последнего дня ряда.
+
+        Без модели исполнения заявки исполняются полностью по цене
+        заявки, как в StrategyCalculator. С моделью количество сделки
+        ограничено оставшейся долей объема свечи (покупка и продажа
+        в одну свечу расходуют общую долю), покупки и продажи считаются
+        только по свечам с исполнением, налог - с разницы цен
+        исполнения.
+
+        Args:
+            start: Индекс дня начала каждой дорожки.
+            buy_price: Цена покупки каждой дорожки.
+            sell_price: Цена продажи каждой дорожки.
+            initial_cache: Начальный кэш.
+            commission_rate: Ставка комиссии.
+            tax_rate: Ставка налога.
+            progress: Репортер прогресса (по дням).
+            fill: Модель исполнения с учетом объема и проскальзывания.
+
+        Returns:
+            LaneResults: Итоги дорожек.
+        """
+        c = self.candles
+        start = np.asarray(start, dtype=np.int64)
+        # Дорожки упорядочиваются по дню начала: в день t активны первые
+        # active дорожек, и шаг работает со срезами без масок активности.
+        order = np.argsort(start, kind="stable")
+        start_sorted = start[order]
+        buy = np.asarray(buy_price, dtype=np.float64)[order]
+        sell = np.asarray(sell_price, dtype=np.float64)[order]
+        lanes = len(start)
+
+        cash = np.full(lanes, float(initial_cache))
+        shares = np.zeros(lanes)
+        comiss = np.zeros(lanes)
+        tax_sum = np.zeros(lanes)
+        total_tax = np.zeros(lanes)
+        buy_count = np.zeros(lanes, dtype=np.int64)
+        sell_count = np.zeros(lanes, dtype=np.int64)
+        first_overall = np.zeros(lanes)
+        peak = np.zeros(lanes)
+        max_drawdown = np.zeros(lanes)
+        taxed_year = np.full(lanes, -1, dtype=np.int64)
+        equity = np.zeros(lanes)
+        # Цены исполнения (с проскальзыванием) и предел количества
+        # за свечу; без модели предел не ограничивает сделки
+        slippage = fill.slippage if fill is not None else 0.0
+        buy_fill = buy * (1 + slippage)
+        sell_fill = sell * (1 - slippage)
+        if fill is not None:
+            volume_cap = np.floor(c.volume * fill.participation)
+        room = np.zeros(lanes)
+        sell_profit = (sell_fill - buy_fill) * tax_rate
+
+        days = len(c)
+        step = ProgressReporter.step_for(days)
+        first_day = int(start_sorted[0]) if lanes else days
+        for t in range(first_day, days):
+            if progress is not None and t % step == 0:
+                progress.update(t, days)
+            active = int(np.searchsorted(start_sorted, t, side="right"))
+            begun = int(np.searchsorted(start_sorted, t, side="left"))
+            a = slice(0, active)
+            low, high, close = c.low[t], c.high[t], c.close[t]
+            lane_cash, lane_buy = cash[a], buy_fill[a]
+            if fill is not None:
+                room[a] = volume_cap[t]
+
+            # Покупка на весь кэш
+            can_buy = (lane_cash >= lane_buy) & (buy[a] >= low)
+            if can_buy.any():
+                idx = np.nonzero(can_buy)[0]
+                b = lane_buy[idx]
+                money = lane_cash[idx]
+                count = np.floor(money / b)
+                count += (count + 1) * b <= money
+                count -= count * b > money
+                comm = count * b * commission_rate
+                # Как в калькуляторе: при нехватке кэша на комиссию
+                # количество уменьшается при неизменной комиссии
+                short = money < count * b + comm
+                if short.any():
+                    reduced = np.clip(
+                        np.floor((money - comm) / b), 0, count)
+                    reduced -= (reduced > 0) & (
+                        money < reduced * b + comm)
+                    count = np.where(short, reduced, count)
+                    comm = np.where(short, count * b * commission_rate,
+                                    comm)
+                if fill is not None:
+                    # Остаток заявки исполняется на следующих свечах
+                    capped = count > room[idx]
+                    count = np.where(capped, room[idx], count)
+                    comm = np.where(capped, count * b * commission_rate,
+                                    comm)
+                    room[idx] -= count
+                    buy_count[idx] += count > 0
+                else:
+                    buy_count[idx] += 1
+                cash[idx] = money - count * b - comm
+                shares[idx] += count
+                comiss[idx] += comm
+
+            # Первая строка дорожки - после покупки в день начала
+            if active > begun:
+                new = slice(begun, active)
+                first_overall[new] = round_money(
+                    shares[new] * close + cash[new])
+
+            # Продажа всех акций, в том числе купленных в этот день
+            can_sell = (sell[a] <= high) & (shares[a] > 0)
+            if fill is not None:
+                can_sell &= room[a] > 0
+            if can_sell.any():
+                idx = np.nonzero(can_sell)[0]
+                count = shares[idx]
+                if fill is not None:
+                    count = np.minimum(count, room[idx])
+                proceeds = count * sell_fill[idx]
+                comm = proceeds * commission_rate
+                tax = round_money(sell_profit[idx] * count)
+                cash[idx] += proceeds - comm
+                comiss[idx] += comm
+                tax_sum[idx] += tax
+                total_tax[idx] += tax
+                shares[idx] -= count
+                sell_count[idx] += 1
+
+            # Общий результат на конец дня и просадка
+            np.multiply(shares[a], close, out=equity[a])
+            equity[a] += cash[a]
+            np.maximum(peak[a], equity[a], out=peak[a])
+            drawdown = np.divide(peak[a] - equity[a], peak[a],
+                                 out=np.zeros(active), where=peak[a] > 0)
+            np.maximum(max_drawdown[a], drawdown, out=max_drawdown[a])
+
+            # Налог за год списывается после строк дня
+            if c.tax_day[t]:
+                year = c.year[t]
+                due = taxed_year[a] != year
+                idx = np.nonzero(due)[0]
+                cash[idx] -= tax_sum[idx]
+                tax_sum[idx] = 0
+                taxed_year[idx] = year
+
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(lanes)
+        final_overall = round_money(equity)
+        # Остаток налога вычитается из кэша последней строки
+        final_cache = round_money(cash) - round_money(tax_sum)
+        return LaneResults(
+            start=start,
+            first_overall=first_overall[inverse],
+            final_overall=final_overall[inverse],
+            final_cache=final_cache[inverse],
+            share_count=shares[inverse].astype(np.int64),
+            buy_count=buy_count[inverse],
+            sell_count=sell_count[inverse],
+            comiss_sum=round_money(comiss)[inverse],
+            total_tax=round_money(total_tax)[inverse],
+            max_drawdown=max_drawdown[inverse],
+        )
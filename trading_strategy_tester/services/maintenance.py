@@ -0,0 +1,304 @@
+"""
+Содержит обслуживание базы данных: хранение итогов по сроку и количеству,
+бюджет размера с вытеснением давно не использованных тикеров,
+инкрементальный VACUUM и ANALYZE по расписанию.
+"""
+
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import aiosqlite
+
+from trading_strategy_tester.config import settings
+from trading_strategy_tester.services.candle_cache import candle_cache
+from trading_strategy_tester.services.database_gateway import (
+    SUMMARIES_TABLE, TICKER_TABLE_SUFFIXES, VERSIONS_TABLE, DatabaseGateway)
+from trading_strategy_tester.services.data_versions import data_versions
+from trading_strategy_tester.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ACCESS_TABLE = "table_access"
+
+# Значение PRAGMA auto_vacuum для режима INCREMENTAL
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+class DatabaseMaintenance:
+    """Обслуживание базы данных тестера торговых стратегий."""
+
+    def __init__(self, keep_last: Optional[int] = None,
+                 max_age_days: Optional[int] = None,
+                 size_budget_mb: Optional[int] = None):
+        """
+        Args:
+            keep_last (Optional[int]): Сколько последних итогов хранить
+                на тикер (0 - без ограничения).
+            max_age_days (Optional[int]): Удалять итоги старше N дней
+                (0 - без ограничения).
+            size_budget_mb (Optional[int]): Бюджет размера БД в МБ
+                (0 - без ограничения).
+        """
+        self.keep_last = (settings.retention_keep_last
+                          if keep_last is None else keep_last)
+        self.max_age_days = (settings.retention_max_age_days
+                             if max_age_days is None else max_age_days)
+        self.size_budget_mb = (settings.db_size_budget_mb
+                               if size_budget_mb is None else size_budget_mb)
+
+    @staticmethod
+    async def _tables(conn: aiosqlite.Connection, suffix: str) -> List[str]:
+        """Возвращает имена таблиц тикеров с заданным суффиксом."""
+        cursor = await conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' "
+            "AND name LIKE ? ESCAPE '\\'", (f"%\\_{suffix}",))
+        return [row[0] for row in await cursor.fetchall()]
+
+    @staticmethod
+    async def _has_table(conn: aiosqlite.Connection, name: str) -> bool:
+        """Проверяет существование таблицы."""
+        async with conn.cursor() as cursor:
+            return await DatabaseGateway._table_exists(cursor, name)
+
+    async def ensure_incremental_vacuum(self,
+                                        conn: aiosqlite.Connection) -> None:
+        """
+        Переводит БД в режим auto_vacuum=INCREMENTAL.
+        Для существующей БД требуется однократный полный VACUUM.
+        """
+        cursor = await conn.execute("PRAGMA auto_vacuum")
+        if (await cursor.fetchone())[0] != AUTO_VACUUM_INCREMENTAL:
+            logger.info("Перевод БД в режим инкрементального VACUUM")
+            await conn.execute(
+                f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+            await conn.execute("VACUUM")
+
+    async def flush_access_times(self, conn: aiosqlite.Connection) -> None:
+        """Сохраняет время обращений к тикерам из памяти в таблицу."""
+        await conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {ACCESS_TABLE} (
+            ticker TEXT PRIMARY KEY,
+            last_access REAL NOT NULL
+        )
+        """)
+        access = list(DatabaseGateway.last_access.items())
+        if access:
+            await conn.executemany(
+                f"INSERT INTO {ACCESS_TABLE} (ticker, last_access) "
+                f"VALUES (?, ?) ON CONFLICT(ticker) DO UPDATE SET "
+                f"last_access = max(last_access, excluded.last_access)",
+                access)
+        await conn.commit()
+
+    async def apply_retention(self, conn: aiosqlite.Connection) -> int:
+        """
+        Удаляет итоги сверх keep_last на тикер и старше max_age_days.
+
+        Returns:
+            int: Количество удаленных строк.
+        """
+        if not self.keep_last and not self.max_age_days:
+            return 0
+
+        deleted = 0
+        tables = await self._tables(conn, "calculations")
+        await conn.execute("BEGIN IMMEDIATE")
+        try:
+            for table in tables:
+                deleted += await self._trim(conn, table, "", ())
+            if await self._has_table(conn, SUMMARIES_TABLE):
+                cursor = await conn.execute(
+                    f"SELECT DISTINCT ticker FROM {SUMMARIES_TABLE}")
+                for (ticker,) in await cursor.fetchall():
+                    deleted += await self._trim(
+                        conn, SUMMARIES_TABLE, "ticker = ?", (ticker,))
+            await conn.commit()
+        except aiosqlite.Error:
+            await conn.rollback()
+            raise
+
+        metrics.inc("maintenance_retention_deleted_rows", deleted)
+        return deleted
+
+    async def _trim(self, conn: aiosqlite.Connection, table: str,
+                    where: str, params: tuple) -> int:
+        """Применяет правила хранения к одной таблице итогов."""
+        deleted = 0
+        scope = f"AND {where}" if where else ""
+        if self.max_age_days:
+            cursor = await conn.execute(
+                f"DELETE FROM {table} WHERE created_at < datetime('now', ?) "
+                f"{scope}", (f"-{self.max_age_days} days", *params))
+            deleted += cursor.rowcount
+        if self.keep_last:
+            cursor = await conn.execute(
+                f"DELETE FROM {table} WHERE 1 {scope} AND id NOT IN ("
+                f"SELECT id FROM {table} WHERE 1 {scope} "
+                f"ORDER BY created_at DESC, id DESC LIMIT ?)",
+                (*params, *params, self.keep_last))
+            deleted += cursor.rowcount
+        return deleted
+
+    @staticmethod
+    async def incremental_vacuum(conn: aiosqlite.Connection) -> None:
+        """
+        Возвращает свободные страницы файловой системе.
+        PRAGMA освобождает одну страницу за шаг, поэтому выполняется
+        через executescript, который проходит все шаги.
+        """
+        await conn.executescript("PRAGMA incremental_vacuum;")
+
+    @staticmethod
+    async def used_bytes(conn: aiosqlite.Connection) -> int:
+        """Возвращает объем занятых страниц БД в байтах."""
+        page_count = (await (await conn.execute(
+            "PRAGMA page_count")).fetchone())[0]
+        freelist = (await (await conn.execute(
+            "PRAGMA freelist_count")).fetchone())[0]
+        page_size = (await (await conn.execute(
+            "PRAGMA page_size")).fetchone())[0]
+        return (page_count - freelist) * page_size
+
+    async def enforce_size_budget(self, conn: aiosqlite.Connection
+                                  ) -> List[str]:
+        """
+        Вытесняет данные тикеров в порядке давности последнего обращения,
+        пока занятый объем БД превышает бюджет.
+
+        Returns:
+            List[str]: Вытесненные тикеры.
+        """
+        if not self.size_budget_mb:
+            return []
+
+        budget = self.size_budget_mb * 1024 * 1024
+        if await self.used_bytes(conn) <= budget:
+            return []
+
+        tickers = set()
+        for suffix in TICKER_TABLE_SUFFIXES:
+            for table in await self._tables(conn, suffix):
+                tickers.add(table[:-len(suffix) - 1].upper())
+        cursor = await conn.execute(
+            f"SELECT ticker, last_access FROM {ACCESS_TABLE}")
+        access = dict(await cursor.fetchall())
+        # Тикеры без отметок обращения вытесняются первыми
+        candidates = sorted(tickers, key=lambda t: access.get(t, 0.0))
+
+        evicted = []
+        for ticker in candidates:
+            if await self.used_bytes(conn) <= budget:
+                break
+            await self.evict_ticker(conn, ticker)
+            evicted.append(ticker)
+
+        if evicted:
+            logger.warning("Превышен бюджет размера БД, вытеснены: %s",
+                           ", ".join(evicted))
+            metrics.inc("maintenance_evicted_tickers", len(evicted))
+        return evicted
+
+    async def evict_ticker(self, conn: aiosqlite.Connection,
+                           ticker: str) -> None:
+        """Удаляет все таблицы и итоги тикера и освобождает страницы."""
+        await conn.execute("BEGIN IMMEDIATE")
+        try:
+            for suffix in TICKER_TABLE_SUFFIXES:
+                await conn.execute(
+                    f"DROP TABLE IF EXISTS {ticker.lower()}_{suffix}")
+            if await self._has_table(conn, SUMMARIES_TABLE):
+                await conn.execute(
+                    f"DELETE FROM {SUMMARIES_TABLE} WHERE ticker = ?",
+                    (ticker,))
+            await conn.execute(
+                f"DELETE FROM {ACCESS_TABLE} WHERE ticker = ?", (ticker,))
+            if await self._has_table(conn, VERSIONS_TABLE):
+                # Версия не сбрасывается, чтобы ранее выданные ETag
+                # не совпали с данными, загруженными заново
+                await conn.execute(
+                    f"UPDATE {VERSIONS_TABLE} SET candles_version = "
+                    f"candles_version + 1, results_tag = NULL "
+                    f"WHERE ticker = ?", (ticker,))
+            await conn.commit()
+        except aiosqlite.Error:
+            await conn.rollback()
+            raise
+        DatabaseGateway.last_access.pop(ticker, None)
+        data_versions.invalidate(ticker)
+        candle_cache.invalidate(ticker)
+        await self.incremental_vacuum(conn)
+
+    async def collect_stats(self, conn: aiosqlite.Connection,
+                            db_path: Path) -> Dict[str, Any]:
+        """
+        Собирает размер и фрагментацию БД и публикует их в метриках.
+
+        Returns:
+            Dict[str, Any]: Размер файлов, количество страниц и доля
+                свободных страниц.
+        """
+        page_count = (await (await conn.execute(
+            "PRAGMA page_count")).fetchone())[0]
+        freelist = (await (await conn.execute(
+            "PRAGMA freelist_count")).fetchone())[0]
+        page_size = (await (await conn.execute(
+            "PRAGMA page_size")).fetchone())[0]
+        wal_path = db_path.with_name(db_path.name + "-wal")
+        stats = {
+            "db_file_bytes": db_path.stat().st_size if db_path.exists()
+            else 0,
+            "db_wal_bytes": wal_path.stat().st_size if wal_path.exists()
+            else 0,
+            "db_page_size": page_size,
+            "db_page_count": page_count,
+            "db_freelist_pages": freelist,
+            "db_used_bytes": (page_count - freelist) * page_size,
+            "db_fragmentation": round(freelist / page_count, 4)
+            if page_count else 0.0,
+        }
+        for name, value in stats.items():
+            metrics.set_gauge(name, value)
+        return stats
+
+    async def run_once(self) -> Dict[str, Any]:
+        """
+        Выполняет полный цикл обслуживания.
+
+        Returns:
+            Dict[str, Any]: Результаты обслуживания и статистика БД.
+        """
+        async with DatabaseGateway() as gateway:
+            conn = gateway.conn
+            await self.ensure_incremental_vacuum(conn)
+            await self.flush_access_times(conn)
+            deleted = await self.apply_retention(conn)
+            evicted = await self.enforce_size_budget(conn)
+            await self.incremental_vacuum(conn)
+            await conn.execute("ANALYZE")
+            await conn.commit()
+            # Перенос WAL в основной файл, чтобы размер файла был актуален
+            await conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            stats = await self.collect_stats(conn, gateway.db_path)
+
+        metrics.inc("maintenance_runs")
+        logger.info("Обслуживание БД: удалено итогов %s, вытеснено "
+                    "тикеров %s", deleted, len(evicted))
+        return {"retention_deleted": deleted, "evicted": evicted, **stats}
+
+    async def run_forever(self, interval: float) -> None:
+        """Периодически выполняет обслуживание до отмены задачи."""
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:  # сбой обслуживания не роняет сервер
+                logger.exception("Ошибка обслуживания БД: %s", e)
+            await asyncio.sleep(interval)
+
+
+async def refresh_db_stats() -> Dict[str, Any]:
+    """Обновляет метрики размера и фрагментации БД."""
+    async with DatabaseGateway() as gateway:
+        return await DatabaseMaintenance().collect_stats(
+            gateway.conn, gateway.db_path)
@@ -0,0 +1,50 @@
+"""
+Содержит простой реестр метрик приложения (счетчики, значения,
+распределения), доступный через /api/metrics.
+"""
+
+import threading
+from typing import Any, Dict
+
+
+class Metrics:
+    """Потокобезопасный реестр метрик процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, Any] = {}
+        self._observations: Dict[str, Dict[str, float]] = {}
+
+    def inc(self, name: str, value: float = 1) -> None:
+        """Увеличивает счетчик."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: Any) -> None:
+        """Устанавливает текущее значение."""
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        """Добавляет наблюдение (количество, сумма, максимум)."""
+        with self._lock:
+            stats = self._observations.setdefault(
+                name, {"count": 0, "sum": 0.0, "max": 0.0})
+            stats["count"] += 1
+            stats["sum"] += value
+            stats["max"] = max(stats["max"], value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Возвращает копию всех метрик."""
+        with self._lock:
+            observations = {
+                name: dict(stats, avg=stats["sum"] / stats["count"])
+                for name, stats in self._observations.items()
+            }
+            return {"counters": dict(self._counters),
+                    "gauges": dict(self._gauges),
+                    "observations": observations}
+
+
+metrics = Metrics()
@@ -0,0 +1,157 @@
+"""
+Содержит классы для публикации событий прогресса длительных операций
+и доставки их подписчикам (Server-Sent Events).
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ProgressEvent = Dict[str, Any]
+
+# Сколько секунд хранится последнее событие завершенной задачи
+DONE_EVENT_TTL = 60.0
+
+
+class ProgressReporter:
+    """
+    Публикует события прогресса одной задачи.
+
+    Обновления прореживаются: вызывающий код передает их не чаще, чем
+    раз в step_for(total) строк, а репортер дополнительно отбрасывает
+    обновления, пришедшие раньше min_interval секунд после предыдущего.
+    """
+
+    def __init__(self, task_id: str, sink: Callable[[ProgressEvent], None],
+                 min_interval: float = 0.2):
+        """
+        Args:
+            task_id (str): Идентификатор задачи.
+            sink (Callable): Получатель событий.
+            min_interval (float): Минимальный интервал между обновлениями.
+        """
+        self.task_id = task_id
+        self.sink = sink
+        self.min_interval = min_interval
+        self.stage_name = ""
+        self._stage_started = time.monotonic()
+        self._last_emit = 0.0
+
+    @staticmethod
+    def step_for(total: int, samples: int = 100) -> int:
+        """Возвращает шаг в строках, с которым стоит вызывать update()."""
+        return max(1, total // samples)
+
+    def _emit(self, **fields) -> None:
+        event = {"task_id": self.task_id, "stage": self.stage_name}
+        event.update(fields)
+        try:
+            self.sink(event)
+        except Exception as e:  # прогресс не должен ломать расчет
+            logger.warning("Ошибка публикации прогресса: %s", e)
+
+    def stage(self, name: str, total: Optional[int] = None) -> None:
+        """Сообщает о начале нового этапа."""
+        self.stage_name = name
+        self._stage_started = time.monotonic()
+        self._last_emit = self._stage_started
+        self._emit(processed=0, total=total, done=False)
+
+    def update(self, processed: int, total: Optional[int] = None) -> None:
+        """Сообщает о количестве обработанных строк текущего этапа."""
+        now = time.monotonic()
+        if now - self._last_emit < self.min_interval:
+            return
+        self._last_emit = now
+        elapsed = now - self._stage_started
+        eta = None
+        if total and processed:
+            eta = round(elapsed * (total - processed) / processed, 2)
+        self._emit(processed=processed, total=total,
+                   percent=round(100 * processed / total, 1) if total
+                   else None,
+                   elapsed_s=round(elapsed, 2), eta_s=eta, done=False)
+
+    def finish(self, error: Optional[str] = None) -> None:
+        """Сообщает о завершении задачи."""
+        self._emit(done=True, error=error)
+
+
+class ProgressHub:
+    """
+    Принимает события прогресса из любых потоков и раздает их
+    асинхронным подписчикам в цикле событий приложения.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._last: Dict[str, ProgressEvent] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def reporter(self, task_id: str) -> ProgressReporter:
+        """
+        Создает репортер задачи. Вызывается из цикла событий.
+        """
+        self._loop = asyncio.get_running_loop()
+        return ProgressReporter(task_id, self.publish)
+
+    def publish(self, event: ProgressEvent) -> None:
+        """Публикует событие. Потокобезопасен."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._dispatch(event)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, event)
+
+    def _dispatch(self, event: ProgressEvent) -> None:
+        task_id = event["task_id"]
+        self._last[task_id] = event
+        for queue in self._subscribers.get(task_id, []):
+            queue.put_nowait(event)
+        if event.get("done"):
+            self._loop.call_later(DONE_EVENT_TTL, self._last.pop,
+                                  task_id, None)
+
+    async def subscribe(self, task_id: str,
+                        keepalive: float = 15.0
+                        ) -> AsyncIterator[Optional[ProgressEvent]]:
+        """
+        Возвращает события задачи до завершения.
+
+        Если событий нет дольше keepalive секунд, возвращает None,
+        чтобы вызывающий код мог отправить keep-alive.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(task_id, []).append(queue)
+        try:
+            last = self._last.get(task_id)
+            if last is not None:
+                yield last
+                if last.get("done"):
+                    return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                yield event
+                if event.get("done"):
+                    return
+        finally:
+            subscribers = self._subscribers.get(task_id, [])
+            subscribers.remove(queue)
+            if not subscribers:
+                self._subscribers.pop(task_id, None)
+
+
+progress_hub = ProgressHub()
@@ -0,0 +1,185 @@
+"""
+Содержит анализ результатов стратегии в зависимости от даты начала:
+стратегия запускается с каждой (или каждой N-й) даты истории тикера,
+по каждому запуску рассчитываются доходность и просадка, по всем
+запускам - их распределение.
+"""
+
+import math
+from decimal import Decimal, localcontext
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from trading_strategy_tester.api.schemas import StrategyParameters
+from trading_strategy_tester.models.date_index import DateIndex
+from trading_strategy_tester.models.fill_model import FillModel
+from trading_strategy_tester.models.stock_candle import StockCandle
+from trading_strategy_tester.services.calculate_results import CalculateResult
+from trading_strategy_tester.services.progress import ProgressReporter
+
+# Метрики запусков, для которых строится распределение
+ROLLING_METRICS = ("total_income_perc", "incom_year_pers",
+                   "max_drawdown_perc")
+
+# Перцентили распределения
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def rolling_sweep(candles: List[StockCandle], param: StrategyParameters,
+                  step: int = 1, min_days: int = 2,
+                  progress: Optional[ProgressReporter] = None,
+                  dates: Optional[DateIndex] = None,
+                  fill: Optional[FillModel] = None
+                  ) -> Dict[str, Any]:
+    """
+    Рассчитывает стратегию от каждой step-й даты начала до конца истории.
+
+    Выполняется в пуле расчетов; все запуски считаются одним проходом
+    векторизованного движка LaneEngine.
+
+    Args:
+        candles (List[StockCandle]): Свечи тикера.
+        param (StrategyParameters): Параметры стратегии.
+        step (int): Шаг дат начала в торговых днях.
+        min_days (int): Минимальный период запуска в календарных днях
+            (при периоде меньше двух дней годовая доходность не
+            определена).
+        progress (Optional[ProgressReporter]): Репортер прогресса.
+        dates (Optional[DateIndex]): Индекс дат свечей.
+        fill (Optional[FillModel]): Модель исполнения с учетом объема
+            и проскальзывания (по умолчанию заявки исполняются
+            полностью).
+
+    Returns:
+        Dict[str, Any]: Запуски по датам начала (rows) и распределение
+            метрик (distribution).
+    """
+    import numpy as np
+
+    from trading_strategy_tester.services.lane_engine import (
+        CandleArrays, LaneEngine, round_money)
+
+    arrays = CandleArrays.from_candles(candles, dates)
+    last = arrays.ordinals[-1] if len(arrays) else 0
+    starts = np.arange(0, len(arrays), max(1, step))
+    period_days = last - arrays.ordinals[starts] + 1
+    starts = starts[period_days >= min_days]
+    period_days = last - arrays.ordinals[starts] + 1
+
+    lanes = len(starts)
+    result = LaneEngine(arrays).run(
+        starts,
+        np.full(lanes, float(param.buy_price)),
+        np.full(lanes, float(param.sell_price)),
+        float(param.initial_cache), float(param.commission_rate),
+        float(param.tax_rate), progress, fill)
+
+    # Доходность считается по формулам CalculateResult в Decimal из
+    # целых копеек, поэтому совпадает с расчетом калькулятора
+    total_income_perc, incom_year_pers = _income_percents(
+        _kopecks(result.first_overall), _kopecks(result.final_overall),
+        period_days.tolist())
+    max_drawdown_perc = round_money(result.max_drawdown * 100)
+
+    rows = [
+        {
+            "start_date": arrays.dates[start],
+            "invest_period_days": int(days),
+            "total_income_perc": _finite(income),
+            "incom_year_pers": _finite(per_year),
+            "max_drawdown_perc": _finite(drawdown),
+            "buy_count": int(buys),
+            "sell_count": int(sells),
+            "final_overall_result": _finite(final),
+        }
+        for start, days, income, per_year, drawdown, buys, sells, final
+        in zip(starts.tolist(), period_days.tolist(),
+               total_income_perc.tolist(), incom_year_pers.tolist(),
+               max_drawdown_perc.tolist(), result.buy_count.tolist(),
+               result.sell_count.tolist(), result.final_overall.tolist())
+    ]
+    distribution = {
+        name: _distribution(values) for name, values in zip(
+            ROLLING_METRICS,
+            (total_income_perc, incom_year_pers, max_drawdown_perc))
+    }
+    if progress is not None:
+        progress.update(len(arrays), len(arrays))
+    return {
+        "runs": lanes,
+        "end_date": arrays.dates[-1] if len(arrays) else None,
+        "distribution": distribution,
+        "rows": rows,
+    }
+
+
+def _kopecks(values) -> List[int]:
+    """Переводит суммы, округленные до копеек, в целые копейки."""
+    import numpy as np
+
+    return np.rint(values * 100).astype(np.int64).tolist()
+
+
+def _income_percents(first: Sequence[int], final: Sequence[int],
+                     period_days: Sequence[int]) -> Tuple[Any, Any]:
+    """
+    Рассчитывает доходность запусков в процентах (за период и в год)
+    так же, как CalculateResult.
+
+    Args:
+        first (Sequence[int]): Общий результат первой строки в копейках.
+        final (Sequence[int]): Общий результат последней строки
+            в копейках.
+        period_days (Sequence[int]): Период запуска в днях.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Доходность за период и в год
+            (NaN, если не определена).
+    """
+    import numpy as np
+
+    round_money = CalculateResult.round_money
+    initial = [Decimal(value).scaleb(-2) for value in first]
+    closing = [Decimal(value).scaleb(-2) for value in final]
+    total, per_year = [], []
+    with localcontext() as ctx:
+        ctx.prec = CalculateResult.DECIMAL_PRECISION
+        for start, end, days in zip(initial, closing, period_days):
+            try:
+                income = round_money((end - start) / start * 100)
+            except ArithmeticError:
+                total.append(math.nan)
+                per_year.append(math.nan)
+                continue
+            total.append(float(income))
+            try:
+                years = round_money(Decimal(days) / 365)
+                per_year.append(float(round_money(income / years)))
+            except ArithmeticError:
+                per_year.append(math.nan)
+    return np.array(total), np.array(per_year)
+
+
+def _finite(value: float) -> Optional[float]:
+    """Возвращает None вместо NaN и бесконечностей."""
+    return value if math.isfinite(value) else None
+
+
+def _distribution(values) -> Dict[str, Optional[float]]:
+    """Возвращает статистики распределения метрики по запускам."""
+    import numpy as np
+
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return {"count": 0}
+    stats = {
+        "count": int(len(values)),
+        "mean": round(float(values.mean()), 2),
+        "std": round(float(values.std()), 2),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "share_positive": round(float((values > 0).mean()), 4),
+    }
+    for percentile, value in zip(
+            PERCENTILES, np.percentile(values, PERCENTILES)):
+        stats[f"p{percentile}"] = round(float(value), 2)
+    return stats
@@ -0,0 +1,169 @@
+"""
+Содержит отбор тикеров: одна стратегия с относительными уровнями
+покупки и продажи рассчитывается по всем тикерам с загруженной
+историей, итоги ранжируются по выбранной метрике.
+
+Тикеры рассчитываются параллельно в пуле расчетов; свечи загружает
+сам рабочий процесс, поэтому в памяти одновременно находятся свечи
+только рассчитываемых тикеров, а в основном процессе - только итоги.
+"""
+
+import asyncio
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+from trading_strategy_tester.api.schemas import (ScreenParameters,
+                                                 StrategyParameters)
+from trading_strategy_tester.services.admission import admission
+from trading_strategy_tester.services.compute_pool import compute_pool
+from trading_strategy_tester.services.database_gateway import (
+    SUMMARY_RANK_COLUMNS, DatabaseGateway)
+from trading_strategy_tester.services.progress import ProgressReporter
+from trading_strategy_tester.services.strategy_calculator import (
+    StrategyCalculator)
+
+
+def relative_parameters(rule: ScreenParameters, ticker: str,
+                        reference: Decimal) -> StrategyParameters:
+    """
+    Возвращает параметры стратегии тикера: уровни покупки и продажи
+    в процентах от опорной цены, округленные так же, как денежные
+    величины калькулятора (до копеек, банковское округление).
+
+    Raises:
+        ValueError: Если опорная цена или уровень покупки
+            не положительны.
+    """
+    if reference <= 0:
+        raise ValueError(f"Опорная цена {ticker} не положительна")
+    round_money = StrategyCalculator.round_money
+    buy_price = round_money(reference * (100 + rule.buy_pct) / 100)
+    if buy_price <= 0:
+        raise ValueError(f"Уровень покупки {ticker} меньше копейки")
+    return StrategyParameters(
+        ticker=ticker,
+        initial_cache=rule.initial_cache,
+        buy_price=buy_price,
+        sell_price=round_money(reference * (100 + rule.sell_pct) / 100),
+        commission_rate=rule.commission_rate,
+        tax_rate=rule.tax_rate,
+    )
+
+
+def screen_ticker(ticker: str, rule: ScreenParameters,
+                  progress: Optional[ProgressReporter] = None
+                  ) -> Dict[str, Any]:
+    """
+    Загружает свечи тикера и рассчитывает итоги стратегии (выполняется
+    в пуле расчетов).
+
+    Returns:
+        Dict[str, Any]: Итоги CalculateResult.
+
+    Raises:
+        ValueError: Если история тикера пуста или не загружена.
+    """
+    from trading_strategy_tester.services.facade import Facade
+
+    async def load():
+        async with DatabaseGateway() as gateway:
+            return await gateway.load_candle_series(ticker)
+
+    series = asyncio.run(load())
+    if not len(series):
+        raise ValueError(f"История {ticker} пуста")
+    param = relative_parameters(rule, ticker, series.close[0])
+    _, summary, _ = Facade.calculate(series.candles(), param,
+                                     dates=series.dates, summary_only=True)
+    return summary
+
+
+def rank(rows: Sequence[Dict[str, Any]], rank_by: str,
+         limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Ранжирует итоги тикеров по убыванию метрики rank_by.
+
+    Args:
+        rows (Sequence[Dict[str, Any]]): Итоги с полем ticker.
+        rank_by (str): Метрика из SUMMARY_RANK_COLUMNS.
+        limit (Optional[int]): Сколько первых мест вернуть.
+
+    Returns:
+        List[Dict[str, Any]]: Итоги с местом (rank).
+    """
+    ordered = sorted(rows, key=lambda row: (-row[rank_by], row["ticker"]))
+    return [{"rank": place, **row}
+            for place, row in enumerate(ordered[:limit], 1)]
+
+
+async def screen_universe(rule: ScreenParameters,
+                          tickers: Optional[Sequence[str]] = None,
+                          rank_by: str = "incom_year_pers",
+                          limit: Optional[int] = None,
+                          progress: Optional[ProgressReporter] = None
+                          ) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Рассчитывает стратегию по тикерам и отдает события по мере
+    готовности.
+
+    События:
+        {"total": N, "tickers": [...]} - после допуска к расчету;
+        {"ticker", "done", "total", "summary"} или
+        {"ticker", "done", "total", "error"} - по каждому тикеру;
+        {"done", "total", "ranking"} - итоговая таблица.
+
+    Args:
+        rule (ScreenParameters): Относительные параметры стратегии.
+        tickers (Optional[Sequence[str]]): Тикеры (по умолчанию все
+            с загруженной историей).
+        rank_by (str): Метрика ранжирования.
+        limit (Optional[int]): Сколько мест включить в таблицу.
+        progress (Optional[ProgressReporter]): Репортер прогресса.
+
+    Raises:
+        ValueError: Если метрика ранжирования неизвестна.
+        Overloaded: Если очередь отборов заполнена.
+    """
+    if rank_by not in SUMMARY_RANK_COLUMNS:
+        raise ValueError(f"Неизвестная метрика ранжирования: {rank_by}")
+    if tickers is None:
+        async with DatabaseGateway() as gateway:
+            tickers = await gateway.list_candle_tickers()
+    tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+    total = len(tickers)
+
+    async def run(ticker: str) -> Tuple[str, Optional[Dict[str, Any]],
+                                        Optional[str]]:
+        try:
+            summary = await compute_pool.run(screen_ticker, ticker, rule)
+        except Exception as e:  # ошибка тикера не прерывает отбор
+            return ticker, None, f"{type(e).__name__}: {e}"
+        return ticker, summary, None
+
+    async with admission.admit("screen", total, progress):
+        yield {"total": total, "tickers": tickers}
+        if progress:
+            progress.stage("calculating", total)
+        # Ожидающие задачи занимают место в пуле по очереди
+        # (compute_pool ограничивает число переданных задач)
+        tasks = [asyncio.ensure_future(run(ticker)) for ticker in tickers]
+        rows = []
+        try:
+            for done, future in enumerate(asyncio.as_completed(tasks), 1):
+                ticker, summary, error = await future
+                if progress:
+                    progress.update(done, total)
+                if error is not None:
+                    yield {"ticker": ticker, "done": done, "total": total,
+                           "error": error}
+                    continue
+                rows.append({"ticker": ticker, **summary})
+                yield {"ticker": ticker, "done": done, "total": total,
+                       "summary": summary}
+        finally:
+            for task in tasks:
+                task.cancel()
+        if progress:
+            progress.finish()
+        yield {"done": total, "total": total,
+               "ranking": rank(rows, rank_by, limit)}
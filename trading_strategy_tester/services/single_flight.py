@@ -0,0 +1,66 @@
+"""
+Содержит объединение одинаковых одновременных операций: пока операция
+с ключом выполняется, повторные вызовы с тем же ключом ждут ее
+результата вместо повторного выполнения.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from trading_strategy_tester.services.metrics import metrics
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Объединение одновременных вызовов по ключу.
+
+    Операция выполняется отдельной задачей: отмена одного из ожидающих
+    (например, при отключении клиента) не отменяет ее для остальных.
+    Результат не кэшируется - после завершения следующий вызов
+    выполняет операцию заново.
+    """
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name (str): Имя для метрик: {name}_started - выполненные
+                операции, {name}_coalesced - присоединившиеся вызовы.
+        """
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Возвращает, выполняется ли операция с ключом."""
+        return key in self._calls
+
+    async def run(self, key: Hashable,
+                  func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Выполняет операцию или присоединяется к выполняемой.
+
+        Args:
+            key (Hashable): Ключ операции.
+            func (Callable[[], Awaitable[T]]): Операция.
+
+        Returns:
+            T: Результат операции (исключение операции передается всем
+                ожидающим).
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            metrics.inc(f"{self.name}_started")
+        else:
+            metrics.inc(f"{self.name}_coalesced")
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        """Снимает операцию с учета после завершения."""
+        self._calls.pop(key, None)
+        # Ошибка считается полученной, даже если все ожидающие отменены
+        if not task.cancelled():
+            task.exception()
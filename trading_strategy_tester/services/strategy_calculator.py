@@ -4,13 +4,15 @@
 """
 
 import logging
-from datetime import datetime
-from typing import List, Tuple
-from decimal import Decimal, getcontext, ROUND_HALF_EVEN
+from typing import List, Optional, Tuple
+from decimal import Decimal, localcontext, ROUND_HALF_EVEN
 
+from trading_strategy_tester.models.date_index import DateIndex
 from trading_strategy_tester.models.stock_candle import StockCandle
+from trading_strategy_tester.models.trade import Trade
 from trading_strategy_tester.models.trading_result import TradingResult
 from trading_strategy_tester.api.schemas import StrategyParameters
+from trading_strategy_tester.services.progress import ProgressReporter
 
 logger = logging.getLogger(__name__)
 
@@ -23,13 +25,19 @@ class StrategyCalculator:
     # Константы класса
     MONEY_PRECISION = Decimal('0.01')
     ROUNDING_METHOD = ROUND_HALF_EVEN
+    # Точность контекста Decimal, в котором выполняется расчет
+    DECIMAL_PRECISION = 10
 
-    def __init__(self, parameters: StrategyParameters):
+    def __init__(self, parameters: StrategyParameters,
+                 summary_only: bool = False):
         """
         Инициализация класса StrategyCalculator.
 
         Args:
             parameters (StrategyParameters): Параметры стратегии.
+            summary_only (bool): Режим только итогов: из состояний по
+                дням сохраняются только первое и последнее, и строки
+                результатов создаются только для них.
             share_count (int): Количество приобретенных акций.
             amount_in_shares (Decimal): Текущая стоимость всех купленных акций.
             overall_result (Decimal): Общий результат (стоимость акций + кэш).
@@ -42,9 +50,15 @@ class StrategyCalculator:
             years_list (list): Сюда вносится год, после вычета налога, в конце
                 года, для исключения повторного списания.
             cache (Decimal): Сумма кэша.
+            trades (List[Trade]): Журнал сделок в порядке исполнения.
+            trip (int): Номер текущего оборота (покупки до продажи).
+            date_str (str): Дата обрабатываемого дня.
+            day_states (list): Неокругленные состояния портфеля по дням;
+                после расчета заменяются строками результатов в том же
+                списке (data_list).
         """
         self.parameters = parameters
-        getcontext().prec = 10
+        self.summary_only = summary_only
 
         self.share_count = 0
         self.amount_in_shares = Decimal('0')
@@ -55,8 +69,13 @@ class StrategyCalculator:
         self.tax_sum = Decimal('0')
         self.total_tax = Decimal('0')
         self.data_list = []
+        self.day_states = []
         self.years_list = []
+        self._taxed_years = set()
         self.cache = self.parameters.initial_cache
+        self.trades: List[Trade] = []
+        self.trip = 1
+        self.date_str = ""
 
     @classmethod
     def round_money(cls, value: Decimal) -> Decimal:
@@ -107,6 +126,13 @@ class StrategyCalculator:
             self.cache = self.cache - count * buy_price - comiss_tmp
             self.share_count += count
             self.buy_count += 1
+            if count > 0:
+                # В журнал суммы записываются округленными, как в
+                # строках результатов
+                self.trades.append(Trade(
+                    date_str=self.date_str, side="buy", price=buy_price,
+                    quantity=count, commission=self.round_money(comiss_tmp),
+                    tax=Decimal('0.00'), trip=self.trip))
 
     def _process_sell(self, max_price: Decimal) -> Decimal:
         """
@@ -138,82 +164,129 @@ class StrategyCalculator:
             tax_tmp = self.round_money(
                 price_differ * self.share_count * tax_rate)
 
+            self.trades.append(Trade(
+                date_str=self.date_str, side="sell", price=sell_price,
+                quantity=self.share_count,
+                commission=self.round_money(comiss_tmp),
+                tax=tax_tmp, trip=self.trip))
+            self.trip += 1
+
             self.share_count = 0
             self.sell_count += 1
             self.comiss_sum += comiss_tmp
 
         return tax_tmp
 
-    def _process_year_end_tax(self, current_date: datetime):
+    def _process_year_end_tax(self, year: int, tax_day: bool):
         """
         Обработка налогов в конце года.
+
+        Args:
+            year: Год дня.
+            tax_day: Попадает ли день в период списания налога
+                (с 20 по 31 декабря).
         """
-        year = current_date.year
-        month = current_date.month
-        day = current_date.day
-
-        if (
-            year not in self.years_list
-            and month == 12
-            and 20 <= day <= 31
-        ):
+        if tax_day and year not in self._taxed_years:
             self.years_list.append(year)
+            self._taxed_years.add(year)
             self.cache -= self.tax_sum
             self.tax_sum = Decimal('0')
 
-    def _create_trading_result(self, row: StockCandle,
-                               tax_tmp: Decimal) -> TradingResult:
+    def _record_day(self, row: StockCandle, tax_tmp: Decimal) -> None:
         """
-        Создание объекта TradingResult для текущего дня.
+        Обновляет стоимость портфеля и налоги дня и сохраняет состояние
+        без округления; строка результата создается после расчета.
         """
-        closing_price = row.close
-        date_str = row.begin.split()[0]
-
-        self.amount_in_shares = self.share_count * closing_price
+        self.amount_in_shares = self.share_count * row.close
         self.overall_result = self.amount_in_shares + self.cache
         self.tax_sum += tax_tmp
         self.total_tax += tax_tmp
 
-        # Округление всех значений
-        rounded_values = {
-            "max_price": self.round_money(row.high),
-            "min_price": self.round_money(row.low),
-            "cache": self.round_money(self.cache),
-            "comiss_sum": self.round_money(self.comiss_sum),
-            "amount_in_shares": self.round_money(self.amount_in_shares),
-            "overall_result": self.round_money(self.overall_result),
-            "total_tax": self.round_money(self.total_tax),
-            "tax_sum": self.round_money(self.tax_sum)
-        }
-
+        state = (self.date_str, row.high, row.low, self.cache,
+                 self.share_count, self.amount_in_shares,
+                 self.overall_result, self.comiss_sum, self.tax_sum,
+                 self.total_tax)
+        # В режиме только итогов нужны первое и последнее состояния
+        if self.summary_only and len(self.day_states) == 2:
+            self.day_states[1] = state
+        else:
+            self.day_states.append(state)
+
+    def _create_trading_result(self, state: tuple) -> TradingResult:
+        """
+        Создание объекта TradingResult из состояния дня с округлением
+        всех денежных значений.
+        """
+        (date_str, max_price, min_price, cache, share_count,
+         amount_in_shares, overall_result, comiss_sum, tax_sum,
+         total_tax) = state
+        round_money = self.round_money
         return TradingResult(
             date_str=date_str,
-            share_count=self.share_count,
-            **rounded_values
+            max_price=round_money(max_price),
+            min_price=round_money(min_price),
+            cache=round_money(cache),
+            share_count=share_count,
+            amount_in_shares=round_money(amount_in_shares),
+            overall_result=round_money(overall_result),
+            comiss_sum=round_money(comiss_sum),
+            tax_sum=round_money(tax_sum),
+            total_tax=round_money(total_tax)
         )
 
-    def calculates_data(self, data: List[StockCandle]
+    def calculates_data(self, data: List[StockCandle],
+                        progress: Optional[ProgressReporter] = None,
+                        dates: Optional[DateIndex] = None
                         ) -> Tuple[List[TradingResult], List[int]]:
         """
         Рассчитывает результаты торговой стратегии.
 
         Args:
             data (List[StockCandle]): Список данных о торговых днях.
+            progress (Optional[ProgressReporter]): Репортер прогресса,
+                вызывается примерно раз на процент обработанных строк.
+            dates (Optional[DateIndex]): Индекс дат свечей data (обычно
+                загружен вместе со свечами). Если не передан, строится
+                по датам свечей.
 
         Returns:
             Tuple[List[TradingResult], List[int]]:
             data_list: Список списков, каждый из которых описывает состояние
              торгового портфеля на определённую дату: [date_str, max_price,
              min_price, cache, share_count, amount_in_shares, overall_result,
-             comiss_sum, tax_sum, total_tax].
+             comiss_sum, tax_sum, total_tax]. В режиме только итогов -
+             первая и последняя строки.
             counting_transactions: Список сделок [buy_count, sell_count].
         """
+        # Локальный контекст не меняет точность потока, в котором
+        # выполняется расчет, и не зависит от других расчетов.
+        with localcontext() as ctx:
+            ctx.prec = self.DECIMAL_PRECISION
+            return self._calculates_data(data, progress, dates)
+
+    def _calculates_data(self, data: List[StockCandle],
+                         progress: Optional[ProgressReporter],
+                         dates: Optional[DateIndex]
+                         ) -> Tuple[List[TradingResult], List[int]]:
+        """Рассчитывает стратегию в текущем контексте Decimal."""
         if data is None:
             logger.error("Входные данные равны None.")
             return [], []
 
-        for row in data:
-            current_date = datetime.strptime(row.begin.split()[0], '%Y-%m-%d')
+        if dates is None:
+            dates = DateIndex.from_begins(row.begin for row in data)
+        elif len(dates) != len(data):
+            raise ValueError("Индекс дат не соответствует свечам")
+
+        total = len(data)
+        step = ProgressReporter.step_for(total)
+
+        for index, (row, date_str, year, tax_day) in enumerate(
+                zip(data, dates.dates, dates.year, dates.tax_day), 1):
+            if progress is not None and index % step == 0:
+                progress.update(index, total)
+
+            self.date_str = date_str
             tax_tmp = Decimal('0')
 
             # Определяем возможные операции
@@ -228,8 +301,7 @@ class StrategyCalculator:
             # Сценарий 1: Покупка новых акций
             if can_buy:
                 self._process_buy(row.low)
-                result = self._create_trading_result(row, Decimal('0'))
-                self.data_list.append(result)
+                self._record_day(row, Decimal('0'))
                 transaction = True
 
                 # После покупки проверяем возможность продажи
@@ -238,14 +310,12 @@ class StrategyCalculator:
                     and self.share_count > 0
                 ):
                     tax_tmp = self._process_sell(row.high)
-                    result = self._create_trading_result(row, tax_tmp)
-                    self.data_list.append(result)
+                    self._record_day(row, tax_tmp)
 
             # Сценарий 2: Продажа существующих акций
             if can_sell:
                 tax_tmp = self._process_sell(row.high)
-                result = self._create_trading_result(row, tax_tmp)
-                self.data_list.append(result)
+                self._record_day(row, tax_tmp)
                 transaction = True
 
                 # После продажи проверяем возможность покупки
@@ -254,11 +324,19 @@ class StrategyCalculator:
 
             # Сценарий 3: Если не было операций
             elif not transaction:
-                result = self._create_trading_result(row, tax_tmp)
-                self.data_list.append(result)
+                self._record_day(row, tax_tmp)
 
             # Обработка налогов в конце года
-            self._process_year_end_tax(current_date)
+            self._process_year_end_tax(year, tax_day)
+
+        # Строки результатов создаются и округляются один раз после
+        # расчета (в режиме только итогов - первая и последняя) на месте
+        # состояний, чтобы не держать в памяти оба списка
+        states = self.day_states
+        for index, state in enumerate(states):
+            states[index] = self._create_trading_result(state)
+        self.data_list = states
+        self.day_states = []
 
         # Вычет налога в конце периода, если не в конце декабря
         if self.data_list:
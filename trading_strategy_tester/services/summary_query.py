@@ -0,0 +1,132 @@
+"""
+Содержит построитель запросов к общей таблице итогов расчетов.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+from trading_strategy_tester.services.database_gateway import (
+    SUMMARY_COLUMNS, DatabaseGateway)
+
+# Текстовые колонки, доступные для фильтрации и сортировки
+TEXT_COLUMNS = {"ticker", "created_at", "start_date", "end_date"}
+
+# Числовые колонки итогов
+NUMERIC_COLUMNS = {name for name, kind in SUMMARY_COLUMNS
+                   if kind in ("REAL", "INTEGER")}
+
+FILTER_PATTERN = re.compile(
+    r"^\s*(?P<column>\w+)\s*(?P<op>>=|<=|!=|=|>|<)\s*(?P<value>.+?)\s*$")
+
+
+@dataclass
+class SummaryFilter:
+    """
+    Условие фильтра итогов.
+
+    Атрибуты:
+        column (str): Колонка.
+        op (str): Оператор сравнения: =, !=, >, >=, <, <=.
+        value (float | str): Значение для сравнения.
+    """
+    column: str
+    op: str
+    value: object
+
+    @classmethod
+    def parse(cls, expression: str) -> "SummaryFilter":
+        """
+        Разбирает выражение вида "buy_count > 5".
+
+        Raises:
+            ValueError: Если выражение или колонка некорректны.
+        """
+        match = FILTER_PATTERN.match(expression)
+        if not match:
+            raise ValueError(f"Некорректное условие фильтра: {expression}")
+        column = match.group("column")
+        value = match.group("value")
+        if column in NUMERIC_COLUMNS:
+            try:
+                return cls(column, match.group("op"), float(value))
+            except ValueError as e:
+                raise ValueError(
+                    f"Ожидалось число в условии: {expression}") from e
+        if column in TEXT_COLUMNS:
+            if column == "ticker":
+                value = value.upper()
+            return cls(column, match.group("op"), value)
+        raise ValueError(f"Неизвестная колонка фильтра: {column}")
+
+
+@dataclass
+class SummaryQuery:
+    """
+    Запрос к итогам расчетов всех тикеров.
+
+    Атрибуты:
+        filters (List[SummaryFilter]): Условия, объединяемые через AND.
+        tickers (List[str]): Ограничение по тикерам.
+        order_by (str): Колонка сортировки.
+        descending (bool): Сортировка по убыванию.
+        limit (int): Количество строк.
+        offset (int): Смещение первой строки.
+    """
+    filters: List[SummaryFilter] = field(default_factory=list)
+    tickers: List[str] = field(default_factory=list)
+    order_by: str = "incom_year_pers"
+    descending: bool = True
+    limit: int = 20
+    offset: int = 0
+
+    @classmethod
+    def from_params(cls, where: Sequence[str] = (),
+                    tickers: Optional[str] = None,
+                    order_by: str = "incom_year_pers",
+                    descending: bool = True, limit: int = 20,
+                    offset: int = 0) -> "SummaryQuery":
+        """
+        Создает запрос из параметров HTTP-запроса.
+
+        Raises:
+            ValueError: Если параметры некорректны.
+        """
+        if order_by not in NUMERIC_COLUMNS | TEXT_COLUMNS:
+            raise ValueError(f"Недопустимая колонка сортировки: {order_by}")
+        return cls(
+            filters=[SummaryFilter.parse(expr) for expr in where],
+            tickers=[t.strip().upper() for t in (tickers or "").split(",")
+                     if t.strip()],
+            order_by=order_by,
+            descending=descending,
+            limit=limit,
+            offset=offset,
+        )
+
+    def to_sql(self) -> Tuple[str, list, str]:
+        """
+        Возвращает условие WHERE, его параметры и выражение ORDER BY.
+        Имена колонок берутся только из белого списка.
+        """
+        conditions = []
+        params: list = []
+        for item in self.filters:
+            conditions.append(f"{item.column} {item.op} ?")
+            params.append(item.value)
+        if self.tickers:
+            conditions.append(
+                f"ticker IN ({', '.join('?' * len(self.tickers))})")
+            params.extend(self.tickers)
+        # Сортировка только по одной колонке, чтобы порядок давал
+        # покрывающий индекс без дополнительной сортировки.
+        direction = "DESC" if self.descending else "ASC"
+        order_sql = f"{self.order_by} {direction}"
+        return " AND ".join(conditions), params, order_sql
+
+    async def execute(self) -> List[dict]:
+        """Выполняет запрос и возвращает строки итогов."""
+        where_sql, params, order_sql = self.to_sql()
+        async with DatabaseGateway() as gateway:
+            return await gateway.query_summaries(
+                where_sql, params, order_sql, self.limit, self.offset)
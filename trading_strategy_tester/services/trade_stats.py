@@ -0,0 +1,175 @@
+"""
+Содержит статистику сделок по журналу {ticker}_trades: обороты
+(покупки до продажи) и их итоги за один проход по сделкам, без
+перебора дневных результатов.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import Any, Dict, Iterable, List, Optional
+
+from trading_strategy_tester.models.trade import Trade
+
+MONEY_PRECISION = Decimal('0.01')
+
+
+def _money(value: Decimal) -> Decimal:
+    """Округляет сумму до копеек (банковское округление)."""
+    return value.quantize(MONEY_PRECISION, rounding=ROUND_HALF_EVEN)
+
+
+@dataclass
+class RoundTrip:
+    """
+    Оборот: покупки до продажи и сама продажа.
+
+    Атрибуты:
+        trip (int): Номер оборота.
+        open_date (str): Дата первой покупки.
+        close_date (Optional[str]): Дата продажи (None - позиция открыта).
+        buys (int): Количество покупок.
+        quantity (int): Количество акций.
+        cost (Decimal): Стоимость покупок без комиссии.
+        sell_price (Optional[Decimal]): Цена продажи.
+        commission (Decimal): Комиссия покупок и продажи.
+        tax (Decimal): Налог с продажи.
+    """
+    trip: int
+    open_date: str
+    close_date: Optional[str] = None
+    buys: int = 0
+    quantity: int = 0
+    cost: Decimal = Decimal('0')
+    sell_price: Optional[Decimal] = None
+    commission: Decimal = Decimal('0')
+    tax: Decimal = Decimal('0')
+
+    @property
+    def avg_buy_price(self) -> Decimal:
+        """Средняя цена покупки."""
+        return self.cost / self.quantity if self.quantity else Decimal('0')
+
+    @property
+    def gross(self) -> Decimal:
+        """Результат продажи без комиссии и налога."""
+        if self.sell_price is None:
+            return Decimal('0')
+        return self.sell_price * self.quantity - self.cost
+
+    @property
+    def net(self) -> Decimal:
+        """Результат продажи за вычетом комиссии и налога."""
+        return self.gross - self.commission - self.tax
+
+    @property
+    def holding_days(self) -> Optional[int]:
+        """Срок владения в календарных днях."""
+        if self.close_date is None:
+            return None
+        return (date.fromisoformat(self.close_date)
+                - date.fromisoformat(self.open_date)).days
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Возвращает оборот с округленными суммами."""
+        return {
+            "trip": self.trip,
+            "open_date": self.open_date,
+            "close_date": self.close_date,
+            "buys": self.buys,
+            "quantity": self.quantity,
+            "avg_buy_price": _money(self.avg_buy_price),
+            "sell_price": self.sell_price,
+            "gross": _money(self.gross),
+            "commission": _money(self.commission),
+            "tax": _money(self.tax),
+            "net": _money(self.net),
+            "holding_days": self.holding_days,
+        }
+
+
+@dataclass
+class TradeStats:
+    """
+    Статистика журнала сделок.
+
+    Атрибуты:
+        trips (List[RoundTrip]): Закрытые обороты.
+        open_trip (Optional[RoundTrip]): Открытая позиция на конец
+            периода.
+    """
+    trips: List[RoundTrip] = field(default_factory=list)
+    open_trip: Optional[RoundTrip] = None
+
+    @classmethod
+    def from_trades(cls, trades: Iterable[Trade]) -> "TradeStats":
+        """Собирает обороты за один проход по сделкам журнала."""
+        stats = cls()
+        current: Optional[RoundTrip] = None
+        for trade in trades:
+            if current is None or current.trip != trade.trip:
+                current = RoundTrip(trip=trade.trip,
+                                    open_date=trade.date_str)
+            current.commission += trade.commission
+            if trade.side == "buy":
+                current.buys += 1
+                current.quantity += trade.quantity
+                current.cost += trade.price * trade.quantity
+            else:
+                current.close_date = trade.date_str
+                current.sell_price = trade.price
+                current.tax += trade.tax
+                stats.trips.append(current)
+                current = None
+        stats.open_trip = current
+        return stats
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Возвращает итоги оборотов.
+
+        Returns:
+            Dict[str, Any]: Количество оборотов, прибыльных и убыточных,
+                доля прибыльных, суммы прибыли и убытка, профит-фактор,
+                средний, лучший и худший результат, средний срок
+                владения, комиссия, налог и открытая позиция.
+        """
+        nets = [trip.net for trip in self.trips]
+        wins = [net for net in nets if net > 0]
+        losses = [net for net in nets if net <= 0]
+        gross_profit = sum(wins, Decimal('0'))
+        gross_loss = -sum(losses, Decimal('0'))
+        holding = [trip.holding_days for trip in self.trips]
+        trips = len(self.trips)
+
+        open_position = None
+        if self.open_trip is not None:
+            open_position = {
+                "open_date": self.open_trip.open_date,
+                "quantity": self.open_trip.quantity,
+                "avg_buy_price": _money(self.open_trip.avg_buy_price),
+                "commission": _money(self.open_trip.commission),
+            }
+        return {
+            "trips": trips,
+            "wins": len(wins),
+            "losses": len(losses),
+            "win_rate_perc": (_money(Decimal(len(wins) * 100) / trips)
+                              if trips else None),
+            "gross_profit": _money(gross_profit),
+            "gross_loss": _money(gross_loss),
+            "profit_factor": (_money(gross_profit / gross_loss)
+                              if gross_loss else None),
+            "net_result": _money(sum(nets, Decimal('0'))),
+            "avg_net": (_money(sum(nets, Decimal('0')) / trips)
+                        if trips else None),
+            "best_net": _money(max(nets)) if nets else None,
+            "worst_net": _money(min(nets)) if nets else None,
+            "avg_holding_days": (round(sum(holding) / trips, 1)
+                                 if trips else None),
+            "commission": _money(sum(
+                (trip.commission for trip in self.trips), Decimal('0'))),
+            "tax": _money(sum(
+                (trip.tax for trip in self.trips), Decimal('0'))),
+            "open_position": open_position,
+        }
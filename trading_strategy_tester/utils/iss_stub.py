@@ -0,0 +1,127 @@
+"""
+Локальная HTTP-заглушка эндпоинта свечей ISS MOEX.
+
+Отдает записанные ответы (см. RecordingStore) в формате
+/iss/engines/stock/markets/shares/securities/{TICKER}/candles.json
+с параметрами from, till, interval и start (постраничная выдача).
+
+Запуск: python -m trading_strategy_tester.utils.iss_stub --port 8090
+"""
+
+import argparse
+import json
+import logging
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from trading_strategy_tester.services.candle_sources import (
+    CANDLE_COLUMNS, ISS_INTERVALS, ISS_PAGE_SIZE, RecordingStore)
+
+logger = logging.getLogger(__name__)
+
+CANDLES_PATH = re.compile(
+    r"^/iss/engines/stock/markets/shares/securities/"
+    r"(?P<ticker>[^/]+)/candles\.json$")
+
+# Обратное соответствие интервалов ISS периодам moexalgo
+PERIODS = {interval: period for period, interval in ISS_INTERVALS.items()}
+
+
+class IssStubHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов к заглушке ISS."""
+
+    store: RecordingStore = None
+
+    def do_GET(self):  # noqa: N802 - имя задано BaseHTTPRequestHandler
+        """Отдает страницу записанных свечей."""
+        url = urlparse(self.path)
+        match = CANDLES_PATH.match(url.path)
+        if not match:
+            self.send_error(404, "Unknown endpoint")
+            return
+
+        query = parse_qs(url.query)
+        ticker = match.group("ticker")
+        start = query.get("from", [""])[0]
+        till = query.get("till", ["9999-12-31"])[0]
+        offset = int(query.get("start", ["0"])[0])
+        interval = int(query.get("interval", ["24"])[0])
+        period = PERIODS.get(interval, "1d")
+
+        begin_idx = CANDLE_COLUMNS.index("begin")
+        rows = [
+            row for row in self.store.load_ticker(ticker, period)
+            if start <= row[begin_idx][:10] <= till
+        ]
+        page = rows[offset:offset + ISS_PAGE_SIZE]
+
+        body = json.dumps({"candles": {"columns": CANDLE_COLUMNS,
+                                       "data": page}}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # noqa: A002
+        logger.debug("ISS stub: " + format, *args)
+
+
+def create_server(host: str = "127.0.0.1", port: int = 0,
+                  recordings_dir: Optional[Path] = None
+                  ) -> ThreadingHTTPServer:
+    """
+    Создает сервер заглушки ISS.
+
+    Args:
+        host (str): Адрес для прослушивания.
+        port (int): Порт (0 - выбрать свободный).
+        recordings_dir (Optional[Path]): Каталог записей.
+
+    Returns:
+        ThreadingHTTPServer: Сервер, готовый к serve_forever().
+    """
+    handler = type("BoundIssStubHandler", (IssStubHandler,),
+                   {"store": RecordingStore(recordings_dir)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def start_in_thread(recordings_dir: Optional[Path] = None
+                    ) -> ThreadingHTTPServer:
+    """
+    Запускает заглушку в фоновом потоке на свободном порту.
+
+    Базовый адрес: f"http://127.0.0.1:{server.server_port}".
+    Для остановки вызовите server.shutdown().
+    """
+    server = create_server(recordings_dir=recordings_dir)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    """Точка входа для запуска заглушки из командной строки."""
+    parser = argparse.ArgumentParser(description="Заглушка ISS MOEX")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--recordings-dir", type=Path, default=None)
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.recordings_dir)
+    logger.info("Заглушка ISS запущена на %s:%s", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,23 +1,244 @@
-"""Модуль логирования."""
+"""
+Модуль логирования.
 
+Записи журнала передаются через очередь фоновому потоку, который
+пишет их в консоль и в файл с ротацией по размеру, поэтому вызовы
+логирования в обработчиках запросов не выполняют операций записи.
+Записи дополняются идентификатором запроса и временем этапов его
+обработки (contextvars) и могут выводиться в формате JSON.
+"""
+
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from trading_strategy_tester.config import settings
+
+# Идентификатор обрабатываемого запроса
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id",
+                                                       default=None)
+# Время этапов обработки запроса в миллисекундах
+stage_timings_var: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "stage_timings", default=None)
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Атрибуты, которые есть у любой записи; остальные переданы через extra
+_RECORD_ATTRS = set(vars(logging.LogRecord(
+    "", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id",
+                                       "stages", "suppressed"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """Добавляет время этапа к этапам текущего запроса."""
+    timings = stage_timings_var.get()
+    if timings is not None:
+        timings[name] = round(timings.get(name, 0) + seconds * 1000, 2)
+
+
+@contextmanager
+def timed_stage(name: str) -> Iterator[None]:
+    """Измеряет время блока как этап текущего запроса."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+class ContextFilter(logging.Filter):
+    """Добавляет к записи идентификатор запроса и время его этапов."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        timings = stage_timings_var.get()
+        record.stages = dict(timings) if timings else None
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Ограничивает количество записей ниже уровня ERROR из одного места
+    вызова (логгер и строка): не больше rate записей в секунду с запасом
+    burst. Количество пропущенных записей указывается в следующей
+    записи этого места.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst or max(1, int(rate * 2))
+        # Место вызова -> (запас, время обновления, пропущено)
+        self._buckets: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now, 0]
+            tokens = min(self.burst,
+                         bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                bucket[2] += 1
+                return False
+            bucket[0] = tokens - 1
+            record.suppressed = bucket[2]
+            bucket[2] = 0
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись одной строкой JSON."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc)
+            .isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name in ("request_id", "stages", "suppressed"):
+            value = getattr(record, name, None)
+            if value:
+                entry[name] = value
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRS and not name.startswith("_"):
+                entry[name] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Текстовый формат с идентификатором запроса и пропусками."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            text += f" [request_id={request_id}]"
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            text += f" (пропущено похожих записей: {suppressed})"
+        return text
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """
+    Передает запись в очередь, сохраняя ее поля: сообщение
+    форматируется с аргументами, трассировка исключения сохраняется
+    текстом, а форматирование записи выполняет фоновый поток.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+def setup_logging(level: Optional[str] = None,
+                  json_format: Optional[bool] = None,
+                  log_file: Optional[Path] = None
+                  ) -> logging.handlers.QueueListener:
+    """
+    Настройка глобального логирования.
+
+    Корневой логгер получает обработчик очереди; фоновый поток пишет
+    записи в консоль и в файл с ротацией по размеру. Повторный вызов
+    возвращает уже запущенный поток записи.
+
+    Args:
+        level (Optional[str]): Уровень логирования.
+        json_format (Optional[bool]): Писать записи в формате JSON.
+        log_file (Optional[Path]): Файл журнала.
+
+    Returns:
+        logging.handlers.QueueListener: Поток записи журнала.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        log_file = Path(log_file or settings.log_file)
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        if json_format is None:
+            json_format = settings.log_format == "json"
+        formatter = JsonFormatter() if json_format \
+            else TextFormatter(TEXT_FORMAT)
+
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=settings.log_max_mb * 2 ** 20,
+            backupCount=settings.log_backups, encoding="utf-8")
+        stream_handler = logging.StreamHandler()
+        for handler in (file_handler, stream_handler):
+            handler.setFormatter(formatter)
+
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        queue_handler = ContextQueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+        if settings.log_rate_limit > 0:
+            queue_handler.addFilter(RateLimitFilter(settings.log_rate_limit))
+
+        root = logging.getLogger()
+        root.handlers = [queue_handler]
+        root.setLevel((level or settings.log_level).upper())
+
+        # Журналы uvicorn пишутся через ту же очередь; запросы
+        # журналирует RequestContextMiddleware вместе с этапами
+        for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+            server_logger = logging.getLogger(name)
+            server_logger.handlers = []
+            server_logger.propagate = True
+        logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
 
+        # Отключаем логирование для pygls.protocol.json_rpc
+        pygls_logger = logging.getLogger("pygls.protocol.json_rpc")
+        pygls_logger.setLevel(logging.ERROR)
 
-def setup_logging():
-    """Настройка глобального логирования."""
-    log_dir = Path.cwd() / "logs"
-    log_dir.mkdir(parents=True, exist_ok=True)
+        _listener = logging.handlers.QueueListener(
+            log_queue, stream_handler, file_handler,
+            respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+        return _listener
 
-    log_file = log_dir / "app.log"
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler(str(log_file), encoding='utf-8')
-        ])
 
-    # Отключаем логирование для pygls.protocol.json_rpc
-    pygls_logger = logging.getLogger("pygls.protocol.json_rpc")
-    pygls_logger.setLevel(logging.ERROR)
+def stop_logging() -> None:
+    """
+    Дописывает записи из очереди и останавливает поток записи; далее
+    записи пишутся обработчиками напрямую.
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            logging.getLogger().handlers = list(_listener.handlers)
+            _listener = None